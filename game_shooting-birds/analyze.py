@@ -0,0 +1,271 @@
+"""
+analysis of telemetry files (see telemetry.py) from one or many cabinets
+
+The files are memory-mapped as numpy structured arrays and processed
+in chunks, so inputs of any size are streamed without loading them into
+memory. The files of one game run (the same prefix: cabinet and start
+time) are processed in order by one task, the tasks can run in parallel
+in a process pool (--processes). Results:
+    accuracy by kind and scale of targets (spawned / shot down)
+    accuracy of shots, heatmap of shots over the playing field
+    reaction times (spawn -> hit) and score distribution of rounds
+
+example:
+    python analyze.py telemetry/ other_cabinet/ --processes 4 \
+        --json report.json --heatmap shots.npy
+"""
+
+import argparse
+import json
+import multiprocessing
+import struct
+from pathlib import Path
+
+import numpy
+
+import telemetry as events
+
+WIDTH = 800  # the playing field (the window of birds.py)
+HEIGHT = 742
+CHUNK = 2**20  # records processed at once
+REACTION_BIN = 0.05  # seconds
+REACTION_BINS = 600  # reaction times up to 30 s
+SCORE_PERCENTILES = [0, 10, 25, 50, 75, 90, 100]
+
+
+def record_dtype():
+    """
+    numpy dtype of one record (the same layout as telemetry.RECORD)
+    """
+    names, formats, offsets = [], [], []
+    offset = 0
+    for name, code in events.FIELDS:
+        names.append(name)
+        formats.append(numpy.dtype("<" + code))
+        offsets.append(offset)
+        offset += struct.calcsize("<" + code)
+    return numpy.dtype({
+        "names": names, "formats": formats, "offsets": offsets,
+        "itemsize": events.RECORD_SIZE})
+
+
+DTYPE = record_dtype()
+
+
+def find_runs(paths):
+    """
+    telemetry files grouped by game run: {prefix: [files in order]}
+    """
+    files = []
+    for path in map(Path, paths):
+        files += sorted(path.glob("*.tlm")) if path.is_dir() else [path]
+    runs = {}
+    for file in files:
+        prefix = file.stem.rpartition("-")[0]
+        runs.setdefault(str(file.parent / prefix), []).append(file)
+    return runs
+
+
+def open_records(path):
+    """
+    read-only memory map of the records (an incomplete record
+    at the end of the file is ignored)
+    """
+    count = path.stat().st_size // events.RECORD_SIZE
+    if not count:
+        return numpy.empty(0, dtype=DTYPE)
+    return numpy.memmap(path, dtype=DTYPE, mode="r", shape=(count,))
+
+
+def empty_result():
+    return {
+        "records": 0,
+        # kind * 16 + scale
+        "spawned": numpy.zeros(64, dtype=numpy.int64),
+        "hit": numpy.zeros(64, dtype=numpy.int64),
+        "shots": 0,
+        "shots_hit": 0,
+        "dry_fire": 0,
+        "reloads": 0,
+        "pauses": 0,
+        "heatmap": numpy.zeros((HEIGHT, WIDTH), dtype=numpy.int64),
+        "reaction": numpy.zeros((4, REACTION_BINS), dtype=numpy.int64),
+        "scores": []}
+
+
+def analyze_run(files):
+    """
+    one game run: its files are streamed chunk by chunk,
+    the spawn times are kept to pair them with the hits
+    """
+    result = empty_result()
+    spawn_times = numpy.full(1024, numpy.nan)
+    for path in files:
+        records = open_records(path)
+        for start in range(0, len(records), CHUNK):
+            chunk = records[start:start + CHUNK]
+            event = numpy.asarray(chunk["event"])
+            kind = numpy.asarray(chunk["kind"]).astype(numpy.int64)
+            key = kind * 16 + numpy.asarray(chunk["scale"]) % 16
+            result["records"] += len(chunk)
+
+            spawn = event == events.SPAWN
+            hit = event == events.HIT
+            shot = event == events.SHOT
+            result["spawned"] += numpy.bincount(key[spawn], minlength=64)
+            result["hit"] += numpy.bincount(key[hit], minlength=64)
+            result["shots"] += int(shot.sum())
+            result["shots_hit"] += int((shot & (kind != events.NONE)).sum())
+            result["dry_fire"] += int((event == events.DRY_FIRE).sum())
+            result["reloads"] += int((event == events.RELOAD).sum())
+            result["pauses"] += int((event == events.PAUSE).sum())
+
+            # shots inside the playing field, one cell per pixel
+            x = numpy.asarray(chunk["x"][shot]).astype(numpy.int64)
+            y = numpy.asarray(chunk["y"][shot]).astype(numpy.int64)
+            inside = (x >= 0) & (x < WIDTH) & (y >= 0) & (y < HEIGHT)
+            result["heatmap"] += numpy.bincount(
+                y[inside] * WIDTH + x[inside],
+                minlength=WIDTH * HEIGHT).reshape(HEIGHT, WIDTH)
+
+            # reaction time: hit of the target - spawn of the target
+            ids = numpy.asarray(chunk["id"]).astype(numpy.int64)
+            times = numpy.asarray(chunk["time"])
+            if spawn.any() and ids[spawn].max() >= len(spawn_times):
+                grown = numpy.full(
+                    max(2 * len(spawn_times), ids[spawn].max() + 1),
+                    numpy.nan)
+                grown[:len(spawn_times)] = spawn_times
+                spawn_times = grown
+            spawn_times[ids[spawn]] = times[spawn]
+            hit_ids = ids[hit]
+            known = hit_ids < len(spawn_times)
+            reaction = times[hit][known] - spawn_times[hit_ids[known]]
+            valid = ~numpy.isnan(reaction)
+            bins = numpy.minimum(
+                (reaction[valid] / REACTION_BIN).astype(numpy.int64),
+                REACTION_BINS - 1)
+            numpy.add.at(
+                result["reaction"], (kind[hit][known][valid], bins), 1)
+
+            result["scores"] += numpy.asarray(
+                chunk["score"][event == events.ROUND_END]).tolist()
+    return result
+
+
+def merge(total, result):
+    for key, value in result.items():
+        total[key] = total[key] + value
+    return total
+
+
+def histogram_percentiles(counts, values):
+    """
+    percentiles (50, 90, 99) and mean of a histogram
+    """
+    total = counts.sum()
+    if not total:
+        return None
+    cumulative = numpy.cumsum(counts)
+    summary = {
+        f"p{value}": round(float(values[numpy.searchsorted(
+            cumulative, total * value / 100)]), 3)
+        for value in (50, 90, 99)}
+    summary["mean"] = round(float((counts * values).sum() / total), 3)
+    summary["count"] = int(total)
+    return summary
+
+
+def report(result):
+    """
+    the merged result -> dictionary for JSON and printing
+    """
+    accuracy = {}
+    for kind, name in events.KINDS.items():
+        for scale in range(16):
+            key = kind * 16 + scale
+            spawned = int(result["spawned"][key])
+            hit = int(result["hit"][key])
+            if spawned or hit:
+                accuracy[f"{name} {scale}/10"] = {
+                    "spawned": spawned, "hit": hit,
+                    "hit_rate": round(hit / spawned, 4) if spawned else None}
+
+    centers = (numpy.arange(REACTION_BINS) + 0.5) * REACTION_BIN
+    reaction = {
+        name: histogram_percentiles(result["reaction"][kind], centers)
+        for kind, name in events.KINDS.items() if kind != events.NONE}
+    reaction["all"] = histogram_percentiles(
+        result["reaction"].sum(axis=0), centers)
+
+    scores = numpy.array(result["scores"])
+    heatmap = result["heatmap"]
+    # the playing field in 8x7 cells (for printing)
+    cells = heatmap[:HEIGHT // 7 * 7, :].reshape(
+        7, HEIGHT // 7, 8, WIDTH // 8).sum(axis=(1, 3))[::-1]
+    return {
+        "records": result["records"],
+        "shots": result["shots"],
+        "shot_accuracy": round(result["shots_hit"] / result["shots"], 4)
+        if result["shots"] else None,
+        "dry_fire": result["dry_fire"],
+        "reloads": result["reloads"],
+        "pauses": result["pauses"],
+        "targets": accuracy,
+        "reaction_time": reaction,
+        "rounds": len(scores),
+        "scores": {
+            f"p{value}": float(numpy.percentile(scores, value))
+            for value in SCORE_PERCENTILES} if len(scores) else None,
+        "score_mean": round(float(scores.mean()), 2) if len(scores) else None,
+        "heatmap_cells": cells.tolist()}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="analysis of telemetry files")
+    parser.add_argument(
+        "paths", nargs="+", help="telemetry files or their directories")
+    parser.add_argument(
+        "--processes", type=int, default=1,
+        help="game runs processed in parallel (0 = all cores)")
+    parser.add_argument("--json", help="the report is saved to the file")
+    parser.add_argument(
+        "--heatmap", help=f"heatmap of shots ({HEIGHT}x{WIDTH}, .npy)")
+    arguments = parser.parse_args()
+
+    runs = list(find_runs(arguments.paths).values())
+    total = empty_result()
+    if arguments.processes == 1 or len(runs) < 2:
+        for files in runs:
+            total = merge(total, analyze_run(files))
+    else:
+        with multiprocessing.Pool(arguments.processes or None) as pool:
+            for result in pool.imap_unordered(analyze_run, runs):
+                total = merge(total, result)
+
+    results = report(total)
+    print(f"{len(runs)} game runs, {results['records']} records")
+    print(f"shots: {results['shots']}, accuracy {results['shot_accuracy']}, "
+          f"dry fire {results['dry_fire']}, reloads {results['reloads']}, "
+          f"pauses {results['pauses']}")
+    for name, row in results["targets"].items():
+        print(f"  {name}: {row['hit']} / {row['spawned']} "
+              f"(hit rate {row['hit_rate']})")
+    for name, row in results["reaction_time"].items():
+        if row:
+            print(f"reaction time {name}: {row}")
+    print(f"rounds: {results['rounds']}, scores: {results['scores']}")
+    print("shots by cells of the playing field (top row = top of the field):")
+    for row in results["heatmap_cells"]:
+        print("  " + " ".join(f"{value:6d}" for value in row))
+
+    if arguments.json:
+        with open(arguments.json, "w") as file:
+            json.dump(results, file, indent=1)
+    if arguments.heatmap:
+        numpy.save(arguments.heatmap, total["heatmap"])
+
+
+if __name__ == "__main__":
+    main()
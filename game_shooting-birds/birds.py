@@ -15,6 +15,7 @@ player's options:
     move the mouse from left to right or arrow LEFT and RIGHT
         (looking around the landscape), arrow DOWN (to stop looking around)
     key SPACE (the game round is temporarily stopped)
+    key F11 (fullscreen on and off), key F12 (video recording on and off)
 
 ##############
 game structure
@@ -36,7 +37,12 @@ imports
 global VARIABLES
 lists of shooting objects (flowers and birds)
 dictionaries of colors, batches, groups, images, animations and sounds
-functions: set_anchor(), reset()
+functions: set_anchor(), create_sprite(), draw_batch(), reset(),
+    reload_bullets(), count_live_objects(), record_round(), record_event(),
+    world_snapshot(), publish_snapshot(), capture_round(), restore_round(),
+    save_round(), start_recording(), stop_recording(), add_flock(),
+    apply_quality(), scene(), active_widgets()
+classes AnimationClock, Tween, SineTween, TweenEngine, InputLatency
 variables (bird images & animations)
 
 classes
@@ -61,17 +67,53 @@ MyWindow
         Bird
         DarkBird
     Timer
+Bot
+AttractMode
+CaptureMode
 
 instances
 event handlers
     draw, key_press, mouse_motion, mouse_press
+    window_mouse_motion, window_mouse_press
+    update_mouse_motion,
     update_add_flower, update_add_bird, update_add_dark_bird, update_timer
 """
 
 import pyglet
 from pyglet import gl
 from pathlib import Path
-from random import randrange, choice
+from random import randrange, choice, random
+from math import sin, asin, pi
+from collections import deque
+from bisect import bisect_right
+from heapq import heapify
+import time
+import gc
+import sys
+import json
+import logging
+import logging.handlers
+import argparse
+import itertools
+import random as random_module
+
+from memory_report import MemoryGrowthError, MemoryReport, get_rss
+from sprite_layer import SpriteLayer, numpy
+from instanced_renderer import create_instanced_renderer
+if numpy is not None:
+    from flight_paths import FlightPaths
+    from flocking import Flocking
+from highscores import HighScores
+import telemetry as events
+from spectator import SpectatorServer
+import snapshot
+from quality import QualityGovernor
+from render_target import RenderTarget
+from capture import FrameWriter
+from recorder import Recorder
+from widgets import Button, Widgets
+from profiler import Profiler, Sampler, no_span
+from gc_policy import GCMonitor, GCPolicy
 
 WIDTH = 800  # for window
 HEIGHT = 742  # for window
@@ -85,6 +127,298 @@ NUMBER_OF_DARK_BIRDS = 1
 # setting dt for pyglet.clock.schedule_interval
 DT_BEFORE_NEW_GAME = 0.5
 DT_NEW_GAME = 0.8  # float(f"0.{randrange(4, 10)}")
+DT_ADD_BIRD = 0.5
+DT_ADD_DARK_BIRD = 1.0
+
+# crosshair modes:
+#   "sprite": the crosshair sprite is moved by update_cursor every 0.01 s
+#   "immediate": the crosshair sprite is moved as soon as the mouse motion
+#                is processed (in the same tick, just before drawing)
+#   "hardware": the system cursor with the image mini_target.png is used
+CURSOR_MODE = "sprite"
+MEASURE_INPUT_LATENCY = False  # input event -> frame, see InputLatency
+SPRITE_LAYERS = True  # shooting objects in SpriteLayer (numpy is required)
+INSTANCED_RENDERING = False  # sprite layers drawn by one call (OpenGL 3.3)
+# the game keeps its WIDTH x HEIGHT coordinates in a resizable window (F11
+# switches the fullscreen), the world is drawn at RENDER_SCALE of the view
+# into an offscreen framebuffer (see render_target.py)
+FULLSCREEN = False
+RENDER_SCALE = 1
+# flight paths of birds (see flight_paths.py, numpy is required),
+# a new bird gets a random one of them (names of flight_paths.PATHS)
+FLIGHT_PATHS = ["straight", "sine", "dive", "bezier", "loop"]
+# birds fly in flocks with dark birds mixed in (see flocking.py)
+FLOCKING = False
+NUMBER_OF_FLOCKS = 2
+FLOCK_SIZE = 6  # light birds
+FLOCK_DARK_BIRDS = 1
+
+# adaptive quality (see quality.py): when frames miss the budget, the steps
+# are switched off one by one (in this order), with headroom back on
+QUALITY = False
+QUALITY_BUDGET = 1000 / 60  # ms per frame
+QUALITY_STEPS = ["flowers", "animation", "clouds", "background", "resolution"]
+QUALITY_FLOWERS = 0.5  # share of NUMBER_OF_FLOWERS without the flowers step
+QUALITY_ANIMATION_RATE = 10  # updates per second of the bird animations
+QUALITY_RENDER_SCALE = 0.6  # RENDER_SCALE without the resolution step
+
+# frames saved to PNG in a scripted headless round (see CaptureMode and
+# capture.py): name of the frame, its scene and the seconds for which
+# the scene is displayed before the capture
+CAPTURE = None  # directory of the frames (--capture)
+CAPTURES = [
+    ("start", "START_GAME", 1), ("round", "TIMER", 5),
+    ("pause", "PAUSE", 0.5), ("end", "END_GAME", 1)]
+
+# video recording (see recorder.py): F12 starts and stops a recording
+# in the directory RECORDINGS, --record records from the start
+RECORD = False
+RECORDINGS = "recordings"
+RECORD_FORMAT = "auto"  # ffmpeg if it is installed, otherwise raw; png
+
+# profiling (see profiler.py): the phases of frames are spans of a trace
+# in the Chrome trace format, the stacks of the game are sampled every
+# PROFILE_SAMPLE_INTERVAL for flamegraphs
+PROFILE = None  # file of the trace (--profile)
+PROFILE_STACKS = None  # file of the collapsed stacks (--profile-stacks)
+PROFILE_SAMPLE_INTERVAL = 0.001  # seconds
+
+# garbage collector (see gc_policy.py): the pauses are always measured,
+# with GC_POLICY the loaded objects are frozen, full collections are
+# deferred during the round and run at its end and at reset()
+GC_POLICY = False
+
+# memory report after every round (see memory_report.py)
+MEMORY_REPORT = False
+MEMORY_REPORT_ROUNDS = 5  # the growth of memory is checked over N rounds
+MEMORY_GROWTH_LIMIT = 4 * 2**20  # bytes
+
+# leaderboard of rounds in SQLite (see highscores.py), None = not stored
+HIGH_SCORES = "highscores.sqlite3"
+HIGH_SCORES_TOP = 5  # number of the best rounds on the screen END_GAME
+
+# stream of gameplay events (see telemetry.py), None = not recorded
+TELEMETRY = "telemetry"  # directory of the files
+TELEMETRY_FILE_SIZE = 16 * 2**20  # bytes, then the next file is started
+TELEMETRY_MAX_FILES = 32  # the oldest files are deleted, 0 = kept forever
+TELEMETRY_FLUSH_INTERVAL = 1  # seconds
+
+# broadcast of the world to spectators (see spectator.py), None = off
+SPECTATOR_PORT = None
+SPECTATOR_HOST = "127.0.0.1"
+SPECTATOR_RATE = 10  # snapshots per second
+
+# binary snapshot of the running round (see snapshot.py), it is saved
+# at every pause and every SNAPSHOT_AUTOSAVE seconds of the round
+# (off by default: every save is synced to the slow card of the cabinet)
+SNAPSHOT = "round.snapshot"  # None = no snapshots
+SNAPSHOT_AUTOSAVE = 0  # seconds, 0 = only at pause (e.g. --autosave 5)
+RESTORE = None  # the snapshot is restored at start (--restore)
+
+# settings which can be changed by the option --set NAME=VALUE
+SETTINGS = [
+    "SCROLL_SPEED", "LENGTH_OF_ROUND", "NUMBER_OF_FLOWERS", "NUMBER_OF_BIRDS",
+    "NUMBER_OF_DARK_BIRDS", "DT_BEFORE_NEW_GAME", "DT_NEW_GAME",
+    "DT_ADD_BIRD", "DT_ADD_DARK_BIRD", "FLOCKING", "NUMBER_OF_FLOCKS",
+    "FLOCK_SIZE", "FLOCK_DARK_BIRDS"]
+
+# bot player (see Bot)
+BOT_POLICIES = ["random", "scripted", "nearest", "max_score", "avoid_dark"]
+BOT_POLICY = None  # None = the player plays
+BOT_REACTION_DELAY = 0.25  # seconds between choosing a target and the shot
+BOT_AIM_ERROR = 6  # standard deviation of the aim in pixels
+BOT_SEED = None
+
+# headless run (no visible window), the clock is advanced by 1/FPS
+# per frame without waiting for real time (SPEED 0 = as fast as possible)
+HEADLESS = False
+SPEED = 1  # times real time
+FPS = 60
+
+# attract mode: rounds are played automatically (see AttractMode)
+ATTRACT_MODE = False
+ATTRACT_HOURS = 0  # 0 = no time limit
+ATTRACT_ROUNDS = 0  # 0 = no limit of rounds
+ATTRACT_LOG = "attract.log"  # rotating log with one line per round
+ATTRACT_RESULTS = None  # file for the rows of rounds (JSON lines)
+ATTRACT_WARMUP_ROUNDS = 3  # rounds for the baseline of drift detection
+ATTRACT_RSS_DRIFT = 64 * 2**20  # bytes above the baseline
+ATTRACT_FRAME_TIME_DRIFT = 2  # p95 of frame time N times above the baseline
+ATTRACT_CALLBACK_DRIFT = 20  # scheduled callbacks above the baseline
+
+
+def parse_arguments():
+    """
+    command line options of the game (they override the settings above),
+    e.g. python birds.py --attract --rounds 100
+    """
+    parser = argparse.ArgumentParser(description=CAPTION)
+    parser.add_argument(
+        "--attract", action="store_true", default=ATTRACT_MODE,
+        help="play rounds automatically (stability runs)")
+    parser.add_argument(
+        "--hours", type=float, default=ATTRACT_HOURS,
+        help="attract mode: stop after N hours")
+    parser.add_argument(
+        "--rounds", type=int, default=ATTRACT_ROUNDS,
+        help="attract mode: stop after N rounds")
+    parser.add_argument(
+        "--log", default=ATTRACT_LOG, help="attract mode: log file")
+    parser.add_argument(
+        "--results", default=ATTRACT_RESULTS,
+        help="attract mode: file for the results of rounds (JSON lines)")
+    parser.add_argument(
+        "--highscores", default=HIGH_SCORES,
+        help="database of the leaderboard, empty = rounds are not stored")
+    parser.add_argument(
+        "--telemetry", default=TELEMETRY,
+        help="directory of telemetry files, empty = no telemetry")
+    parser.add_argument(
+        "--spectate", type=int, default=SPECTATOR_PORT, metavar="PORT",
+        help="broadcast the game to spectators on the port")
+    parser.add_argument(
+        "--spectate-rate", type=float, default=SPECTATOR_RATE,
+        help="spectators: snapshots per second")
+    parser.add_argument(
+        "--snapshot", default=SNAPSHOT,
+        help="file of the snapshot of the round, empty = no snapshots")
+    parser.add_argument(
+        "--autosave", type=float, default=SNAPSHOT_AUTOSAVE,
+        help="seconds between snapshots of the round, 0 = only at pause")
+    parser.add_argument(
+        "--restore", default=RESTORE, metavar="SNAPSHOT",
+        help="continue the round saved in the snapshot")
+    parser.add_argument(
+        "--fullscreen", action="store_true", default=FULLSCREEN,
+        help="start in fullscreen (F11 switches it)")
+    parser.add_argument(
+        "--render-scale", type=float, default=RENDER_SCALE,
+        help="the world is drawn at the part of the resolution of the view")
+    parser.add_argument(
+        "--quality", action="store_true", default=QUALITY,
+        help="lower the quality when frames miss the budget")
+    parser.add_argument(
+        "--frame-budget", type=float, default=QUALITY_BUDGET, metavar="MS",
+        help="quality: milliseconds per frame")
+    parser.add_argument(
+        "--set", action="append", default=[], metavar="NAME=VALUE",
+        help=f"change a setting: {', '.join(SETTINGS)}")
+    parser.add_argument(
+        "--bot", choices=list(BOT_POLICIES), default=BOT_POLICY,
+        help="the bot plays rounds with the policy")
+    parser.add_argument(
+        "--reaction", type=float, default=BOT_REACTION_DELAY,
+        help="bot: reaction delay in seconds")
+    parser.add_argument(
+        "--aim-error", type=float, default=BOT_AIM_ERROR,
+        help="bot: aim error in pixels")
+    parser.add_argument(
+        "--seed", type=int, default=BOT_SEED,
+        help="seed of random numbers (game and bot)")
+    parser.add_argument(
+        "--headless", action="store_true", default=HEADLESS,
+        help="run without a visible window")
+    parser.add_argument(
+        "--speed", type=float, default=SPEED,
+        help="headless: times real time, 0 = as fast as possible")
+    parser.add_argument(
+        "--record", action="store_true", default=RECORD,
+        help="record a video from the start (F12 starts and stops it)")
+    parser.add_argument(
+        "--record-format", choices=["auto", "ffmpeg", "raw", "png"],
+        default=RECORD_FORMAT, help="format of recordings")
+    parser.add_argument(
+        "--capture", default=CAPTURE, metavar="DIRECTORY",
+        help="save the frames of a scripted headless round to PNG")
+    parser.add_argument(
+        "--profile", default=PROFILE, metavar="FILE",
+        help="trace of the phases of frames (Chrome trace format)")
+    parser.add_argument(
+        "--profile-stacks", default=PROFILE_STACKS, metavar="FILE",
+        help="sampled stacks of the game for flamegraphs")
+    parser.add_argument(
+        "--gc-policy", action="store_true", default=GC_POLICY,
+        help="no full collections of the garbage collector in rounds")
+    parser.add_argument(
+        "--memory-report", action="store_true", default=MEMORY_REPORT,
+        help="memory after every round, attract mode fails on its growth")
+    # unknown options are ignored (e.g. when the module is imported)
+    return parser.parse_known_args()[0]
+
+
+arguments = parse_arguments()
+ATTRACT_MODE = arguments.attract
+ATTRACT_HOURS = arguments.hours
+ATTRACT_ROUNDS = arguments.rounds
+ATTRACT_LOG = arguments.log
+ATTRACT_RESULTS = arguments.results
+HIGH_SCORES = arguments.highscores or None
+TELEMETRY = arguments.telemetry or None
+SPECTATOR_PORT = arguments.spectate
+SPECTATOR_RATE = arguments.spectate_rate
+SNAPSHOT = arguments.snapshot or None
+SNAPSHOT_AUTOSAVE = arguments.autosave
+RESTORE = arguments.restore
+QUALITY = arguments.quality
+FULLSCREEN = arguments.fullscreen
+RENDER_SCALE = arguments.render_scale
+QUALITY_BUDGET = arguments.frame_budget
+BOT_POLICY = arguments.bot
+BOT_REACTION_DELAY = arguments.reaction
+BOT_AIM_ERROR = arguments.aim_error
+BOT_SEED = arguments.seed
+HEADLESS = arguments.headless
+SPEED = arguments.speed
+RECORD = arguments.record
+RECORD_FORMAT = arguments.record_format
+CAPTURE = arguments.capture
+PROFILE = arguments.profile
+PROFILE_STACKS = arguments.profile_stacks
+GC_POLICY = arguments.gc_policy
+MEMORY_REPORT = arguments.memory_report
+if CAPTURE:
+    HEADLESS = True
+    SPEED = 0
+for setting in arguments.set:
+    name, _, value = setting.partition("=")
+    if name not in SETTINGS:
+        sys.exit(f"unknown setting: {name} (settings: {', '.join(SETTINGS)})")
+    globals()[name] = type(globals()[name])(float(value))
+
+profiler = Profiler(PROFILE) if PROFILE else None
+# decorator of the phases of the game (see profiler.py), without
+# the profiler the functions are not wrapped at all
+span = profiler.span if profiler else no_span
+sampler = Sampler(PROFILE_STACKS, PROFILE_SAMPLE_INTERVAL) if (
+    PROFILE_STACKS) else None
+# pauses of the garbage collector go into the trace of the profiler
+gc_monitor = GCMonitor(on_pause=profiler.add if profiler else None)
+gc_policy = GCPolicy(gc_monitor) if GC_POLICY else None
+
+
+class SimulatedTime:
+    """
+    time for the pyglet clock in the headless run, it is advanced
+    by run_headless() and it does not depend on real time
+    """
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+    def advance(self, dt):
+        self.time += dt
+
+
+if HEADLESS:
+    # must be set before the first window is created
+    pyglet.options["headless"] = True
+    simulated_time = SimulatedTime()
+    pyglet.clock.set_default(
+        pyglet.clock.Clock(time_function=simulated_time))
+if BOT_SEED is not None:
+    random_module.seed(BOT_SEED)
 
 START_GAME = True  # main screen
 INSTRUCTIONS = False  # screen with instructions
@@ -95,9 +429,21 @@ PAUSE = False  # de/activate of a pause during the game
 ARE_YOU_SURE = False  # question before closing the game window
 END_GAME = False  # end of the game
 
+# the flags above and moves of the window in snapshots (see snapshot.py)
+SCENES = [
+    "START_GAME", "INSTRUCTIONS", "NEW_GAME", "TIMER_3_2_1", "TIMER",
+    "PAUSE", "ARE_YOU_SURE", "END_GAME"]
+MOVES = ["stop", "stop-left", "stop-right", "left", "right"]
+
 list_of_flowers = []
 list_of_birds = []
 list_of_dark_birds = []
+list_of_falling_birds = []  # shot down birds until they leave the field
+
+# set by the quality governor (see apply_quality)
+flower_limit = NUMBER_OF_FLOWERS  # flowers on the playing field
+skipped_batches = set()  # background layers which are not drawn
+render_scale = RENDER_SCALE  # the world is drawn at a part of the resolution
 
 
 class MouseStateHandler(dict):
@@ -127,8 +473,8 @@ colors = {
 batches = {
     key: pyglet.graphics.Batch() for key in [
         "main", "landscape", "land", "birds_small", "flowers_small", "grass",
-        "flowers", "clouds", "birds", "bullets", "score", "start_game",
-        "end_game", "instructions", "pause", "none", "cursor"]}
+        "flowers", "clouds", "birds", "bullets", "score", "none",
+        "cursor"]}
 
 # group for pyglet.sprite.Sprite
 groups = {
@@ -162,6 +508,21 @@ for path in IMAGES_DIRECTORY.glob("*.gif"):
 for path in SOUNDS_DIRECTORY.glob("*.wav"):
     sounds[path.stem] = pyglet.media.load(path, streaming=False)
 
+# frames of all animations and images of shooting objects are stored
+# in one texture, so changing the frame of a sprite only changes its texture
+# coordinates (see AnimationClock) and all shooting objects of one layer
+# can be drawn from one vertex list (see SpriteLayer)
+texture_bin = pyglet.image.atlas.TextureBin(
+    texture_width=4096, texture_height=4096)
+for animation in animations.values():
+    animation.add_to_texture_bin(texture_bin)
+for name in [
+        "flower1", "flower2", "flower3", "flower4", "flower_small",
+        "falling_light_bird", "falling_light_bird_flip",
+        "falling_dark_bird", "falling_dark_bird_flip",
+        "bullet", "bullet_gray"]:
+    images[name] = texture_bin.add(images[name])
+
 
 # creating a function for setting the anchor for images and animations
 # and application of the function
@@ -201,6 +562,207 @@ dark_bird_flies_to_left = dark_bird_flies_to_right.get_transform(flip_x=True)
 falling_dark_bird_flies_to_right = images["falling_dark_bird"]
 falling_dark_bird_flies_to_left = images["falling_dark_bird_flip"]
 
+# images of flowers by their index in snapshots
+FLOWER_IMAGES = [
+    images["flower_small"], images["flower1"], images["flower2"],
+    images["flower3"], images["flower4"]]
+
+
+class AnimationClock:
+    """
+    One clock for all animated sprites (birds) instead of a pyglet schedule
+    for every sprite. The current frame of every animation is computed
+    from the shared time (plus the phase of the sprite) and the frames
+    of all registered sprites are updated in one pass.
+    """
+    def __init__(self):
+        self.time = 0
+        self.interval = 0  # seconds between updates of frames, 0 = every tick
+        self.pending = 0  # seconds since the last update of frames
+        self.timelines = {}  # animation: (images, end times, total duration)
+        self.sprites = {}  # sprite: [images, end times, total, phase, index]
+
+    def get_timeline(self, animation):
+        """
+        frame images and the end times of frames are computed only once
+        for each animation
+        """
+        if animation not in self.timelines:
+            images, end_times, total = [], [], 0
+            for frame in animation.frames:
+                total += frame.duration or 0
+                images.append(frame.image)
+                end_times.append(total)
+            self.timelines[animation] = (images, end_times, total)
+        return self.timelines[animation]
+
+    def register(self, sprite, animation, phase=0):
+        """
+        the sprite is animated by this clock, phase (in seconds) shifts
+        the animation of the sprite against other sprites
+        """
+        images, end_times, total = self.get_timeline(animation)
+        index = self.frame_index(end_times, total, phase)
+        self.sprites[sprite] = [images, end_times, total, phase, index]
+        sprite.image = images[index]
+
+    def unregister(self, sprite):
+        self.sprites.pop(sprite, None)
+
+    def frame_index(self, end_times, total, phase):
+        """
+        index of the frame that is displayed at the current time
+        """
+        if not total:
+            return 0
+        return min(
+            bisect_right(end_times, (self.time + phase) % total),
+            len(end_times) - 1)
+
+    @span()
+    def update(self, dt):
+        """
+        the frames of all registered sprites are updated,
+        the texture of a sprite changes only when its frame changes
+        """
+        self.time += dt
+        self.pending += dt
+        if self.pending < self.interval:
+            return
+        self.pending = 0
+        for sprite, entry in self.sprites.items():
+            images, end_times, total, phase, index = entry
+            new_index = self.frame_index(end_times, total, phase)
+            if new_index != index:
+                entry[4] = new_index
+                sprite.image = images[new_index]
+
+
+# sprite layers of shooting objects: (batch, group, texture id): SpriteLayer
+layers = {}
+LAYERED_BATCHES = [
+    batches[name] for name in [
+        "birds_small", "flowers_small", "birds", "flowers", "bullets"]]
+
+
+def create_sprite(image, x, y, batch, group):
+    """
+    sprites of shooting objects (images from the texture_bin) are stored
+    in sprite layers, other sprites are common pyglet sprites
+    """
+    texture = image.get_texture()
+    if (SPRITE_LAYERS and numpy is not None
+            and isinstance(texture, pyglet.image.TextureRegion)
+            and any(batch is item for item in LAYERED_BATCHES)):
+        key = (batch, group, texture.id)
+        if key not in layers:
+            layers[key] = SpriteLayer(
+                texture, batch, group, renderer=instanced_renderer)
+        return layers[key].add(image, x, y)
+    return pyglet.sprite.Sprite(
+        img=image, x=x, y=y, batch=batch, group=group)
+
+
+def linear(t):
+    """
+    easing functions get and return the progress of a tween (from 0 to 1)
+    """
+    return t
+
+
+def ease_in(t):
+    return t * t
+
+
+class Tween:
+    """
+    Motion of one attribute of a sprite (e.g. y, rotation) computed
+    as a function of time from start to end over duration in seconds,
+    on_complete is called when the motion is finished.
+    """
+    def __init__(
+            self, target, attribute, start, end, duration, easing=linear,
+            on_complete=None, pausable=True):
+        self.target = target
+        self.attribute = attribute
+        self.start = start
+        self.end = end
+        self.duration = duration
+        self.easing = easing
+        self.on_complete = on_complete
+        self.pausable = pausable  # the motion is frozen during PAUSE
+        self.elapsed = 0
+
+    def value(self):
+        if self.duration <= 0:
+            return self.end
+        progress = self.easing(min(self.elapsed / self.duration, 1))
+        return self.start + (self.end - self.start) * progress
+
+    def done(self):
+        return self.elapsed >= self.duration
+
+
+class SineTween(Tween):
+    """
+    Endless bobbing of an attribute around center (e.g. clouds),
+    the motion starts at the value start.
+    """
+    def __init__(
+            self, target, attribute, start, center, amplitude, period,
+            pausable=False):
+        super(SineTween, self).__init__(
+            target, attribute, start, start, duration=None,
+            pausable=pausable)
+        self.center = center
+        self.amplitude = amplitude
+        self.period = period
+        ratio = max(-1, min(1, (start - center) / amplitude))
+        self.phase = asin(ratio)
+
+    def value(self):
+        return self.center + self.amplitude * sin(
+            2 * pi * self.elapsed / self.period + self.phase)
+
+    def done(self):
+        return False
+
+
+class TweenEngine:
+    """
+    All tweens are evaluated from their elapsed time in one pass per tick
+    instead of a pyglet schedule for every moving object,
+    the motion does not depend on the tick rate.
+    """
+    def __init__(self):
+        self.tweens = []
+
+    def add(self, tween):
+        self.tweens.append(tween)
+        return tween
+
+    def remove_target(self, target):
+        """
+        all tweens of the target are removed (e.g. the sprite is deleted)
+        """
+        self.tweens = [
+            tween for tween in self.tweens if tween.target is not target]
+
+    @span()
+    def update(self, dt):
+        finished = []
+        for tween in self.tweens:
+            if not (tween.pausable and PAUSE):
+                tween.elapsed += dt
+            setattr(tween.target, tween.attribute, tween.value())
+            if tween.done():
+                finished.append(tween)
+        for tween in finished:
+            if tween in self.tweens:
+                self.tweens.remove(tween)
+            if tween.on_complete:
+                tween.on_complete()
+
 
 def reset():
     """
@@ -211,28 +773,454 @@ def reset():
     delete the contents of the set_of_moves and set "stop" as default value
     (via window.reset()).
     """
-    global list_of_gray_bullets, list_of_bullets
     global cloud_left_a, cloud_left_b, cloud_right_a, cloud_right_b
 
     for item in window, timer_3_2_1, timer, score:
         item.reset()
 
+    reload_bullets()
+
+    for cloud in cloud_left_a, cloud_left_b, cloud_right_a, cloud_right_b:
+        cloud.pic.x, cloud.pic.y = cloud.value_x, cloud.value_y
+
+    if quality_governor:
+        # the collection and the memory report are not a frame of the game
+        quality_governor.pause()
+
+    if gc_policy:
+        gc_policy.collect()  # the garbage of the reset
+
+    if memory_report:
+        memory_report.record(count_live_objects())
+        try:
+            memory_report.check(MEMORY_REPORT_ROUNDS, MEMORY_GROWTH_LIMIT)
+        except MemoryGrowthError as error:
+            if attract_mode:
+                raise  # the run fails (see AttractMode.update)
+            # the player's game goes on, reset() is called by a click
+            print(f"memory report: {error}")
+
+
+def reload_bullets():
+    """
+    8 new bullets and 8 gray bullets are created, the sprites
+    of the remaining bullets are deleted
+    """
+    global list_of_gray_bullets, list_of_bullets
+
+    for bullet in list_of_gray_bullets + list_of_bullets:
+        bullet.pic.delete()
     list_of_gray_bullets = [
         Bullet(images["bullet_gray"], 37 * num) for num in range(1, 9)]
     list_of_bullets = [
         Bullet(images["bullet"], 37 * num) for num in range(1, 9)]
 
-    for cloud in cloud_left_a, cloud_left_b, cloud_right_a, cloud_right_b:
-        cloud.pic.x, cloud.pic.y = cloud.value_x, cloud.value_y
+
+def record_round():
+    """
+    the finished round is stored in the leaderboard,
+    the row is only queued (it is written by the thread of high_scores)
+    """
+    if high_scores is None:
+        return
+    high_scores.add(
+        score.number, score.shots, score.hits,
+        round(pyglet.clock.get_default().time() - score.started, 3),
+        bot.policy if bot else "player")
+
+
+def record_event(event, target=None, x=None, y=None):
+    """
+    the event is recorded in the telemetry stream, the kind, scale,
+    number and position (if x, y are not given) are taken from the target
+    (before its sprite is deleted)
+    """
+    if telemetry is None:
+        return
+    kind = scale = target_id = 0
+    if target is not None:
+        if isinstance(target, Flower):
+            kind = events.FLOWER
+            scale = 2 if target.image == images["flower_small"] else 4
+        else:
+            kind = events.DARK_BIRD if isinstance(target, DarkBird) else (
+                events.BIRD)
+            scale = round(target.scale * 10)
+        if event == events.SPAWN:
+            target.telemetry_id = telemetry.new_id()
+        target_id = target.telemetry_id
+        if x is None:
+            x, y = target.pic.x, target.pic.y
+    if x is None:
+        x = y = 0
+    telemetry.record(
+        event, kind, x, y, len(list_of_bullets), scale, target_id,
+        score.number)
+
+
+def world_snapshot():
+    """
+    the state of the world for spectators (only numbers and strings,
+    targets by their numbers: [kind, scale in tenths, x, y])
+    """
+    if ARE_YOU_SURE:
+        scene = "are_you_sure"
+    elif START_GAME:
+        scene = "start"
+    elif INSTRUCTIONS:
+        scene = "instructions"
+    elif END_GAME:
+        scene = "end"
+    elif PAUSE:
+        scene = "pause"
+    elif TIMER:
+        scene = "round"
+    else:
+        scene = "countdown"
+
+    targets = {}
+    for kind, items in (
+            (events.FLOWER, list_of_flowers), (events.BIRD, list_of_birds),
+            (events.DARK_BIRD, list_of_dark_birds)):
+        for item in items:
+            if not hasattr(item, "spectator_id"):
+                item.spectator_id = str(next(target_numbers))
+            scale = round(item.scale * 10) if kind != events.FLOWER else (
+                2 if item.image == images["flower_small"] else 4)
+            targets[item.spectator_id] = [
+                kind, scale, int(item.pic.x), int(item.pic.y)]
+    return {
+        "scene": scene,
+        "score": score.number,
+        "timer": timer.clock if TIMER else timer_3_2_1.clock,
+        "ammo": len(list_of_bullets),
+        "crosshair": [
+            window.mouse_position["x"], window.mouse_position["y"]],
+        "targets": targets}
+
+
+def publish_snapshot(dt):
+    spectator_server.publish(world_snapshot())
+
+
+def scheduled_functions():
+    """
+    functions whose next calls are stored in snapshots
+    """
+    return [update_add_flower, update_add_bird, update_add_dark_bird,
+            update_timer]
+
+
+def scrolling_objects():
+    return [
+        landscape, land, grass,
+        cloud_left_a, cloud_left_b, cloud_right_a, cloud_right_b]
+
+
+def capture_round():
+    """
+    the state of the round as plain values for snapshot.pack()
+    """
+    clock = pyglet.clock.get_default()
+    now = clock.time()
+
+    def bird_record(bird):
+        phase = animation_clock.sprites.get(bird.pic, [0, 0, 0, 0])[3]
+        if flight_paths:
+            name, distance = flight_paths.state(bird)
+            path = flight_paths.names.index(name)  # the index in snapshots
+        else:
+            path, distance = 0, 0  # straight
+        return (
+            0 if bird.direction_of_flight["to_right"] else 1,
+            round(bird.scale * 10), bird.pic.x, bird.pic.y,
+            bird.speed_scroll["x"], phase, path, distance) + (
+            flocking.state(bird) if flocking else (0, 0, 0, 0))
+
+    def find_tween(target, attribute):
+        for tween in tweens.tweens:
+            if tween.target is target and tween.attribute == attribute:
+                return tween
+        return None
+
+    schedules = []
+    for function in scheduled_functions():
+        item = next((
+            item for item in clock._schedule_interval_items
+            if item.func == function), None)
+        schedules.append(
+            (item.next_ts - now, item.interval) if item else (-1, 0))
+
+    falling = []
+    for bird in list_of_falling_birds:
+        rotation = find_tween(bird.pic, "rotation")
+        falling.append((
+            0 if bird.direction_of_flight["to_right"] else 1,
+            isinstance(bird, DarkBird), round(bird.scale * 10),
+            bird.pic.x, bird.pic.y, bird.pic.rotation,
+            bird.speed_scroll["x"],
+            max(rotation.duration - rotation.elapsed, 0) if rotation else 0))
+
+    move = next(iter(window.set_of_moves), None)
+    return {
+        "header": {
+            "scenes": sum(
+                1 << index for index, name in enumerate(SCENES)
+                if globals()[name]),
+            "move": MOVES.index(move) if move in MOVES else 255,
+            "mouse_moves": sum(
+                1 << index for index, name in enumerate(
+                    ("left", "middle", "right")) if window.mouse_moves[name]),
+            "score": score.number,
+            "shots": score.shots,
+            "hits": score.hits,
+            "round_time": now - score.started,
+            "bullets": len(list_of_bullets),
+            "gray_bullets": len(list_of_gray_bullets),
+            "countdown": timer_3_2_1.clock,
+            "countdown_running": timer_3_2_1.running,
+            "timer": timer.clock,
+            "timer_running": timer.running,
+            "crosshair_x": int(window.mouse_position["x"]),
+            "crosshair_y": int(window.mouse_position["y"]),
+            "animation_time": animation_clock.time},
+        "scrolling": [
+            (item.pic.x, item.pic.y, item.speed_scroll["x"],
+             getattr(find_tween(item.pic, "y"), "elapsed", 0))
+            for item in scrolling_objects()],
+        "schedules": schedules,
+        "flowers": [
+            (FLOWER_IMAGES.index(flower.image), flower.pic.x, flower.pic.y,
+             flower.speed_scroll["x"]) for flower in list_of_flowers],
+        "birds": [bird_record(bird) for bird in list_of_birds],
+        "dark_birds": [bird_record(bird) for bird in list_of_dark_birds],
+        "falling": falling,
+        "random": random_module.getstate(),
+        "bot_random": bot.random.getstate() if bot else None}
+
+
+def restore_round(state):
+    """
+    the round is continued from the state of snapshot.unpack(), all
+    objects of the current round are replaced
+    """
+    global list_of_bullets, list_of_gray_bullets
+    clock = pyglet.clock.get_default()
+    header = state["header"]
+
+    for index, name in enumerate(SCENES):
+        globals()[name] = bool(header["scenes"] >> index & 1)
+    window.set_of_moves.clear()
+    if header["move"] != 255:
+        window.set_of_moves.add(MOVES[header["move"]])
+    for index, name in enumerate(("left", "middle", "right")):
+        window.mouse_moves[name] = bool(header["mouse_moves"] >> index & 1)
+    window.mouse_position["x"] = header["crosshair_x"]
+    window.mouse_position["y"] = header["crosshair_y"]
+    window.cursor.position = header["crosshair_x"], header["crosshair_y"]
+
+    score.number = header["score"]
+    score.shots = header["shots"]
+    score.hits = header["hits"]
+    score.started = clock.time() - header["round_time"]
+    reload_bullets()
+    for bullet in list_of_bullets[header["bullets"]:]:
+        bullet.pic.delete()
+    for bullet in list_of_gray_bullets[header["gray_bullets"]:]:
+        bullet.pic.delete()
+    list_of_bullets = list_of_bullets[:header["bullets"]]
+    list_of_gray_bullets = list_of_gray_bullets[:header["gray_bullets"]]
+    timer_3_2_1.restore(header["countdown"], header["countdown_running"])
+    timer.restore(header["timer"], header["timer_running"])
+    animation_clock.time = header["animation_time"]
+
+    for item, (x, y, speed, phase) in zip(
+            scrolling_objects(), state["scrolling"]):
+        item.pic.x, item.pic.y = x, y
+        item.speed_scroll["x"] = speed
+        for tween in tweens.tweens:
+            if tween.target is item.pic:
+                tween.elapsed = phase
+
+    for function, (remaining, interval) in zip(
+            scheduled_functions(), state["schedules"]):
+        pyglet.clock.unschedule(function)
+        if remaining < 0:
+            continue
+        pyglet.clock.schedule_interval(function, interval)
+        for item in clock._schedule_interval_items:
+            if item.func == function:
+                item.next_ts = clock.time() + remaining
+                item.last_ts = item.next_ts - interval
+    heapify(clock._schedule_interval_items)
+
+    for items in list_of_flowers, list_of_birds, list_of_dark_birds:
+        for item in items:
+            item.delete_pic()
+        items.clear()
+    for bird in list(list_of_falling_birds):
+        bird.finish_falling()
+
+    for image, x, y, speed in state["flowers"]:
+        flower = Flower(FLOWER_IMAGES[image], x, y)
+        flower.speed_scroll["x"] = speed
+        list_of_flowers.append(flower)
+    for cls, records, items in (
+            (Bird, state["birds"], list_of_birds),
+            (DarkBird, state["dark_birds"], list_of_dark_birds)):
+        for (image, scale, x, y, speed, phase, path, distance, flock, vx,
+                vy, home_y) in records:
+            bird = cls(image == 0, scale / 10, x, y)
+            bird.speed_scroll["x"] = speed
+            animation_clock.register(bird.pic, bird.image, phase=phase)
+            if flight_paths:
+                flight_paths.remove(bird)
+                flight_paths.add(bird, flight_paths.names[path], distance)
+            if flocking and flock:
+                flocking.restore(bird, flock, vx, vy, home_y)
+            items.append(bird)
+    for image, dark, scale, x, y, rotation, speed, rotation_time in (
+            state["falling"]):
+        bird = (DarkBird if dark else Bird)(image == 0, scale / 10, x, y)
+        bird.delete_pic()
+        bird.alive = False
+        bird.start_falling(x, y, rotation, rotation_time)
+        bird.speed_scroll["x"] = speed
+
+    random_module.setstate(state["random"])
+    if bot and state["bot_random"]:
+        bot.random.setstate(state["bot_random"])
+    if quality_governor:
+        quality_governor.pause()  # the restored round is a new start
+
+
+def start_recording():
+    """
+    the frames of the view are recorded from now on (see Recorder)
+    """
+    global recorder
+    Path(RECORDINGS).mkdir(exist_ok=True)
+    _, _, width, height = window.viewport()
+    recorder = Recorder(
+        Path(RECORDINGS) / time.strftime("birds-%Y%m%d-%H%M%S"),
+        width, height, fps=FPS, format=RECORD_FORMAT)
+    print(f"recording to {recorder.output}")
+
+
+def stop_recording():
+    global recorder
+    print(recorder.close())
+    recorder = None
+
+
+def save_round(dt=0):
+    """
+    the snapshot of the running round is packed (well under
+    a millisecond) and written in the background
+    """
+    if NEW_GAME:
+        snapshot_writer.save(snapshot.pack(capture_round()))
+
+
+def count_live_objects():
+    """
+    numbers of live sprites, vertex lists and scheduled callbacks
+    for the memory report
+    """
+    sprites = vertex_lists = 0
+    for item in gc.get_objects():
+        if isinstance(item, pyglet.sprite.Sprite):
+            sprites += item._vertex_list is not None
+        elif isinstance(item, pyglet.graphics.vertexdomain.VertexList):
+            vertex_lists += 1
+    for layer in layers.values():
+        sprites += layer.count - len(layer.free)
+    clock = pyglet.clock.get_default()
+    return {
+        "sprites": sprites,
+        "vertex_lists": vertex_lists,
+        "callbacks": (
+            len(clock._schedule_items) + len(clock._schedule_interval_items)),
+        "tweens": len(tweens.tweens),
+        "flowers": len(list_of_flowers),
+        "birds": len(list_of_birds) + len(list_of_dark_birds)}
+
+
+class InputLatency:
+    """
+    Measuring the time between an input event and the frame in which
+    the player can see its result (the crosshair has moved).
+    Every event gets a timestamp, the timestamp waits until the crosshair
+    is updated and it is closed by the next flip of the window.
+    """
+    def __init__(self, max_samples=10000):
+        self.frame_number = 0
+        self.received = None  # the oldest event not yet applied to crosshair
+        self.applied = None  # the oldest event applied, but not yet displayed
+        # pairs (frame number, latency in seconds)
+        self.samples = deque(maxlen=max_samples)
+
+    def event(self):
+        """
+        an input event has arrived
+        """
+        if self.received is None:
+            self.received = time.perf_counter()
+
+    def apply(self):
+        """
+        the crosshair has been moved according to the received events
+        """
+        if self.received is not None:
+            if self.applied is None:
+                self.applied = self.received
+            self.received = None
+
+    def frame(self):
+        """
+        the frame has been displayed (called after the flip of the window)
+        """
+        self.frame_number += 1
+        if self.applied is not None:
+            self.samples.append(
+                (self.frame_number, time.perf_counter() - self.applied))
+            self.applied = None
+
+    def report(self):
+        """
+        the summary of measured latencies in milliseconds
+        """
+        if not self.samples:
+            return "input latency: no samples"
+        latencies = sorted(latency for _, latency in self.samples)
+
+        def percentile(value):
+            index = min(len(latencies) - 1, int(len(latencies) * value))
+            return latencies[index] * 1000
+
+        return (
+            f"input latency ({CURSOR_MODE}, {len(latencies)} samples): "
+            f"p50 {percentile(0.5):.2f} ms, p95 {percentile(0.95):.2f} ms, "
+            f"p99 {percentile(0.99):.2f} ms, "
+            f"max {latencies[-1] * 1000:.2f} ms")
 
 
 class MyWindow(pyglet.window.Window):
     def __init__(self):
         super(MyWindow, self).__init__(
             width=WIDTH, height=HEIGHT, caption=CAPTION,
-            resizable=False, fullscreen=False)
+            resizable=True, fullscreen=FULLSCREEN)
         # self.set_mouse_visible(visible=False)
-        self.set_exclusive_mouse(True)
+        if CURSOR_MODE == "hardware":
+            # the system draws the crosshair, the window gets absolute x and y
+            # (the hotspot is the centre of the crosshair, like the anchor
+            # of the crosshair sprite)
+            crosshair = images["mini_target"]
+            self.set_mouse_cursor(pyglet.window.ImageMouseCursor(
+                crosshair, hot_x=crosshair.width // 2,
+                hot_y=crosshair.height // 2, acceleration=True))
+        else:
+            self.set_exclusive_mouse(True)
         self.set_icon(images["bird_icon"])
         self.clear()
 
@@ -253,6 +1241,13 @@ class MyWindow(pyglet.window.Window):
         # default mouse cursor position
         self.mouse_position = {"x": WIDTH / 2, "y": HEIGHT / 2}
 
+        # the game is drawn in WIDTH x HEIGHT coordinates into the view:
+        # the largest rectangle of the same aspect in the window
+        # (x, y, width, height in pixels of the window, see on_resize)
+        self.view = 0, 0, WIDTH, HEIGHT
+        self.motion_rest_x, self.motion_rest_y = 0, 0  # see scale_motion
+        self.on_resize(self.width, self.height)
+
         # set up the cursor
         self.cursor = pyglet.sprite.Sprite(
             img=images["mini_target"],
@@ -269,7 +1264,17 @@ class MyWindow(pyglet.window.Window):
         self.mouse_position_before_pause = {"x": None, "y": None}
         self.set_up_actual_position_of_mouse_cursor = False
 
-        pyglet.clock.schedule_interval(self.update_cursor, .01)
+        # motion events accumulated between two ticks (see mouse_motion)
+        self.motion_pending = False
+        self.motion_x, self.motion_y = 0, 0  # the last absolute position
+        self.motion_dx, self.motion_dy = 0, 0  # the sum of relative moves
+        # the coalesced move processed during the last tick
+        self.coalesced_dx, self.coalesced_dy = 0, 0
+
+        self.latency = InputLatency() if MEASURE_INPUT_LATENCY else None
+
+        if CURSOR_MODE == "sprite":
+            pyglet.clock.schedule_interval(self.update_cursor, .01)
         # pyglet.clock.schedule_interval(self.update, 0.5)
 
     def reset(self):
@@ -279,16 +1284,101 @@ class MyWindow(pyglet.window.Window):
         do not move!
         """
         self.clear()
-        self.mouse_moves = {"left": False, "middle": True, "right": False}
-        self.set_of_moves.clear()
-        self.set_of_moves.add("stop")
+        self.mouse_moves["left"] = False
+        self.mouse_moves["middle"] = True
+        self.mouse_moves["right"] = False
+        self.set_move("stop")
+
+    def set_move(self, move):
+        """
+        the set_of_moves always holds just one instruction, the set is
+        changed in place and only if the instruction is different
+        """
+        if move not in self.set_of_moves or len(self.set_of_moves) != 1:
+            self.set_of_moves.clear()
+            self.set_of_moves.add(move)
 
+    @span()
     def update_cursor(self, dt):
         """
         updating mouse cursor coordinators x and y
         """
         self.cursor.x = self.mouse_position["x"]
         self.cursor.y = self.mouse_position["y"]
+        if self.latency:
+            self.latency.apply()
+
+    @span("flip")
+    def flip(self):
+        """
+        the frame is displayed, the input latency measurement is closed
+        """
+        if capture_mode:
+            capture_mode.frame()  # the back buffer before it is displayed
+        if recorder:
+            recorder.frame(*self.viewport())
+        super(MyWindow, self).flip()
+        if self.latency:
+            self.latency.frame()
+        if attract_mode:
+            attract_mode.frame()
+        if quality_governor:
+            quality_governor.frame()
+        gc_monitor.frame()
+        if profiler:
+            profiler.frame()
+
+    def on_resize(self, width, height):
+        """
+        the view keeps the aspect of the game (black bars around it),
+        the projection maps the coordinates of the game onto the view
+        """
+        scale = min(width / WIDTH, height / HEIGHT)
+        self.view = (
+            (width - WIDTH * scale) / 2, (height - HEIGHT * scale) / 2,
+            WIDTH * scale, HEIGHT * scale)
+        gl.glMatrixMode(gl.GL_PROJECTION)
+        gl.glLoadIdentity()
+        gl.glOrtho(0, WIDTH, 0, HEIGHT, -1, 1)
+        gl.glMatrixMode(gl.GL_MODELVIEW)
+        gl.glViewport(*self.viewport())
+        for frame in scenes.values():
+            frame.resized()
+        return pyglet.event.EVENT_HANDLED
+
+    def viewport(self):
+        """
+        the view in pixels of the framebuffer (more pixels than the window
+        has on high DPI screens)
+        """
+        ratio = self.get_framebuffer_size()[0] / max(self.width, 1)
+        return tuple(max(round(value * ratio), 0) for value in self.view)
+
+    def to_game(self, x, y):
+        """
+        coordinates of the window -> coordinates of the game
+        """
+        view_x, view_y, view_width, _ = self.view
+        scale = view_width / WIDTH
+        return (x - view_x) / scale, (y - view_y) / scale
+
+    def to_window(self, x, y):
+        view_x, view_y, view_width, _ = self.view
+        scale = view_width / WIDTH
+        return view_x + x * scale, view_y + y * scale
+
+    def scale_motion(self, dx, dy):
+        """
+        relative motion in the window -> whole pixels of the game,
+        the rest is carried over to the next motion
+        """
+        scale = self.view[2] / WIDTH
+        self.motion_rest_x += dx / scale
+        self.motion_rest_y += dy / scale
+        dx, dy = round(self.motion_rest_x), round(self.motion_rest_y)
+        self.motion_rest_x -= dx
+        self.motion_rest_y -= dy
+        return dx, dy
 
     def update(self, dt):
         pass
@@ -303,46 +1393,58 @@ class MyWindow(pyglet.window.Window):
         # update set_of_moves
         # stop-right and stop-left: for zero speed for stable objects (flowers)
         # we have reached the end of the picture "landscape"
+        if self.latency:
+            self.latency.event()
+
         if TIMER:  # after NEW_GAME after TIMER_3_2_1...
             if not PAUSE:
                 # look around the landscape to the right when the key
                 # RIGHT is pressed
                 if symbol == pyglet.window.key.RIGHT:
                     if "stop-right" in self.set_of_moves:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop-right")
+                        self.set_move("stop-right")
                     else:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("right")
+                        self.set_move("right")
                 # look around the landscape to the left when the key
                 # LEFT is pressed
                 if symbol == pyglet.window.key.LEFT:
                     if "stop-left" in self.set_of_moves:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop-left")
+                        self.set_move("stop-left")
                     else:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("left")
+                        self.set_move("left")
                 # stand still (do not look around the landscape) when the key
                 # DOWN is pressed
                 if symbol == pyglet.window.key.DOWN:
                     if "stop-right" in self.set_of_moves:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop-right")
+                        self.set_move("stop-right")
                     elif "stop-left" in self.set_of_moves:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop-left")
+                        self.set_move("stop-left")
                     else:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop")
+                        self.set_move("stop")
 
                 # the cursor position is displayed in the middle of the window
                 if symbol == pyglet.window.key.BACKSPACE:
-                    self.mouse_position = {"x": WIDTH / 2, "y": HEIGHT / 2}
-                    self.set_of_moves.clear()
-                    self.set_of_moves.add("stop")
+                    self.mouse_position["x"] = WIDTH / 2
+                    self.mouse_position["y"] = HEIGHT / 2
+                    self.set_move("stop")
+                    self.show_cursor()
 
     def mouse_motion(self, x, y, dx, dy):
+        """
+        motion events are only accumulated here, a mouse with a high polling
+        rate sends many more events than the game draws frames,
+        the accumulated motion is processed once per tick
+        in update_mouse_motion()
+        """
+        if self.latency:
+            self.latency.event()
+
+        self.motion_pending = True
+        self.motion_x, self.motion_y = x, y
+        self.motion_dx += dx
+        self.motion_dy += dy
+
+    def update_mouse_motion(self, dt):
         """
         the function adjusts the mouse movement behavior during the game,
         the mouse movement is frozen during the PAUSE or TIMER_3_2_1
@@ -353,42 +1455,53 @@ class MyWindow(pyglet.window.Window):
         of the mouse movement:
         e.g. the mouse cursor is located on the right of the game window, so
         "right" is saved in the set_of_moves and "True" in mouse_moves["right"]
+        the function returns False if there was no motion since the last tick
         """
-        self.mouse_position["x"] += dx
-        self.mouse_position["y"] += dy
+        if not self.motion_pending:
+            return False
+        self.motion_pending = False
+        self.coalesced_dx, self.coalesced_dy = self.motion_dx, self.motion_dy
+        self.motion_dx, self.motion_dy = 0, 0
+
+        if CURSOR_MODE == "hardware":
+            self.mouse_position["x"] = self.motion_x
+            self.mouse_position["y"] = self.motion_y
+        else:
+            self.mouse_position["x"] += self.coalesced_dx
+            self.mouse_position["y"] += self.coalesced_dy
 
         # steps for freeze the cursor to avoid cheating during PAUSE
         # step 1)
         if TIMER:
             if self.set_up_actual_position_of_mouse_cursor:
-                self.mouse_position = {
-                    "x": self.mouse_position_before_pause["x"],
-                    "y": self.mouse_position_before_pause["y"]}
+                before_pause = self.mouse_position_before_pause
+                self.mouse_position["x"] = before_pause["x"]
+                self.mouse_position["y"] = before_pause["y"]
                 self.remeber_actual_position_of_mouse_cursor = True
                 self.set_up_actual_position_of_mouse_cursor = False
         # step 2)
         if PAUSE:
             if self.remeber_actual_position_of_mouse_cursor:
-                self.mouse_position_before_pause = {
-                    "x": self.mouse_position["x"],
-                    "y": self.mouse_position["y"]}
+                before_pause = self.mouse_position_before_pause
+                before_pause["x"] = self.mouse_position["x"]
+                before_pause["y"] = self.mouse_position["y"]
                 self.remeber_actual_position_of_mouse_cursor = False
                 self.set_up_actual_position_of_mouse_cursor = True
 
         # the cursor position does not leave the window
-        if self.cursor.x < 0:
+        if self.mouse_position["x"] < 0:
             self.mouse_position["x"] = 0
-        if self.cursor.x > WIDTH:
+        if self.mouse_position["x"] > WIDTH:
             self.mouse_position["x"] = WIDTH
-        if self.cursor.y < 0:
+        if self.mouse_position["y"] < 0:
             self.mouse_position["y"] = 0
-        if self.cursor.y > HEIGHT:
+        if self.mouse_position["y"] > HEIGHT:
             self.mouse_position["y"] = HEIGHT
 
         if TIMER_3_2_1:  # freeze the cursor to avoid cheating
-            self.mouse_position = {"x": WIDTH / 2, "y": HEIGHT / 2}
-            self.set_of_moves.clear()
-            self.set_of_moves.add("stop")
+            self.mouse_position["x"] = WIDTH / 2
+            self.mouse_position["y"] = HEIGHT / 2
+            self.set_move("stop")
 
         # update mouse_moves and set_of_moves
         # stop-right and stop-left: for zero speed for flowers,
@@ -397,28 +1510,24 @@ class MyWindow(pyglet.window.Window):
             if not PAUSE:
                 # look around the landscape to the right when the mouse
                 # cursor is to the right of the window
-                if (WIDTH - 20) < self.cursor.x:
+                if (WIDTH - 20) < self.mouse_position["x"]:
                     self.mouse_moves["right"] = True
                     self.mouse_moves["middle"] = False
                     self.mouse_moves["left"] = False
                     if "stop-right" in self.set_of_moves:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop-right")
+                        self.set_move("stop-right")
                     else:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("right")
+                        self.set_move("right")
                 # look around the landscape to the left when the mouse
                 # cursor is to the left of the window
-                elif self.cursor.x < 20:
+                elif self.mouse_position["x"] < 20:
                     self.mouse_moves["right"] = False
                     self.mouse_moves["middle"] = False
                     self.mouse_moves["left"] = True
                     if "stop-left" in self.set_of_moves:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop-left")
+                        self.set_move("stop-left")
                     else:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("left")
+                        self.set_move("left")
                 # stand still (do not look around the landscape) when the mouse
                 # cursor is in the middle of the window
                 else:
@@ -426,20 +1535,43 @@ class MyWindow(pyglet.window.Window):
                     self.mouse_moves["middle"] = True
                     self.mouse_moves["left"] = False
                     if "stop-right" in self.set_of_moves:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop-right")
+                        self.set_move("stop-right")
                     elif "stop-left" in self.set_of_moves:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop-left")
+                        self.set_move("stop-left")
                     else:
-                        self.set_of_moves.clear()
-                        self.set_of_moves.add("stop")
+                        self.set_move("stop")
+
+        if CURSOR_MODE != "sprite":
+            self.show_cursor()
+        return True
+
+    def show_cursor(self):
+        """
+        the crosshair is moved to mouse_position immediately
+        (not on the next update_cursor), in the hardware mode the system
+        cursor is moved if mouse_position was changed by the game
+        (freezing the cursor, the cursor in the middle of the window)
+        """
+        if CURSOR_MODE == "hardware":
+            x, y = (round(value) for value in self.to_window(
+                self.mouse_position["x"], self.mouse_position["y"]))
+            if (x, y) != (self._mouse_x, self._mouse_y):
+                self.set_mouse_position(x, y)
+            if self.latency:
+                self.latency.apply()
+        else:
+            self.update_cursor(0)
 
     def mouse_press(self, x, y, button, modifiers):
         """
         the function saves the coordinators x and y
-        when the left mouse button is pressed
+        when the left mouse button is pressed,
+        the motion accumulated since the last tick is processed first
+        so that the shot goes where the player sees the crosshair
         """
+        if self.latency:
+            self.latency.event()
+        self.update_mouse_motion(0)
         self.left_mouse_button_coordinates["x"] = self.mouse_position["x"]
         self.left_mouse_button_coordinates["y"] = self.mouse_position["y"]
 
@@ -467,6 +1599,7 @@ class Background(MyWindow):
             batch=batch,
             group=self.group)
 
+    @span()
     def update(self, dt):
         """
         function determines the behavior of the background based
@@ -512,20 +1645,18 @@ class Background(MyWindow):
         # we have reached the end of the picture
         if self.pic.x > (self.pic.width // 2):
             self.pic.x = self.pic.width // 2
-            window.set_of_moves.clear()
-            window.set_of_moves.add("stop-left")
-        if self.pic.x < (window.width - self.pic.width // 2):
-            self.pic.x = (window.width - self.pic.width // 2)
-            window.set_of_moves.clear()
-            window.set_of_moves.add("stop-right")
+            window.set_move("stop-left")
+        if self.pic.x < (WIDTH - self.pic.width // 2):
+            self.pic.x = (WIDTH - self.pic.width // 2)
+            window.set_move("stop-right")
 
 
 class Landscape(Background):
     def __init__(self):
         super(Landscape, self).__init__(
             image=images["landscape"],
-            value_x=window.width // 2,
-            value_y=window.height // 2,
+            value_x=WIDTH // 2,
+            value_y=HEIGHT // 2,
             group=groups["background_landscape"])
         self.pic = self.set_sprite(batch=batches["landscape"])
 
@@ -534,7 +1665,7 @@ class Land(Background):
     def __init__(self):
         super(Land, self).__init__(
             image=images["land"],
-            value_x=window.width // 2,
+            value_x=WIDTH // 2,
             value_y=images["land"].height // 2,
             group=groups["background_land_&_cloud"])
         self.pic = self.set_sprite(batch=batches["land"])
@@ -544,7 +1675,7 @@ class Grass(Background):
     def __init__(self):
         super(Grass, self).__init__(
             image=images["grass"],
-            value_x=window.width // 2,
+            value_x=WIDTH // 2,
             value_y=images["grass"].height // 2,
             group=groups["foreground_grass"])
         self.pic = self.set_sprite(batch=batches["grass"])
@@ -553,6 +1684,9 @@ class Grass(Background):
 class Score(MyWindow):
     def __init__(self):
         self.number = 0
+        self.shots = 0  # statistics of the round for the leaderboard
+        self.hits = 0
+        self.started = 0  # time of the start of the countdown TIMER
         self.score_label = self.create_label()
 
         pyglet.clock.schedule_interval(self.update, 1/30)
@@ -576,7 +1710,10 @@ class Score(MyWindow):
         the default score is zero
         """
         self.number = 0
+        self.shots = 0
+        self.hits = 0
 
+    @span()
     def update(self, dt):
         """
         the score is regularly updated during the game round
@@ -585,20 +1722,16 @@ class Score(MyWindow):
 
 
 class Object(MyWindow):
-    def __init__(self, image, value_x, value_y, group):
+    def __init__(self, image, value_x, value_y, group, batch=batches["main"]):
         self.image = image
         self.value_x = value_x
         self.value_y = value_y
         self.group = group
-        self.pic = self.set_sprite()
+        self.pic = self.set_sprite(batch=batch)
 
     def set_sprite(self, batch=batches["main"]):
-        return pyglet.sprite.Sprite(
-            img=self.image,
-            x=self.value_x,
-            y=self.value_y,
-            batch=batch,
-            group=self.group)
+        return create_sprite(
+            self.image, self.value_x, self.value_y, batch, self.group)
 
 
 class Bullet(Object):
@@ -610,40 +1743,32 @@ class Bullet(Object):
             value_x=self.value_x,
             value_y=40,
             group=groups["foreground_bullet"] if self.image == images[
-                "bullet"] else groups["foreground_gray_bullet"])
-        self.pic = self.set_sprite(batches["bullets"])
+                "bullet"] else groups["foreground_gray_bullet"],
+            batch=batches["bullets"])
         self.pic.scale = 0.31
 
         self.down = False
 
-    def falling_bullet(self, dt):
-        """
-        the function sets coordinator y = the minimum where the bullet
-        must fall down so that it is outside the visible area
-        of the playing field
-        """
-        # for gray bullet
-        if self.pic.y >= -80:
-            self.pic.y -= 10
-
     def check_bullet(self):
         """
         the function is called when a player clicks the left mouse button
         during a game round and len(list_of_gray_bullets) > 0,
-        this function calls the function falling_bullet() and sets how often
-        it will be called before the bullet disappears
-        from the visible playing area
+        the bullet falls down (y = -80) so that it is outside the visible
+        area of the playing field and then its sprite is deleted
         """
-        pyglet.clock.schedule_interval(self.falling_bullet, 1/60)
+        tweens.add(Tween(
+            self.pic, "y", start=self.pic.y, end=-80,
+            duration=(self.pic.y + 80) / 600, easing=ease_in,
+            on_complete=self.pic.delete, pausable=False))
 
 
 class ShootingStableObject(MyWindow):
-    def __init__(self, image, value_x, value_y, group):
+    def __init__(self, image, value_x, value_y, group, batch=batches["main"]):
         self.image = image
         self.value_x = value_x
         self.value_y = value_y
         self.group = group
-        self.pic = self.set_sprite()
+        self.pic = self.set_sprite(batch=batch)
 
         self.alive = True
 
@@ -655,12 +1780,18 @@ class ShootingStableObject(MyWindow):
         pyglet.clock.schedule_interval(self.update, 1/30)
 
     def set_sprite(self, batch=batches["main"]):
-        return pyglet.sprite.Sprite(
-            img=self.image,
-            x=self.value_x,
-            y=self.value_y,
-            batch=batch,
-            group=self.group)
+        return create_sprite(
+            self.image, self.value_x, self.value_y, batch, self.group)
+
+    def delete_pic(self):
+        """
+        the object stops to be updated and its sprite is deleted,
+        it is not alive any more (e.g. for the bot which has chosen it)
+        """
+        self.alive = False
+        pyglet.clock.unschedule(self.update)
+        tweens.remove_target(self.pic)
+        self.pic.delete()
 
     def check_shot(self, version):
         """
@@ -679,17 +1810,18 @@ class ShootingStableObject(MyWindow):
         value_heigth = (
             ((pic_height // 7) * 2) if version == "small" else (
                 ((pic_height // 8) * 2)))
-        if left_button_x in range(
-                int(pic_x - value_width),
-                int(pic_x + value_width)) and (
-                left_button_y in range(
-                int(pic_y - value_heigth),
-                int(pic_y + value_heigth))):
+        # the coordinates of the game are floats in a scaled window
+        # (and for the bot), the ranges are half-open as before
+        if int(pic_x - value_width) <= left_button_x < int(
+                pic_x + value_width) and (
+                int(pic_y - value_heigth) <= left_button_y < int(
+                pic_y + value_heigth)):
             self.alive = False
             return True
         else:
             return False
 
+    @span()
     def update(self, dt):
         """
         the function updates the position of the stable object
@@ -719,25 +1851,28 @@ class ShootingStableObject(MyWindow):
 
 
 class Flower(ShootingStableObject):
-    def __init__(self):
-        self.image = choice([images["flower_small"], choice([
+    def __init__(self, image=None, value_x=None, value_y=None):
+        """
+        image and position are random unless they are given
+        (a flower restored from a snapshot)
+        """
+        self.image = image or choice([images["flower_small"], choice([
             images["flower1"], images["flower2"],
             images["flower3"], images["flower4"]])])
         super(Flower, self).__init__(
             image=self.image,
-            value_x=randrange(
+            value_x=value_x if value_x is not None else randrange(
                 int(landscape.pic.x - 620), int(landscape.pic.x + 620)),
-            value_y=randrange(
+            value_y=value_y if value_y is not None else randrange(
                 int(landscape.pic.y - 180),
                 int(landscape.pic.y + 30)) if self.image == images[
                     "flower_small"] else randrange(
                         int(landscape.pic.y - 280),
                         int(landscape.pic.y - 180)),
             group=groups["background_flower_small"] if self.image == images[
-                "flower_small"] else groups["foreground_flower"])
-        self.pic = self.set_sprite(batch=batches[
-            "flowers_small"] if self.image == images[
-            "flower_small"] else batches["flowers"])
+                "flower_small"] else groups["foreground_flower"],
+            batch=batches["flowers_small"] if self.image == images[
+                "flower_small"] else batches["flowers"])
 
 
 class Cloud(ShootingStableObject):
@@ -749,53 +1884,30 @@ class Cloud(ShootingStableObject):
             image=self.image,
             value_x=self.value_x,
             value_y=self.value_y,
-            group=groups["background_land_&_cloud"])
-        self.pic = self.set_sprite(batch=batches["clouds"])
+            group=groups["background_land_&_cloud"],
+            batch=batches["clouds"])
 
-        # set default attributes for move functions (move_up, move_down, move)
+        # the cloud is at the same position x, but moves up and down
+        # (8 px around the value y, 10 px per second)
         self.cloud_left_value_y = 630
         self.cloud_right_value_y = 658
-        self.movevement_of_cloud = True
         if self.image == images["cloud_left"]:
             self.value = self.cloud_left_value_y
         elif self.image == images["cloud_right"]:
             self.value = self.cloud_right_value_y
 
-        pyglet.clock.schedule_interval(self.move, 1/10)
+        self.bobbing = tweens.add(SineTween(
+            self.pic, "y", start=self.value_y, center=self.value,
+            amplitude=8, period=3.2))
 
-    def move_up(self, dt):
+    def set_bobbing(self, on):
         """
-        determining the coordinator y for moving the cloud up,
-        the function instructs to change the direction of movement
-        when the maximum value of y is reached
+        the bobbing is stopped (the cloud stays where it is) or continued
         """
-        if self.pic.y <= self.value + 7:
-            self.pic.y += 1
-        if self.pic.y >= self.value + 8:
-            self.movevement_of_cloud = False  # change of direction of movement
-
-    def move_down(self, dt):
-        """
-        determining the coordinator y for moving the cloud down,
-        the function instructs to change the direction of movement
-        when the minimum value of y is reached
-        """
-        if self.pic.y >= self.value - 7:
-            self.pic.y -= 1
-        if self.pic.y <= self.value - 8:
-            self.movevement_of_cloud = True  # change of direction of movement
-
-    def move(self, dt):
-        """
-        the function coordinates the behavior of the cloud:
-        the cloud is at the same position x, but moves up and down,
-        functions move_up() and move_down() are called alternately
-        according to the direction of movement
-        """
-        if self.movevement_of_cloud:
-            self.move_up(dt)
-        else:
-            self.move_down(dt)
+        if not on:
+            tweens.remove_target(self.pic)
+        elif self.bobbing not in tweens.tweens:
+            tweens.add(self.bobbing)
 
 
 class ShootingDynamicObject(MyWindow):
@@ -804,7 +1916,8 @@ class ShootingDynamicObject(MyWindow):
         self.value_x = value_x
         self.value_y = value_y
         self.group = group
-        self.pic = self.set_sprite()
+        self.pic = self.set_sprite(batch=self.batch)
+        self.pic.scale = self.scale
 
         self.alive = True
 
@@ -818,15 +1931,39 @@ class ShootingDynamicObject(MyWindow):
         self.speed = self.step
 
         pyglet.clock.schedule_interval(self.update, 1/30)
+        if flight_paths:
+            flight_paths.add(self, choice(FLIGHT_PATHS))
 
     def set_sprite(self, batch=batches["main"]):
-        return pyglet.sprite.Sprite(
-            img=self.image,
-            x=self.value_x,
-            y=self.value_y,
-            batch=batch,
-            group=self.group)
-
+        """
+        the animation of the sprite is driven by the shared animation_clock
+        (with a random phase, so that the birds do not flap synchronously)
+        """
+        if isinstance(self.image, pyglet.image.Animation):
+            pic = create_sprite(
+                self.image.frames[0].image, self.value_x, self.value_y,
+                batch, self.group)
+            animation_clock.register(
+                pic, self.image, phase=random() * self.image.get_duration())
+            return pic
+        return create_sprite(
+            self.image, self.value_x, self.value_y, batch, self.group)
+
+    def delete_pic(self):
+        """
+        the object stops to be updated and its sprite is deleted,
+        it is not alive any more (e.g. for the bot which has chosen it)
+        """
+        self.alive = False
+        pyglet.clock.unschedule(self.update)
+        animation_clock.unregister(self.pic)
+        if flight_paths:
+            flight_paths.remove(self)
+        if flocking:
+            flocking.remove(self)
+        self.pic.delete()
+
+    @span()
     def update(self, dt):
         """
         the function periodically updates the behavior of the dynamic object
@@ -887,16 +2024,16 @@ class ShootingDynamicObject(MyWindow):
                 if self.scale == 2/10:
                     return (self.pic.x <= (landscape.pic.x - 420))
 
-    def check_position_pic_y(self):
+    def finish_falling(self):
         """
-        to identify when the moving object leaves the visible playing field
-        and then is deleted
+        the falling object has left the visible playing field
+        and it is deleted
         """
-        self.pos_y = 300 if self.scale == 2/10 else 100  # for scale 4/10
-        if self.pic.y <= self.pos_y:
-            pyglet.clock.unschedule(self.rotation_object)
-            pyglet.clock.unschedule(self.falling_object)
-            pyglet.clock.unschedule(self.update)
+        pyglet.clock.unschedule(self.falling_object)
+        tweens.remove_target(self.pic)
+        self.pic.delete()
+        if self in list_of_falling_birds:
+            list_of_falling_birds.remove(self)
 
     def check_shot(self):
         """
@@ -911,12 +2048,11 @@ class ShootingDynamicObject(MyWindow):
         bird_x, bird_y = self.pic.x, self.pic.y
         bird_width = self.pic.width
         bird_height = self.pic.height
-        if left_button_x in range(
-                int(bird_x - (((bird_width // 2) // 5) * 2)),
+        if int(bird_x - (((bird_width // 2) // 5) * 2)) <= left_button_x < (
                 int(bird_x + (((bird_width // 2) // 5) * 2))) and (
-                left_button_y in range(
-                int(bird_y - (((bird_height // 2) // 10) * 2)),
-                int(bird_y + (((bird_height // 2) // 8) * 2)))):
+                int(bird_y - (((bird_height // 2) // 10) * 2))
+                <= left_button_y
+                < int(bird_y + (((bird_height // 2) // 8) * 2))):
             self.alive = False
             pyglet.clock.schedule_once(
                 self.change_object_image_after_shot_down, 0.1)
@@ -924,34 +2060,17 @@ class ShootingDynamicObject(MyWindow):
         else:
             return False
 
-    def rotation_object(self, dt):
-        """
-        rotation of the object during the shooting down of the object and
-        its fall down outside the visible area of the playing field
-        """
-        if not PAUSE:
-            if self.pic.rotation <= 360:
-                self.pic.rotation += 10
-
+    @span()
     def falling_object(self, dt):
         """
         the function is called after shooting down the dynamic object and
-        changing its image, the function rotation_object() is
-        called while the object is falling down, at the same time,
-        the behavior of the object changes during background scrolling:
-        now it is a stable object with zero speed for coordinator x,
-        his position is adjusted only while looking around the landscape
-        (only "right" or "left" is in the set_of_moves), at the same time,
-        the function check_position_pic_y() is called to control when
-        the dynamic object disappears from the visible playing area
-        so that it can be removed
-        """
-        pyglet.clock.schedule_interval(self.rotation_object, 0.06)
-        self.speed = SCROLL_SPEED // 3
-
+        changing its image, the behavior of the object changes during
+        background scrolling: now it is a stable object with zero speed
+        for coordinator x, his position is adjusted only while looking around
+        the landscape (only "right" or "left" is in the set_of_moves),
+        the fall and the rotation are driven by tweens
+        """
         if not PAUSE:
-            if self.pic.y > -60:
-                self.pic.y -= 10
             if "stop-left" in window.set_of_moves:
                 self.speed_scroll["x"] = 0
             if "stop-right" in window.set_of_moves:
@@ -964,21 +2083,39 @@ class ShootingDynamicObject(MyWindow):
                 self.speed_scroll["x"] = self.speed
 
         self.pic.x += dt * self.speed_scroll["x"]
-        self.check_position_pic_y()
 
     def change_object_image_after_shot_down(self, t):
         """
         upload a new image after shooting down the dynamic object,
-        at the same time the function "falling_object()" is called
+        the object rotates and falls down (600 px per second) until it
+        disappears from the visible playing area (y = 300 for small objects,
+        y = 100 for big objects), at the same time the function
+        "falling_object()" is called
         """
-        self.pic = pyglet.sprite.Sprite(
-            img=self.pic_of_falling_bird,
-            x=window.left_mouse_button_coordinates["x"],
-            y=window.left_mouse_button_coordinates["y"],
-            batch=self.batch,
-            group=self.group)
+        self.start_falling(
+            window.left_mouse_button_coordinates["x"],
+            window.left_mouse_button_coordinates["y"])
+
+    def start_falling(self, x, y, rotation=180, rotation_time=1.14):
+        """
+        the falling sprite is created at x, y and its fall starts
+        (also used to continue the fall of a restored snapshot)
+        """
+        self.pic = create_sprite(
+            self.pic_of_falling_bird, x, y, self.batch, self.group)
         self.pic.scale = self.scale
-        self.pic.rotation = 180
+        self.pic.rotation = rotation
+        self.speed = SCROLL_SPEED // 3
+        list_of_falling_birds.append(self)
+
+        pos_y = 300 if self.scale == 2/10 else 100  # for scale 4/10
+        tweens.add(Tween(
+            self.pic, "rotation", start=rotation, end=370,
+            duration=rotation_time))
+        tweens.add(Tween(
+            self.pic, "y", start=self.pic.y, end=pos_y,
+            duration=max(self.pic.y - pos_y, 0) / 600,
+            on_complete=self.finish_falling))
         pyglet.clock.schedule_interval(self.falling_object, 1/60)
 
     def set_x_for_straight_flight(self):
@@ -1012,10 +2149,18 @@ class ShootingDynamicObject(MyWindow):
 
 
 class Bird(ShootingDynamicObject):
-    def __init__(self):
-        self.image = choice(
-             [light_bird_flies_to_right, light_bird_flies_to_left])
-        self.scale = choice([2/10, 4/10])
+    def __init__(self, to_right=None, scale=None, value_x=None, value_y=None):
+        """
+        direction, scale and position are random unless they are given
+        (a bird restored from a snapshot)
+        """
+        if to_right is None:
+            self.image = choice(
+                 [light_bird_flies_to_right, light_bird_flies_to_left])
+        else:
+            self.image = light_bird_flies_to_right if to_right else (
+                light_bird_flies_to_left)
+        self.scale = scale if scale is not None else choice([2/10, 4/10])
         self.group = groups[
             "background_bird_small"] if self.scale == 2/10 else (
                 groups["foreground_bird"])
@@ -1032,23 +2177,29 @@ class Bird(ShootingDynamicObject):
 
         super(Bird, self).__init__(
             image=self.image,
-            value_x=self.set_x_for_straight_flight(),  # self.value_x,
-            value_y=randrange(
+            value_x=self.set_x_for_straight_flight() if value_x is None else (
+                value_x),  # self.value_x,
+            value_y=value_y if value_y is not None else randrange(
                 int(landscape.pic.y - 180),
                 int(landscape.pic.y + 280)) if self.scale == 4/10 else (
                 randrange(int(landscape.pic.y + 80),
                           int(landscape.pic.y + 280))),
             group=self.group)
-        self.pic = self.set_sprite(
-            batch=self.batch)
-        self.pic.scale = self.scale
 
 
 class DarkBird(ShootingDynamicObject):
-    def __init__(self):
-        self.image = choice(
-             [dark_bird_flies_to_right, dark_bird_flies_to_left])
-        self.scale = choice([2/10, 4/10])
+    def __init__(self, to_right=None, scale=None, value_x=None, value_y=None):
+        """
+        direction, scale and position are random unless they are given
+        (a bird restored from a snapshot)
+        """
+        if to_right is None:
+            self.image = choice(
+                 [dark_bird_flies_to_right, dark_bird_flies_to_left])
+        else:
+            self.image = dark_bird_flies_to_right if to_right else (
+                dark_bird_flies_to_left)
+        self.scale = scale if scale is not None else choice([2/10, 4/10])
         self.group = groups[
             "background_bird_small"] if self.scale == 2/10 else (
                 groups["foreground_bird"])
@@ -1065,29 +2216,40 @@ class DarkBird(ShootingDynamicObject):
 
         super(DarkBird, self).__init__(
             image=self.image,
-            value_x=self.set_x_for_straight_flight(),  # self.value_x,
-            value_y=randrange(
+            value_x=self.set_x_for_straight_flight() if value_x is None else (
+                value_x),  # self.value_x,
+            value_y=value_y if value_y is not None else randrange(
                 int(landscape.pic.y - 180),
                 int(landscape.pic.y + 280)) if self.scale == 4/10 else (
                 randrange(int(landscape.pic.y + 80),
                           int(landscape.pic.y + 280))),
             group=self.group)
-        self.pic = self.set_sprite(
-            batch=self.batch)
-        self.pic.scale = self.scale
 
 
 class Frame(Background):
-    def __init__(self):
-        super(Frame, self).__init__(
-            image=images["gray_frame"],
-            value_x=window.width // 2,
-            value_y=window.height // 2,
-            group=groups["foreground_gray_frame"])
-        # it is important to enter the following code in the subclass
-        # to display the gray frame:
-        # super().__init__()
-        # self.pic = self.set_sprite(batch=batches["name_of_batch"])
+    """
+    A frame (scene) is built on its first entry (see scene()). Its static
+    labels are drawn once into the texture of a panel (premultiplied alpha,
+    see render_panel) at the resolution of the view, then the opened frame
+    is the gray frame, one textured quad of the panel and the batch of its
+    live labels (buttons and labels which change). The panel is rendered
+    again when the window is resized. Frames do not scroll, unlike the other
+    backgrounds.
+    """
+    def __init__(self, gray_frame=True):
+        self.image = images["gray_frame"]
+        self.value_x = WIDTH // 2
+        self.value_y = HEIGHT // 2
+        self.group = groups["foreground_gray_frame"]
+        self.pic = self.set_sprite(batch=None) if gray_frame else None
+        self.batch = pyglet.graphics.Batch()  # live labels
+        self.texts = []  # arguments of the static labels
+        self.panel_batch = None  # static labels while the panel is rendered
+        self.panel_labels = []
+        self.panel_scale = 1  # pixels of the panel per pixel of the game
+        self.panel_target = None
+        self.panel = None  # the texture region of the static labels
+        self.widgets = Widgets()
 
     def create_label(
             self, text, font_size, value_y, color=colors["black"],
@@ -1107,63 +2269,118 @@ class Frame(Background):
             batch=batch,
             group=group)
 
-    def check_click(self, text, version):
+    def create_text(self, **arguments):
         """
-        Check mouse left click on label,
-        if the label is centered, version == "middle",
-        if the label is at the top right, version == "top_right".
+        static label, it is drawn into the panel (the label is created
+        for every rendering of the panel, see create_panel_labels)
         """
-        left_button_x = window.left_mouse_button_coordinates["x"]
-        left_button_y = window.left_mouse_button_coordinates["y"]
-        label_x, label_y = text.x, text.y
-        label_width, label_height = text.width, text.height
-        if version == "middle":
-            if left_button_x in range(
-                    label_x - (label_width // 2),
-                    label_x + (label_width // 2)) and (
-                    left_button_y in range(
-                    label_y,
-                    label_y + label_height)):
-                return True
-        if version == "top_right":
-            if left_button_x in range(
-                    label_x - label_width,
-                    label_x) and (
-                    left_button_y in range(
-                    label_y,
-                    label_y + label_height)):
-                return True
+        self.texts.append(arguments)
+
+    def create_panel_labels(self, scale):
+        """
+        the static labels enlarged by the scale, draw_panel scales them
+        back, so their glyphs are rasterized at the resolution of the panel
+        """
+        self.panel_scale = scale
+        self.panel_batch = pyglet.graphics.Batch()
+        self.panel_labels = []
+        for arguments in self.texts:
+            scaled = dict(arguments)
+            scaled.setdefault("value_x", WIDTH // 2)
+            for key in "font_size", "value_x", "value_y", "width", "height":
+                if scaled.get(key) is not None:
+                    scaled[key] *= scale
+            self.panel_labels.append(self.create_label(
+                batch=self.panel_batch,
+                group=groups["foreground_text_on_gray_frame"], **scaled))
+
+    def create_live_label(self, **arguments):
+        """
+        label which changes, it is drawn every frame
+        """
+        return self.create_label(
+            batch=self.batch,
+            group=groups["foreground_text_on_gray_frame"], **arguments)
 
-    def mouse_motion(self, x, y, dx, dy, text, version):
+    def create_button(self, name, version="middle", **arguments):
         """
-        Check mouse over the label,
+        label which is a button of the scene (see widgets.py),
         if the label is centered, version == "middle",
-        if the label is at the top right, version == "top_right".
-        """
-        label_x, label_y = text.x, text.y
-        label_width, label_height = text.width, text.height
-        if version == "middle":
-            if window.mouse_position["x"] in range(
-                    label_x - (label_width // 2),
-                    label_x + (label_width // 2)) and (
-                    window.mouse_position["y"] in range(
-                    label_y,
-                    label_y + label_height)):
-                text.color = colors["yellow"]
-                return True
-            else:
-                text.color = colors["black"]
-        if version == "top_right":
-            if window.mouse_position["x"] in range(
-                    label_x - label_width,
-                    label_x) and (
-                    window.mouse_position["y"] in range(
-                    label_y,
-                    label_y + label_height)):
-                text.color = colors["yellow"]
-                return True
-            else:
-                text.color = colors["black"]
+        if the label is at the top right, version == "top_right"
+        """
+        label = self.create_live_label(**arguments)
+        self.widgets.add(Button(
+            label, version, name=name, normal=colors["black"],
+            hover=colors["yellow"]))
+        return label
+
+    def draw_panel(self):
+        """
+        the static content of the frame
+        """
+        gl.glPushMatrix()
+        gl.glScalef(1 / self.panel_scale, 1 / self.panel_scale, 1)
+        self.panel_batch.draw()
+        gl.glPopMatrix()
+
+    def render_panel(self):
+        """
+        the static content is drawn into the texture of the panel once:
+        the colors are blended as usual (the result has premultiplied alpha,
+        the panel is cleared to transparent), the alpha is the maximum
+        of the alpha of the labels, so the panel blitted with premultiplied
+        alpha looks like the labels drawn directly, then the labels are
+        deleted; the panel has the pixels of the view, so the blit is 1:1;
+        without framebuffer objects the labels are drawn directly
+        (the back buffer may have no alpha)
+        """
+        _, _, width, height = window.viewport()
+        width, height = max(width, 1), max(height, 1)
+        if self.panel_target is None:
+            self.panel_target = RenderTarget()
+            if self.panel_target.offscreen:
+                self.panel_target.allocate(width, height)
+        target = self.panel_target
+        if not target.offscreen:
+            self.panel = False
+            self.create_panel_labels(1)
+            return
+        self.create_panel_labels(width / WIDTH)
+        gl.glClearColor(0.0, 0.0, 0.0, 0.0)
+        target.begin(width, height)
+        gl.glBlendEquationSeparate(gl.GL_FUNC_ADD, gl.GL_MAX)
+        self.draw_panel()
+        gl.glBlendEquation(gl.GL_FUNC_ADD)
+        target.end()
+        gl.glViewport(*window.viewport())
+        self.panel = target.region
+        for label in self.panel_labels:
+            label.delete()
+        self.panel_labels = []
+        self.panel_batch = None
+
+    def resized(self):
+        """
+        the view has changed, the panel is rendered again on the next draw
+        """
+        if self.panel:
+            self.panel = None
+
+    def draw(self):
+        if self.pic is not None:
+            self.pic.draw()
+        if self.panel is None:
+            self.render_panel()
+        if self.panel:
+            gl.glPushAttrib(gl.GL_COLOR_BUFFER_BIT | gl.GL_CURRENT_BIT)
+            gl.glEnable(gl.GL_BLEND)
+            gl.glBlendFunc(gl.GL_ONE, gl.GL_ONE_MINUS_SRC_ALPHA)
+            gl.glColor4f(1.0, 1.0, 1.0, 1.0)
+            self.panel.blit(0, 0, width=WIDTH, height=HEIGHT)
+            gl.glPopAttrib()
+        else:
+            self.draw_panel()
+        self.batch.draw()
 
 
 class Start(Frame):
@@ -1175,50 +2392,24 @@ class Start(Frame):
         self.text5 = "Pro zahájení nové hry klikněte na \"START\"."
 
         super().__init__()
-        self.pic = self.set_sprite(batch=batches["start_game"])
 
-        self.start_text1 = self.create_label(
+        self.create_text(
             text=self.text1, font_size=40, color=colors["brown"],
-            value_y=((window.height // 7) * 5), batch=batches["start_game"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.start_text2 = self.create_label(
-            text=self.text2, font_size=40, value_y=((window.height // 10) * 5),
-            width=180, height=40, batch=batches["start_game"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.start_text3 = self.create_label(
-            text=self.text3, font_size=40, value_y=((window.height // 10) * 3),
-            width=180, height=40, batch=batches["start_game"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.start_text4 = self.create_label(
-            text=self.text4, font_size=20, value_x=(window.width - 20),
-            value_y=(window.height - 40), width=158, height=20,
-            anchor_x="right", batch=batches["start_game"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.start_text5 = self.create_label(
-            text=self.text5, font_size=20, value_y=40,
-            batch=batches["start_game"],
-            group=groups["foreground_text_on_gray_frame"])
-
-    def check_click_to_start(self):
-        """
-        check mouse left click on label "START"
-        """
-        if super().check_click(self.start_text2, "middle"):
-            return True
-
-    def check_click_to_end(self):
-        """
-        check mouse left click on label "KONEC"
-        """
-        if super().check_click(self.start_text3, "middle"):
-            return True
-
-    def check_click_to_instructions(self):
-        """
-        check mouse left click on label "INSTRUKCE"
-        """
-        if super().check_click(self.start_text4, "top_right"):
-            return True
+            value_y=((HEIGHT // 7) * 5))
+        self.start_text2 = self.create_button(
+            "start",
+            text=self.text2, font_size=40, value_y=((HEIGHT // 10) * 5),
+            width=180, height=40)
+        self.start_text3 = self.create_button(
+            "end",
+            text=self.text3, font_size=40, value_y=((HEIGHT // 10) * 3),
+            width=180, height=40)
+        self.start_text4 = self.create_button(
+            "instructions", version="top_right",
+            text=self.text4, font_size=20, value_x=(WIDTH - 20),
+            value_y=(HEIGHT - 40), width=158, height=20,
+            anchor_x="right")
+        self.create_text(text=self.text5, font_size=20, value_y=40)
 
 
 class Instructions(Frame):
@@ -1239,78 +2430,47 @@ class Instructions(Frame):
         self.text12 = "Pauzu spustíte mezerníkem."
 
         super().__init__()
-        self.pic = self.set_sprite(batch=batches["instructions"])
 
-        self.instruction_text1 = self.create_label(
+        self.create_text(
             text=self.text1, font_size=40,
-            value_y=((window.height // 7) * 5),
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text2 = self.create_label(
-            text=self.text2, font_size=20, value_x=(window.width - 20),
-            value_y=(window.height - 40), width=260, height=20,
-            anchor_x="right", batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text3 = self.create_label(
-            text=self.text3, font_size=18, value_y=40,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text4 = self.create_label(
+            value_y=((HEIGHT // 7) * 5))
+        self.instruction_text2 = self.create_button(
+            "back", version="top_right",
+            text=self.text2, font_size=20, value_x=(WIDTH - 20),
+            value_y=(HEIGHT - 40), width=260, height=20,
+            anchor_x="right")
+        self.create_text(text=self.text3, font_size=18, value_y=40)
+        self.create_text(
             text=self.text4, font_size=20,
-            value_y=450,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text5 = self.create_label(
+            value_y=450)
+        self.create_text(
             text=self.text5, font_size=20,
-            value_x=((window.width // 8) * 2),
-            value_y=410,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text6 = self.create_label(
+            value_x=((WIDTH // 8) * 2),
+            value_y=410)
+        self.create_text(
             text=self.text6, font_size=20,
-            value_x=((window.width // 8) * 6),
-            value_y=410,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text7 = self.create_label(
+            value_x=((WIDTH // 8) * 6),
+            value_y=410)
+        self.create_text(
             text=self.text7, font_size=20,
-            value_y=350,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text8 = self.create_label(
+            value_y=350)
+        self.create_text(
             text=self.text8, font_size=20,
-            value_x=((window.width // 8) * 2),
-            value_y=310,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text9 = self.create_label(
+            value_x=((WIDTH // 8) * 2),
+            value_y=310)
+        self.create_text(
             text=self.text9, font_size=20,
-            value_x=((window.width // 8) * 6),
-            value_y=310,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text10 = self.create_label(
+            value_x=((WIDTH // 8) * 6),
+            value_y=310)
+        self.create_text(
             text=self.text10, font_size=20,
-            value_y=250,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text11 = self.create_label(
+            value_y=250)
+        self.create_text(
             text=self.text11, font_size=20,
-            value_y=210,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.instruction_text12 = self.create_label(
+            value_y=210)
+        self.create_text(
             text=self.text12, font_size=20,
-            value_y=170,
-            batch=batches["instructions"],
-            group=groups["foreground_text_on_gray_frame"])
-
-    def check_click_to_back(self):
-        """
-        check mouse left click on label "VRÁTIT SE ZPÁTKY"
-        """
-        if super().check_click(self.instruction_text2, "top_right"):
-            return True
+            value_y=170)
 
 
 class AreYouSure(Frame):
@@ -1319,17 +2479,21 @@ class AreYouSure(Frame):
         self.text2 = "ANO"
         self.text3 = "NE"
 
-        self.are_you_sure_text1 = self.create_label(
+        super().__init__(gray_frame=False)
+
+        self.create_text(
             text=self.text1, font_size=20, color=colors["black"],
-            value_y=((window.height // 14) * 8))
-        self.are_you_sure_text2 = self.create_label(
+            value_y=((HEIGHT // 14) * 8))
+        self.are_you_sure_text2 = self.create_button(
+            "yes",
             text=self.text2, font_size=20, width=60, height=20,
-            value_x=((window.width // 6) * 2),
-            value_y=((window.height // 14) * 6))
-        self.are_you_sure_text3 = self.create_label(
+            value_x=((WIDTH // 6) * 2),
+            value_y=((HEIGHT // 14) * 6))
+        self.are_you_sure_text3 = self.create_button(
+            "no",
             text=self.text3, font_size=20, width=40, height=20,
-            value_x=((window.width // 6) * 4),
-            value_y=((window.height // 14) * 6))
+            value_x=((WIDTH // 6) * 4),
+            value_y=((HEIGHT // 14) * 6))
 
     def draw_quads(self):
         """
@@ -1350,29 +2514,12 @@ class AreYouSure(Frame):
             (WIDTH - ((WIDTH // 6) * 1)), (HEIGHT - ((HEIGHT // 3) * 2)))
         gl.glEnd()
 
-    def draw(self):
+    def draw_panel(self):
         """
-        function for drawing a quadrangle and labels (i.e. Frame ARE_YOU_SURE)
+        the quadrangle and the question (i.e. Frame ARE_YOU_SURE)
         """
         self.draw_quads()
-        for text in [
-                self.are_you_sure_text1,
-                self.are_you_sure_text2, self.are_you_sure_text3]:
-            text.draw()
-
-    def check_click_to_yes(self):
-        """
-        check mouse left click on label "ANO"
-        """
-        if super().check_click(self.are_you_sure_text2, "middle"):
-            return True
-
-    def check_click_to_no(self):
-        """
-        check mouse left click on label "NE"
-        """
-        if super().check_click(self.are_you_sure_text3, "middle"):
-            return True
+        super().draw_panel()
 
 
 class End(Frame):
@@ -1381,33 +2528,41 @@ class End(Frame):
         self.text2 = f"Skóre: {str(score.number)}"
         self.text3 = "OK"
         self.text4 = "Pro přechod na úvodní obrazovku klikněte na \"OK\"."
+        self.leaderboard_version = None  # version of the cache of high_scores
 
         super().__init__()
-        self.pic = self.set_sprite(batch=batches["end_game"])
-
-        self.end_text1 = self.create_label(
-            text=self.text1, font_size=40, value_y=((window.height // 7) * 5),
-            batch=batches["end_game"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.end_text2 = self.create_label(
-            text=self.text2, font_size=40, value_y=((window.height // 9) * 4),
-            batch=batches["end_game"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.end_text3 = self.create_label(
-            text=self.text3, font_size=40, value_y=((window.height // 9) * 2),
-            width=80, height=40, batch=batches["end_game"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.end_text4 = self.create_label(
-            text=self.text4, font_size=20, value_y=40,
-            batch=batches["end_game"],
-            group=groups["foreground_text_on_gray_frame"])
-
-    def check_click_to_reset(self):
-        """
-        check mouse left click on label "OK"
-        """
-        if super().check_click(self.end_text3, "middle"):
-            return True
+
+        self.create_text(
+            text=self.text1, font_size=40, value_y=((HEIGHT // 7) * 5))
+        self.end_text2 = self.create_live_label(
+            text=self.text2, font_size=40, value_y=((HEIGHT // 9) * 4))
+        self.end_text3 = self.create_button(
+            "reset",
+            text=self.text3, font_size=40, value_y=((HEIGHT // 9) * 2),
+            width=80, height=40)
+        self.create_text(text=self.text4, font_size=20, value_y=40)
+        self.end_text5 = self.create_live_label(
+            text="", font_size=20, value_y=((HEIGHT // 9) * 3))
+
+    def update_score(self):
+        """
+        the label is changed only if the score has changed
+        """
+        text = f"Skóre: {str(score.number)}"
+        if self.end_text2.text != text:
+            self.end_text2.text = text
+
+    def update_leaderboard(self):
+        """
+        the best scores are taken from the cache of high_scores,
+        the label is changed only if the cache has changed
+        """
+        if high_scores is None or (
+                high_scores.version == self.leaderboard_version):
+            return
+        self.leaderboard_version = high_scores.version
+        best = ", ".join(str(row[0]) for row in high_scores.top())
+        self.end_text5.text = f"Nejlepší skóre: {best}" if best else ""
 
 
 class Pause(Frame):
@@ -1417,20 +2572,12 @@ class Pause(Frame):
         self.text3 = "Pro návrat do hry stiskněte opět \"MEZERNÍK\"."
 
         super().__init__()
-        self.pic = self.set_sprite(batch=batches["pause"])
-
-        self.pause_text1 = self.create_label(
-            text=self.text1, font_size=40, value_y=((window.height // 7) * 5),
-            batch=batches["pause"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.pause_text2 = self.create_label(
-            text=self.text2, font_size=30, value_y=((window.height // 9) * 4),
-            batch=batches["pause"],
-            group=groups["foreground_text_on_gray_frame"])
-        self.pause_text3 = self.create_label(
-            text=self.text3, font_size=20, value_y=40,
-            batch=batches["pause"],
-            group=groups["foreground_text_on_gray_frame"])
+
+        self.create_text(
+            text=self.text1, font_size=40, value_y=((HEIGHT // 7) * 5))
+        self.create_text(
+            text=self.text2, font_size=30, value_y=((HEIGHT // 9) * 4))
+        self.create_text(text=self.text3, font_size=20, value_y=40)
 
 
 class Timer(MyWindow):
@@ -1448,7 +2595,7 @@ class Timer(MyWindow):
             font_name="Arial",
             font_size=self.font_size,
             bold="True",
-            x=window.width // 2,
+            x=WIDTH // 2,
             y=self.value_y,
             anchor_x="center",
             anchor_y="center",
@@ -1464,6 +2611,7 @@ class Timer(MyWindow):
         self.countdown.text = str(int(self.clock))
         self.countdown.color = colors["white"]
 
+    @span()
     def update(self, dt):
         """
         one second is counted down during each update, the text color changes
@@ -1484,9 +2632,425 @@ class Timer(MyWindow):
                 self.countdown.text = ""
                 sounds["beep_ping"].play()
 
+    def restore(self, clock, running):
+        """
+        the countdown continues from a snapshot (without beeps)
+        """
+        self.clock = clock
+        self.running = running
+        self.countdown.text = str(int(self.clock)) if self.clock >= 1 else ""
+        if self.clock == int(self.start):
+            self.countdown.color = colors["white"]
+        elif self.clock > 10:
+            self.countdown.color = colors["black"]
+        else:
+            self.countdown.color = colors["red"]
+
+
+class Bot:
+    """
+    The bot plays a round instead of the player. It reads the live
+    targets every tick, chooses a target by its policy and after
+    the reaction delay it shoots at the current position of the target
+    (with a random aim error). Shots and reloads go through the same
+    handlers as the input of the player (mouse_motion, mouse_press,
+    key_press).
+    policies:
+        "random": random target (also dark birds) or random point
+        "scripted": a fixed sweep of points over the playing field
+        "nearest": the light bird nearest to the crosshair
+        "max_score": the most points for the shortest move
+        "avoid_dark": like "nearest", but never shoots near a dark bird
+    """
+    def __init__(
+            self, policy=BOT_POLICY or "random",
+            reaction_delay=BOT_REACTION_DELAY, aim_error=BOT_AIM_ERROR,
+            seed=BOT_SEED):
+        self.policy = policy
+        self.reaction_delay = reaction_delay
+        self.aim_error = aim_error
+        self.random = random_module.Random(seed)
+
+        self.target = None  # the chosen object (or a point)
+        self.wait = 0  # seconds until the shot
+        self.chosen_at = 0  # time of choosing the target
+        self.time = 0
+
+        self.script_index = 0
+        # aim points of the scripted policy (a sweep of the playing field)
+        self.script = [
+            (x, y) for y in range(250, 700, 90)
+            for x in range(60, WIDTH - 40, 85)]
+
+        self.reset_statistics()
+        pyglet.clock.schedule(self.update)
+
+    def reset_statistics(self):
+        self.shots = 0
+        self.hits = 0
+        self.dark_hits = 0
+        self.reloads = 0
+        self.times_to_kill = []
+
+    def move_crosshair(self, x, y):
+        """
+        the crosshair is moved by the same event as the mouse would send
+        """
+        current_x = window.mouse_position["x"] + window.motion_dx
+        current_y = window.mouse_position["y"] + window.motion_dy
+        mouse_motion(x, y, x - current_x, y - current_y)
+
+    def click(self, x, y, button=pyglet.window.mouse.LEFT):
+        self.move_crosshair(x, y)
+        mouse_press(x, y, button, 0)
+
+    def click_label(self, label, version="middle"):
+        x = label.x if version == "middle" else label.x - label.width // 2
+        self.click(x, label.y + label.height // 2)
+
+    def visible_targets(self, kinds):
+        """
+        live targets inside the window (not at its edges, the landscape
+        would scroll)
+        """
+        targets = []
+        for kind in kinds:
+            for item in kind:
+                if item.alive and 25 < item.pic.x < WIDTH - 25 and (
+                        60 < item.pic.y < HEIGHT - 60):
+                    targets.append(item)
+        return targets
+
+    def points(self, target):
+        if isinstance(target, Flower):
+            return 25 if target.image == images["flower_small"] else 10
+        return 25 if target.scale == 2/10 else 10
+
+    def distance(self, target):
+        return (
+            (target.pic.x - window.mouse_position["x"]) ** 2 + (
+                target.pic.y - window.mouse_position["y"]) ** 2) ** 0.5
+
+    def choose(self):
+        """
+        the target (object or point) is chosen according to the policy
+        """
+        if self.policy == "scripted":
+            point = self.script[self.script_index % len(self.script)]
+            self.script_index += 1
+            return point
+        if self.policy == "random":
+            targets = self.visible_targets(
+                [list_of_birds, list_of_dark_birds, list_of_flowers])
+            if targets and self.random.random() < 0.7:
+                return self.random.choice(targets)
+            return (
+                self.random.randrange(30, WIDTH - 30),
+                self.random.randrange(100, HEIGHT - 60))
+        if self.policy == "max_score":
+            targets = self.visible_targets([list_of_birds, list_of_flowers])
+            if targets:
+                return max(
+                    targets, key=lambda item: self.points(item) / (
+                        1 + self.distance(item) / 400))
+            return None
+        # "nearest" and "avoid_dark"
+        targets = self.visible_targets([list_of_birds]) or (
+            self.visible_targets([list_of_flowers]))
+        if targets:
+            return min(targets, key=self.distance)
+        return None
+
+    def near_dark_bird(self, x, y):
+        for bird in list_of_dark_birds:
+            if bird.alive and abs(bird.pic.x - x) < bird.pic.width * 0.3 and (
+                    abs(bird.pic.y - y) < bird.pic.height * 0.3):
+                return True
+        return False
+
+    def shoot(self):
+        """
+        the shot at the current position of the target with the aim error
+        """
+        target, self.target = self.target, None
+        if isinstance(target, tuple):
+            x, y = target
+        else:
+            if not target.alive:
+                return
+            x, y = target.pic.x, target.pic.y
+        x += self.random.gauss(0, self.aim_error)
+        y += self.random.gauss(0, self.aim_error)
+        x = min(max(x, 21), WIDTH - 21)
+        y = min(max(y, 0), HEIGHT)
+        if self.policy == "avoid_dark" and self.near_dark_bird(x, y):
+            return
+
+        score_before = score.number
+        self.click(x, y)
+        self.shots += 1
+        if score.number > score_before:
+            self.hits += 1
+            self.times_to_kill.append(self.time - self.chosen_at)
+        elif score.number < score_before:
+            self.dark_hits += 1
+
+    @span()
+    def update(self, dt):
+        self.time += dt
+        if not TIMER or PAUSE:
+            self.target = None
+            return
+        if not list_of_bullets:
+            key_press(pyglet.window.key.UP, 0)
+            self.reloads += 1
+            return
+        if self.target is None:
+            self.target = self.choose()
+            self.chosen_at = self.time
+            self.wait = self.reaction_delay * self.random.uniform(0.7, 1.3)
+            return
+        self.wait -= dt
+        if self.wait <= 0:
+            self.shoot()
+
+
+class AttractMode:
+    """
+    Rounds are played automatically: Start -> round -> End -> reset()
+    and so on, the rounds are played by the bot (see Bot). Frame times,
+    memory, numbers of objects and scheduled callbacks are logged after
+    every round (one JSON line) to a rotating log. The run stops after
+    the set number of hours or rounds or when a drift against the first
+    rounds is detected.
+    """
+    def __init__(
+            self, bot, hours=ATTRACT_HOURS, rounds=ATTRACT_ROUNDS,
+            log=ATTRACT_LOG, results=ATTRACT_RESULTS):
+        self.bot = bot
+        self.results = results
+        self.hours = hours
+        self.rounds = rounds
+        self.started = time.monotonic()
+        self.round = 0
+        self.rows = []
+        self.failed = False
+        self.report = None
+
+        self.frame_times = []
+        self.last_frame = None
+        self.end_game_time = 0  # seconds for which the score is displayed
+
+        self.logger = logging.getLogger("birds.attract")
+        self.logger.setLevel(logging.INFO)
+        if log:
+            handler = logging.handlers.RotatingFileHandler(
+                log, maxBytes=2**20, backupCount=5)
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.logger.addHandler(handler)
+
+        pyglet.clock.schedule_interval(self.update, 0.1)
+
+    def frame(self):
+        """
+        the time between two displayed frames is stored
+        """
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            self.frame_times.append(now - self.last_frame)
+        self.last_frame = now
+
+    def update(self, dt):
+        if START_GAME and not ARE_YOU_SURE and not INSTRUCTIONS:
+            self.bot.reset_statistics()
+            self.bot.click_label(scene("start").start_text2)
+
+        if END_GAME:
+            self.end_game_time += dt
+            if self.end_game_time >= 2:
+                self.end_game_time = 0
+                self.end_round()
+                try:
+                    self.bot.click_label(scene("end").end_text3)
+                except MemoryGrowthError as error:
+                    self.failed = True
+                    self.stop(str(error))
+                    return
+                self.check_limits()
+
+    def end_round(self):
+        """
+        the statistics of the finished round are logged
+        """
+        self.round += 1
+        frame_times = sorted(self.frame_times)
+        self.frame_times = []
+
+        def percentile(value):
+            if not frame_times:
+                return 0
+            index = min(len(frame_times) - 1, int(len(frame_times) * value))
+            return round(frame_times[index] * 1000, 3)
+
+        row = {
+            "round": self.round,
+            "elapsed": round(time.monotonic() - self.started, 1),
+            "score": score.number,
+            "shots": self.bot.shots,
+            "hits": self.bot.hits,
+            "dark_hits": self.bot.dark_hits,
+            "ttk_count": len(self.bot.times_to_kill),
+            "ttk_mean": round(
+                sum(self.bot.times_to_kill) / len(self.bot.times_to_kill), 3)
+            if self.bot.times_to_kill else None,
+            "frames": len(frame_times),
+            "frame_p50": percentile(0.5),
+            "frame_p95": percentile(0.95),
+            "frame_p99": percentile(0.99),
+            "frame_max": percentile(1),
+            "rss": get_rss()}
+        row.update(count_live_objects())
+        row.update(gc_monitor.take())
+        self.rows.append(row)
+        self.logger.info(json.dumps(row))
+        if self.results:
+            with open(self.results, "a") as results:
+                results.write(json.dumps(row) + "\n")
+        self.check_drift()
+
+    def check_drift(self):
+        """
+        the last round is compared with the baseline (the first rounds)
+        """
+        if len(self.rows) <= ATTRACT_WARMUP_ROUNDS:
+            return
+        baseline = self.rows[:ATTRACT_WARMUP_ROUNDS]
+        last = self.rows[-1]
+
+        def base(key):
+            return sorted(row[key] for row in baseline)[len(baseline) // 2]
+
+        problems = []
+        if last["rss"] - base("rss") > ATTRACT_RSS_DRIFT:
+            problems.append(
+                f"RSS {last['rss'] / 2**20:.1f} MiB "
+                f"(baseline {base('rss') / 2**20:.1f} MiB)")
+        if last["frame_p95"] > ATTRACT_FRAME_TIME_DRIFT * base("frame_p95"):
+            problems.append(
+                f"p95 frame time {last['frame_p95']} ms "
+                f"(baseline {base('frame_p95')} ms)")
+        if last["callbacks"] - base("callbacks") > ATTRACT_CALLBACK_DRIFT:
+            problems.append(
+                f"{last['callbacks']} scheduled callbacks "
+                f"(baseline {base('callbacks')})")
+        if problems:
+            self.failed = True
+            self.stop("drift detected: " + "; ".join(problems))
+
+    def check_limits(self):
+        if self.rounds and self.round >= self.rounds:
+            self.stop(f"{self.round} rounds played")
+        elif self.hours and (
+                time.monotonic() - self.started >= self.hours * 3600):
+            self.stop(f"{self.hours} hours played")
+
+    def stop(self, reason):
+        """
+        the run is stopped and the report is logged and printed
+        """
+        if self.report is not None:
+            return
+        first = self.rows[0] if self.rows else {}
+        last = self.rows[-1] if self.rows else {}
+        self.report = (
+            f"attract mode stopped after {self.round} rounds: {reason}\n"
+            f"  first round: {json.dumps(first)}\n"
+            f"  last round: {json.dumps(last)}")
+        self.logger.info(self.report)
+        print(self.report)
+        pyglet.clock.unschedule(self.update)
+        pyglet.app.exit()
+
+
+class CaptureMode:
+    """
+    The frames of CAPTURES are saved to PNG (see capture.py): the round
+    is started, paused for a moment and played to its end by the bot,
+    a frame is captured when its scene has been displayed for the set
+    seconds. The run is headless with simulated time and a fixed seed,
+    so every run draws the same frames.
+    """
+    def __init__(self, bot, directory=CAPTURE):
+        self.bot = bot
+        self.writer = FrameWriter(directory)
+        self.index = 0  # the next frame of CAPTURES
+        self.scene_time = 0  # seconds for which the scene is displayed
+        self.requested = None  # the frame read back after this drawing
+        pyglet.clock.schedule(self.update)
+
+    def update(self, dt):
+        if self.index == len(CAPTURES):
+            return
+        name, flag, seconds = CAPTURES[self.index]
+        if START_GAME and flag != "START_GAME":
+            self.bot.click_label(scene("start").start_text2)
+        if TIMER and (flag == "PAUSE") != PAUSE:
+            key_press(pyglet.window.key.SPACE, 0)
+
+        if globals()[flag]:
+            self.scene_time += dt
+            if self.scene_time >= seconds:
+                self.requested = name
+                self.scene_time = 0
+                self.index += 1
+        else:
+            self.scene_time = 0
+
+    def frame(self):
+        """
+        the requested frame is read back from the back buffer (called
+        by MyWindow.flip), the PNG is encoded by the FrameWriter
+        """
+        if self.requested is None:
+            return
+        x, y, width, height = window.viewport()
+        pixels = (gl.GLubyte * (width * height * 4))()
+        gl.glReadBuffer(gl.GL_BACK)
+        gl.glReadPixels(
+            x, y, width, height, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, pixels)
+        self.writer.save(self.requested, width, height, pixels)
+        self.requested = None
+        if self.index == len(CAPTURES):
+            self.writer.close()
+            print(f"{len(CAPTURES)} frames saved to {CAPTURE}")
+            pyglet.app.exit()
+
 
 # instances
+memory_report = MemoryReport() if MEMORY_REPORT else None
+animation_clock = AnimationClock()
+tweens = TweenEngine()
+flight_paths = FlightPaths() if numpy is not None else None
+flocking = Flocking() if numpy is not None and FLOCKING else None
+# frames built so far (see scene), built before the window,
+# which renders their panels again when it is resized
+scenes = {}
 window = MyWindow()
+render_target = RenderTarget()
+recorder = None  # the running recording (see start_recording)
+instanced_renderer = (
+    create_instanced_renderer()
+    if INSTANCED_RENDERING and numpy is not None else None)
+high_scores = (
+    HighScores(HIGH_SCORES, top=HIGH_SCORES_TOP) if HIGH_SCORES else None)
+spectator_server = SpectatorServer(
+    SPECTATOR_HOST, SPECTATOR_PORT) if SPECTATOR_PORT else None
+target_numbers = itertools.count(1)  # numbers of targets for spectators
+snapshot_writer = snapshot.SnapshotWriter(SNAPSHOT) if SNAPSHOT else None
+telemetry = events.Telemetry(
+    TELEMETRY, time_function=pyglet.clock.get_default().time,
+    file_size=TELEMETRY_FILE_SIZE,
+    max_files=TELEMETRY_MAX_FILES) if TELEMETRY else None
 landscape = Landscape()
 land = Land()
 
@@ -1500,22 +3064,69 @@ grass = Grass()
 score = Score()
 
 timer_3_2_1 = Timer(
-    start="3", font_size=360, value_y=(window.height // 2))
+    start="3", font_size=360, value_y=(HEIGHT // 2))
 timer = Timer(
     start=str(LENGTH_OF_ROUND + 3), font_size=40, value_y=(HEIGHT - 40))
 
-list_of_gray_bullets = [
-    Bullet(images["bullet_gray"], 37 * num) for num in range(1, 9)]
-list_of_bullets = [
-    Bullet(images["bullet"], 37 * num) for num in range(1, 9)]
+list_of_gray_bullets = []
+list_of_bullets = []
+reload_bullets()
 
-start = Start()
-instructions = Instructions()
-are_you_sure = AreYouSure()
-pause = Pause()
-end = End()
+# frames are built on their first entry (see scene)
+FRAME_CLASSES = {
+    "start": Start, "instructions": Instructions,
+    "are_you_sure": AreYouSure, "pause": Pause, "end": End}
+hovered_widgets = None  # widgets of the scene under the mouse
 
 
+def scene(name):
+    """
+    the frame of the scene, it is built when it is needed for the first time
+    (frames the player never opens cost nothing)
+    """
+    frame = scenes.get(name)
+    if frame is None:
+        frame = scenes[name] = FRAME_CLASSES[name]()
+    return frame
+
+
+def draw_batch(name):
+    """
+    the batch is drawn and then the sprite layers of the batch drawn
+    by the instanced renderer (in the order of their groups)
+    """
+    batches[name].draw()
+    if instanced_renderer is not None:
+        batch = batches[name]
+        for layer in sorted(layers.values(), key=lambda item: item.order):
+            if layer.batch is batch:
+                layer.draw(WIDTH, HEIGHT)
+
+
+def apply_quality(level):
+    """
+    the steps of the quality level are switched off (QUALITY_STEPS
+    up to the level), the other steps are on (see QualityGovernor)
+    """
+    global flower_limit, render_scale
+    steps = QUALITY_STEPS[:level]
+    flower_limit = NUMBER_OF_FLOWERS
+    if "flowers" in steps:
+        flower_limit = max(1, round(NUMBER_OF_FLOWERS * QUALITY_FLOWERS))
+    animation_clock.interval = (
+        1 / QUALITY_ANIMATION_RATE if "animation" in steps else 0)
+    for cloud in cloud_left_a, cloud_left_b, cloud_right_a, cloud_right_b:
+        cloud.set_bobbing("clouds" not in steps)
+    # the landscape itself has the hills and clouds
+    skipped_batches.clear()
+    if "background" in steps:
+        skipped_batches.update(["land", "clouds"])
+    render_scale = RENDER_SCALE
+    if "resolution" in steps:
+        render_scale = min(RENDER_SCALE, QUALITY_RENDER_SCALE)
+
+
+@span()
 def draw():
     """
     the function coordinates the drawing of individual elements of the game
@@ -1524,28 +3135,48 @@ def draw():
     global END_GAME, TIMER
     global timer_3_2_1, timer
 
-    gl.glClearColor(0.0, 1.0, 1.0, 1.0)
+    # black bars around the view (the landscape covers the whole view)
+    gl.glClearColor(0.0, 0.0, 0.0, 1.0)
     gl.glClear(gl.GL_COLOR_BUFFER_BIT)
 
+    # vertices of shooting objects are uploaded once per frame
+    for layer in layers.values():
+        layer.update()
+
+    # the world is drawn at render_scale into the render target, the score,
+    # frames and cursor at the full resolution of the view
+    viewport = window.viewport()
+    if render_scale < 1:
+        render_target.begin(
+            max(round(viewport[2] * render_scale), 1),
+            max(round(viewport[3] * render_scale), 1))
+    else:
+        gl.glViewport(*viewport)
+
     batches["landscape"].draw()
-    batches["birds_small"].draw()
-    batches["land"].draw()
-    batches["clouds"].draw()
-    batches["flowers_small"].draw()
-    batches["birds"].draw()
+    draw_batch("birds_small")
+    for name in "land", "clouds":
+        if name not in skipped_batches:
+            batches[name].draw()
+    draw_batch("flowers_small")
+    draw_batch("birds")
     batches["grass"].draw()
-    batches["flowers"].draw()
-    batches["bullets"].draw()
+    draw_batch("flowers")
+    draw_batch("bullets")
+    if render_scale < 1:
+        render_target.end()
+        gl.glViewport(*viewport)
+        render_target.blit(0, 0, WIDTH, HEIGHT)
     batches["score"].draw()
 
     if START_GAME:
-        batches["start_game"].draw()
+        scene("start").draw()
 
     if INSTRUCTIONS:
-        batches["instructions"].draw()
+        scene("instructions").draw()
 
     if ARE_YOU_SURE:
-        are_you_sure.draw()
+        scene("are_you_sure").draw()
 
     if NEW_GAME:
         # one timer is replaced by another timer
@@ -1554,6 +3185,12 @@ def draw():
             if timer_3_2_1.countdown.text == "":
                 TIMER_3_2_1 = False
                 TIMER = True
+                score.started = pyglet.clock.get_default().time()
+                if telemetry:
+                    telemetry.round += 1
+                record_event(events.ROUND_START)
+                if gc_policy:
+                    gc_policy.round_started()
         # the game round ends as soon as the countdown ends
         if TIMER:
             timer.countdown.draw()
@@ -1561,18 +3198,29 @@ def draw():
                 TIMER = False
                 NEW_GAME = False
                 END_GAME = True
+                record_round()
+                record_event(events.ROUND_END)
+                if gc_policy:
+                    # the garbage of the round while the score is displayed
+                    gc_policy.round_ended()
+                    if quality_governor:
+                        quality_governor.pause()
 
     if PAUSE:
-        batches["pause"].draw()
+        scene("pause").draw()
 
     if END_GAME:
         # final score is updated to be displayed
-        end.end_text2.text = f"Skóre: {str(score.number)}"
-        batches["end_game"].draw()
+        end = scene("end")
+        end.update_score()
+        end.update_leaderboard()
+        end.draw()
 
-    batches["cursor"].draw()
+    if CURSOR_MODE != "hardware":
+        batches["cursor"].draw()
 
 
+@span()
 def key_press(symbol, modifier):
     """
     the function coordinates the game logic based on the player's input:
@@ -1582,53 +3230,179 @@ def key_press(symbol, modifier):
     global list_of_gray_bullets, list_of_bullets
     window.key_press(symbol, modifier)
 
+    if symbol == pyglet.window.key.F11:
+        window.set_fullscreen(not window.fullscreen)
+    if symbol == pyglet.window.key.F12:
+        if recorder:
+            stop_recording()
+        else:
+            start_recording()
+
     if TIMER:  # after NEW_GAME after TIMER_3_2_1...
         if not PAUSE:
             if symbol == pyglet.window.key.UP:
                 # charging bullets
-                list_of_gray_bullets = [
-                    Bullet(
-                        images[
-                            "bullet_gray"], 37 * num) for num in range(1, 9)]
-                list_of_bullets = [
-                    Bullet(images["bullet"], 37 * num) for num in range(1, 9)]
+                reload_bullets()
                 sounds["shotgun_reload"].play()
+                record_event(events.RELOAD)
         if symbol == pyglet.window.key.SPACE:
             # pause switch
             if PAUSE:
                 PAUSE = False
+                record_event(events.RESUME)
             else:
                 PAUSE = True
+                record_event(events.PAUSE)
+                if snapshot_writer:
+                    save_round()
+                    if quality_governor:
+                        quality_governor.pause()  # the save is synced
 
 
+@span()
 def mouse_motion(x, y, dx, dy):
     """
     the function coordinates the game logic based on the player's input:
-    i.e. move the mouse around the game window
+    i.e. move the mouse around the game window,
+    the motion is only accumulated, see update_mouse_motion()
     """
-    global START_GAME, INSTRUCTIONS, ARE_YOU_SURE
     window.mouse_motion(x, y, dx, dy)
 
-    # change the color of the label text after hovering the mouse
-    if START_GAME and not ARE_YOU_SURE:
-        start.mouse_motion(x, y, dx, dy, start.start_text2, "middle")
-        start.mouse_motion(x, y, dx, dy, start.start_text3, "middle")
-        start.mouse_motion(x, y, dx, dy, start.start_text4, "top_right")
 
-    if ARE_YOU_SURE:
-        are_you_sure.mouse_motion(
-            x, y, dx, dy, are_you_sure.are_you_sure_text2, "middle")
-        are_you_sure.mouse_motion(
-            x, y, dx, dy, are_you_sure.are_you_sure_text3, "middle")
+def window_mouse_motion(x, y, dx, dy):
+    """
+    events of the window are in its coordinates, the game gets them
+    in its own coordinates (the bot calls mouse_motion directly)
+    """
+    x, y = window.to_game(x, y)
+    mouse_motion(round(x), round(y), *window.scale_motion(dx, dy))
+
+
+def window_mouse_press(x, y, button, modifiers):
+    x, y = window.to_game(x, y)
+    mouse_press(round(x), round(y), button, modifiers)
 
-    if INSTRUCTIONS:
-        instructions.mouse_motion(
-            x, y, dx, dy, instructions.instruction_text2, "top_right")
 
+def active_widgets():
+    """
+    the buttons of the scene which gets the mouse events (None if the scene
+    has no buttons), the question covers the main screen
+    """
+    if ARE_YOU_SURE:
+        return scene("are_you_sure").widgets
+    if START_GAME:
+        return scene("start").widgets
+    if INSTRUCTIONS:
+        return scene("instructions").widgets
     if END_GAME:
-        end.mouse_motion(x, y, dx, dy, end.end_text3, "middle")
+        return scene("end").widgets
+    return None
 
 
+@span()
+def update_mouse_motion(dt):
+    """
+    the motion accumulated since the last tick is processed once per tick,
+    then the buttons under the mouse are updated (only the buttons
+    of the active scene and only if the mouse or the scene has changed)
+    """
+    global hovered_widgets
+    moved = window.update_mouse_motion(dt)
+    widgets = active_widgets()
+    if widgets is not hovered_widgets:
+        # the hidden scene must not keep a button in the hover color
+        if hovered_widgets is not None:
+            hovered_widgets.leave()
+        hovered_widgets = widgets
+        moved = True
+    if moved and widgets is not None:
+        widgets.motion(window.mouse_position["x"], window.mouse_position["y"])
+
+
+@span()
+def resolve_shot(x, y):
+    """
+    the shot of the left mouse button during the round: the targets
+    under the crosshair are shot down, the score and sounds follow
+    """
+    shot_down_flower = False
+    shot_down_bird = False
+    hit_target = None  # the first target shot down (for telemetry)
+
+    # erasing bullets
+    if list_of_bullets:
+        list_of_bullets.pop().pic.delete()
+
+        # check the shooting down of the bird and erasing bird
+        if list_of_birds:
+            for index, bird in enumerate(list_of_birds):
+                bird.check_shot()
+                if not bird.alive:
+                    record_event(events.HIT, bird)
+                    bird.delete_pic()
+                    del list_of_birds[index]
+                    hit_target = hit_target or bird
+                    shot_down_bird = True
+                    score.number += 25 if bird.scale == 2/10 else (
+                        10)
+
+        # check the shooting down of the bird and erasing bird
+        if list_of_dark_birds:
+            for index, bird in enumerate(list_of_dark_birds):
+                bird.check_shot()
+                if not bird.alive:
+                    record_event(events.HIT, bird)
+                    bird.delete_pic()
+                    del list_of_dark_birds[index]
+                    hit_target = hit_target or bird
+                    shot_down_bird = True
+                    score.number -= 25 if bird.scale == 2/10 else (
+                        10)
+
+        # check the shooting down of the flower and erasing flower
+        if list_of_flowers:
+            for index, flower in enumerate(list_of_flowers):
+                flower.check_shot(
+                    version="small" if flower.image == images[
+                        "flower_small"] else "normal")
+                if not flower.alive:
+                    record_event(events.HIT, flower)
+                    flower.delete_pic()
+                    del list_of_flowers[index]
+                    hit_target = hit_target or flower
+                    shot_down_flower = True
+                    score.number += 25 if flower.image == images[
+                        "flower_small"] else 10
+
+        score.shots += 1
+        if shot_down_bird or shot_down_flower:
+            score.hits += 1
+        record_event(events.SHOT, hit_target, x, y)
+
+        # playing sounds based on whether
+        # the object was shot down or not
+        if shot_down_bird:
+            sounds["shot_splat"].play()
+            sounds["shot_bird"].play()
+            shot_down_bird = False
+        elif shot_down_flower:
+            sounds["shot_splat"].play()
+            shot_down_flower = False
+        else:
+            sounds["shot"].play()
+
+    # playing the sound of an empty gun
+    else:
+        sounds["shotgun_empty"].play()
+        record_event(events.DRY_FIRE, x=x, y=y)
+
+    # erasing gray bullets
+    if list_of_gray_bullets:
+        list_of_gray_bullets[-1].check_bullet()   # falling bullet
+        del list_of_gray_bullets[-1]
+
+
+@span()
 def mouse_press(x, y, button, modifiers):
     """
     the function coordinates the game logic based on the player's input:
@@ -1639,195 +3413,152 @@ def mouse_press(x, y, button, modifiers):
     global END_GAME
     global list_of_bullets, list_of_gray_bullets, list_of_flowers
 
-    shot_down_flower = False
-    shot_down_bird = False
     window.mouse_press(x, y, button, modifiers)
 
     if button == pyglet.window.mouse.LEFT:
         if TIMER:  # after NEW_GAME after TIMER_3_2_1...
             if not PAUSE:
-                # erasing bullets
-                if list_of_bullets:
-                    del list_of_bullets[-1]
-
-                    # check the shooting down of the bird and erasing bird
-                    if list_of_birds:
-                        for index, bird in enumerate(list_of_birds):
-                            bird.check_shot()
-                            if not bird.alive:
-                                pyglet.clock.unschedule(bird.update)
-                                bird.pic.delete()
-                                del list_of_birds[index]
-                                shot_down_bird = True
-                                score.number += 25 if bird.scale == 2/10 else (
-                                    10)
-
-                    # check the shooting down of the bird and erasing bird
-                    if list_of_dark_birds:
-                        for index, bird in enumerate(list_of_dark_birds):
-                            bird.check_shot()
-                            if not bird.alive:
-                                pyglet.clock.unschedule(bird.update)
-                                bird.pic.delete()
-                                del list_of_dark_birds[index]
-                                shot_down_bird = True
-                                score.number -= 25 if bird.scale == 2/10 else (
-                                    10)
-
-                    # check the shooting down of the flower and erasing flower
-                    if list_of_flowers:
-                        for index, flower in enumerate(list_of_flowers):
-                            flower.check_shot(
-                                version="small" if flower.image == images[
-                                    "flower_small"] else "normal")
-                            if not flower.alive:
-                                pyglet.clock.unschedule(flower.update)
-                                del list_of_flowers[index]
-                                shot_down_flower = True
-                                score.number += 25 if flower.image == images[
-                                    "flower_small"] else 10
-
-                    # playing sounds based on whether
-                    # the object was shot down or not
-                    if shot_down_bird:
-                        sounds["shot_splat"].play()
-                        sounds["shot_bird"].play()
-                        shot_down_bird = False
-                    elif shot_down_flower:
-                        sounds["shot_splat"].play()
-                        shot_down_flower = False
-                    else:
-                        sounds["shot"].play()
-
-                # playing the sound of an empty gun
-                else:
-                    sounds["shotgun_empty"].play()
-
-                # erasing gray bullets
-                if list_of_gray_bullets:
-                    list_of_gray_bullets[-1].check_bullet()   # falling bullet
-                    del list_of_gray_bullets[-1]
-
-        if START_GAME:
-            if not ARE_YOU_SURE:  # the player does not want to end the game
-
-                # new game can begin as soon as the player left-clicks
-                # on the "START"
-                if start.check_click_to_start():
-                    NEW_GAME = True
-                    TIMER_3_2_1 = True
-                    START_GAME = False
-                    # reset the label text color to prevent yellow text
-                    # in "START"
-                    start.start_text2.color = colors["black"]
-
-                    # resetting adding flowers
-                    pyglet.clock.unschedule(update_add_flower)
-                    for flower in list_of_flowers:
-                        pyglet.clock.unschedule(flower.update)
-                    del list_of_flowers
-                    list_of_flowers = []
-                    pyglet.clock.schedule_interval(
-                        update_add_flower, DT_NEW_GAME)
-
-                # instructions are displayed as soon as the player
-                # left-clicks on the "INSTRUKCE"
-                if start.check_click_to_instructions():
-                    START_GAME = False
-                    INSTRUCTIONS = True
-                    # reset left_mouse_coordinates to allow click between
-                    # START_GAME and INSTRUCTIONS ("START", "INSTRUKCE")
-                    window.left_mouse_button_coordinates["x"] = 0
-                    window.left_mouse_button_coordinates["y"] = 0
-                    # reset the label text color to prevent yellow text
-                    # in "INSTRUKCE"
-                    start.start_text4.color = colors["black"]
-            if start.check_click_to_end():
-                ARE_YOU_SURE = True
-                # reset the label text color to prevent yellow text in "KONEC"
-                start.start_text3.color = colors["black"]
-            if are_you_sure.check_click_to_yes():
-                window.close()
-            if are_you_sure.check_click_to_no():
-                ARE_YOU_SURE = False
-                # reset the label text color to prevent yellow text in "NE"
-                are_you_sure.are_you_sure_text3.color = colors["black"]
-
-        if INSTRUCTIONS:
-            # main screen "START_GAME" is displayed as soon as the player
-            # left-clicks on the "VRÁTIT SE ZPÁTKY"
-            if instructions.check_click_to_back():
-                START_GAME = True
-                INSTRUCTIONS = False
-                # reset the label text color to prevent yellow text in "START"
-                instructions.instruction_text2.color = colors["black"]
-
-        if END_GAME:
-            # main screen "START_GAME" is displayed as soon as the player
-            # left-clicks on the "OK"
-            if end.check_click_to_reset():
-                START_GAME = True
-                END_GAME = False
-                # reset the label text color to prevent yellow text in "OK"
-                end.end_text3.color = colors["black"]
-
-                reset()
+                resolve_shot(x, y)
+
+        # the button clicked in the active scene (see active_widgets)
+        widgets = active_widgets()
+        clicked = widgets.click(
+            window.left_mouse_button_coordinates["x"],
+            window.left_mouse_button_coordinates["y"]) if widgets else None
+        action = clicked.name if clicked else None
+
+        # new game can begin as soon as the player left-clicks on the "START"
+        if action == "start":
+            NEW_GAME = True
+            TIMER_3_2_1 = True
+            START_GAME = False
+
+            # resetting adding flowers
+            pyglet.clock.unschedule(update_add_flower)
+            for flower in list_of_flowers:
+                record_event(events.DESPAWN, flower)
+                flower.delete_pic()
+            del list_of_flowers
+            list_of_flowers = []
+            pyglet.clock.schedule_interval(update_add_flower, DT_NEW_GAME)
+
+        # instructions are displayed as soon as the player left-clicks
+        # on the "INSTRUKCE"
+        elif action == "instructions":
+            START_GAME = False
+            INSTRUCTIONS = True
+
+        elif action == "end":
+            ARE_YOU_SURE = True
+        elif action == "yes":
+            window.close()
+        elif action == "no":
+            ARE_YOU_SURE = False
+
+        # main screen "START_GAME" is displayed as soon as the player
+        # left-clicks on the "VRÁTIT SE ZPÁTKY"
+        elif action == "back":
+            START_GAME = True
+            INSTRUCTIONS = False
+
+        # main screen "START_GAME" is displayed as soon as the player
+        # left-clicks on the "OK"
+        elif action == "reset":
+            START_GAME = True
+            END_GAME = False
+            reset()
 
     if button == pyglet.window.mouse.RIGHT:
 
         # charging bullets
         if TIMER:  # after NEW_GAME after TIMER_3_2_1...
             if not PAUSE:
-                list_of_gray_bullets = [
-                    Bullet(
-                        images[
-                            "bullet_gray"], 37 * num) for num in range(1, 9)]
-                list_of_bullets = [
-                    Bullet(images["bullet"], 37 * num) for num in range(1, 9)]
+                reload_bullets()
                 sounds["shotgun_reload"].play()
+                record_event(events.RELOAD)
 
 
 window.push_handlers(
     on_draw=draw,
     on_key_press=key_press,
-    on_mouse_motion=mouse_motion,
-    on_mouse_press=mouse_press)
+    on_mouse_motion=window_mouse_motion,
+    on_mouse_press=window_mouse_press)
 
 
+@span()
 def update_add_flower(dt):
     """
     the function coordinates the addition and removal of flowers
     """
     if not PAUSE:
         # flowers are added regularly until their maximum number is reached
-        if len(list_of_flowers) < NUMBER_OF_FLOWERS:
+        # (flower_limit is NUMBER_OF_FLOWERS or less at a lower quality)
+        if len(list_of_flowers) < flower_limit:
             list_of_flowers.append(Flower())
+            record_event(events.SPAWN, list_of_flowers[-1])
 
         # the first flower added is removed as soon as their maximum number is
         # reached, subsequently the flower is added & game dynamics is ensured
-        if len(list_of_flowers) == NUMBER_OF_FLOWERS:
-            pyglet.clock.unschedule(list_of_flowers[0].update)
+        # (above a lowered limit one flower is removed per call)
+        if len(list_of_flowers) >= flower_limit:
+            record_event(events.DESPAWN, list_of_flowers[0])
+            list_of_flowers[0].delete_pic()
             del list_of_flowers[0]
 
 
+@span()
 def update_add_bird(dt):
     """
     the function coordinates the addition and removal of birds
     """
     if not PAUSE:
         # birds are added regularly until their maximum number is reached
-        if len(list_of_birds) <= NUMBER_OF_BIRDS:
+        # (or flocks until the number of flocks is reached)
+        if flocking:
+            if flocking.flocks() < NUMBER_OF_FLOCKS:
+                add_flock()
+        elif len(list_of_birds) <= NUMBER_OF_BIRDS:
             list_of_birds.append(Bird())
+            record_event(events.SPAWN, list_of_birds[-1])
 
         # a bird that leaves a visible playing field the bird is deleted
         # and replaced by a new bird & game dynamics is ensured
         for bird in list_of_birds:
             if bird.check_position_pic_x():
-                pyglet.clock.unschedule(bird.update)
-                bird.pic.delete()
+                record_event(events.DESPAWN, bird)
+                bird.delete_pic()
                 list_of_birds.remove(bird)
 
 
+def add_flock():
+    """
+    a flock of birds (with dark birds mixed in) flies behind its leader,
+    all birds of the flock have the same direction and scale
+    """
+    flock = flocking.new_flock()
+    leader = Bird()
+    to_right = leader.direction_of_flight["to_right"]
+    behind = -1 if to_right else 1
+    size = leader.scale / (4/10)
+    members = [leader]
+    for number in range(FLOCK_SIZE - 1 + FLOCK_DARK_BIRDS):
+        cls = Bird if number < FLOCK_SIZE - 1 else DarkBird
+        members.append(cls(
+            to_right, leader.scale,
+            leader.pic.x + behind * randrange(15, 140) * size,
+            leader.pic.y + randrange(-45, 45) * size))
+    for bird in members:
+        if flight_paths:
+            flight_paths.remove(bird)
+        flocking.add(bird, flock)
+        if isinstance(bird, DarkBird):
+            list_of_dark_birds.append(bird)
+        else:
+            list_of_birds.append(bird)
+        record_event(events.SPAWN, bird)
+
+
+@span()
 def update_add_dark_bird(dt):
     """
     the function coordinates the addition and removal of dark birds
@@ -1836,16 +3567,36 @@ def update_add_dark_bird(dt):
         # dark birds are added regularly until their maximum number is reached
         if len(list_of_dark_birds) <= NUMBER_OF_DARK_BIRDS:
             list_of_dark_birds.append(DarkBird())
+            record_event(events.SPAWN, list_of_dark_birds[-1])
 
         # a dark bird that leaves a visible playing field the bird is deleted
         # and replaced by a new dark bird & game dynamics is ensured
         for bird in list_of_dark_birds:
             if bird.check_position_pic_x():
-                pyglet.clock.unschedule(bird.update)
-                bird.pic.delete()
+                record_event(events.DESPAWN, bird)
+                bird.delete_pic()
                 list_of_dark_birds.remove(bird)
 
 
+@span()
+def update_flight_paths(dt):
+    """
+    the birds move along their flight paths (all of them at once)
+    """
+    if not PAUSE:
+        flight_paths.update(dt)
+
+
+@span()
+def update_flocking(dt):
+    """
+    the birds of all flocks move (all of them at once)
+    """
+    if not PAUSE:
+        flocking.update(dt)
+
+
+@span()
 def update_timer(dt):
     """
     the function coordinates the behavior of timers
@@ -1864,8 +3615,90 @@ def update_timer(dt):
 
 
 pyglet.clock.schedule_interval(update_add_flower, DT_BEFORE_NEW_GAME)
-pyglet.clock.schedule_interval(update_add_bird, 0.5)
-pyglet.clock.schedule_interval(update_add_dark_bird, 1)
+pyglet.clock.schedule_interval(update_add_bird, DT_ADD_BIRD)
+pyglet.clock.schedule_interval(update_add_dark_bird, DT_ADD_DARK_BIRD)
 pyglet.clock.schedule_interval(update_timer, 1)
-
-pyglet.app.run()
+pyglet.clock.schedule(update_mouse_motion)
+pyglet.clock.schedule(animation_clock.update)
+pyglet.clock.schedule(tweens.update)
+if flight_paths:
+    pyglet.clock.schedule(update_flight_paths)
+if flocking:
+    pyglet.clock.schedule(update_flocking)
+if telemetry:
+    pyglet.clock.schedule_interval(telemetry.flush, TELEMETRY_FLUSH_INTERVAL)
+if spectator_server:
+    pyglet.clock.schedule_interval(publish_snapshot, 1 / SPECTATOR_RATE)
+if snapshot_writer and SNAPSHOT_AUTOSAVE:
+    pyglet.clock.schedule_interval(save_round, SNAPSHOT_AUTOSAVE)
+
+bot = Bot() if BOT_POLICY or ATTRACT_MODE or CAPTURE else None
+capture_mode = CaptureMode(bot) if CAPTURE else None
+quality_governor = QualityGovernor(
+    QUALITY_STEPS, apply_quality, budget=QUALITY_BUDGET / 1000) if (
+        QUALITY) else None
+if quality_governor:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    quality_governor.logger.addHandler(handler)
+    quality_governor.logger.setLevel(logging.INFO)
+attract_mode = AttractMode(bot) if ATTRACT_MODE else None
+if RESTORE:
+    restore_round(snapshot.load(RESTORE))
+
+
+def run_headless(speed=SPEED, fps=FPS):
+    """
+    the main loop of the headless run: the simulated time is advanced
+    by 1/fps per frame, then scheduled functions, events and drawing
+    run as in pyglet.app.run() (the drawing also switches game frames)
+    """
+    dt = 1 / fps
+    while not pyglet.app.event_loop.has_exit and not window.has_exit:
+        started = time.perf_counter()
+        simulated_time.advance(dt)
+        pyglet.clock.tick()
+        window.dispatch_events()
+        window.dispatch_event("on_draw")
+        window.flip()
+        if speed:
+            rest = dt / speed - (time.perf_counter() - started)
+            if rest > 0:
+                time.sleep(rest)
+
+
+if gc_policy:
+    gc_policy.loaded()
+    if TIMER:  # a restored round
+        gc_policy.round_started()
+
+if RECORD:
+    start_recording()
+
+if HEADLESS:
+    run_headless()
+else:
+    pyglet.app.run()
+
+if high_scores:
+    high_scores.close()  # the queued rounds are written
+if telemetry:
+    telemetry.close()
+if spectator_server:
+    spectator_server.close()
+if snapshot_writer:
+    snapshot_writer.close()
+if recorder:
+    stop_recording()
+# the pauses are not added to the trace any more while it is written
+gc_monitor.close()
+if profiler:
+    print(profiler.close())
+if sampler:
+    print(sampler.close())
+if profiler or gc_policy:
+    print(gc_monitor.report())
+if window.latency:
+    print(window.latency.report())
+if attract_mode and attract_mode.failed:
+    sys.exit(1)
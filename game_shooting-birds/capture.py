@@ -0,0 +1,257 @@
+"""
+capture: frames of the game saved to PNG and compared with golden images
+
+python birds.py --capture DIR plays a scripted headless round (seeded,
+simulated time) and saves the frames listed in CAPTURES of birds.py:
+the Start screen, the round with its spawned targets, the Pause overlay
+and the End screen with the score. The pixels are read back by the game
+(the GL context belongs to the main loop), flipping, PNG encoding and
+writing run in the worker thread of FrameWriter.
+
+python capture.py runs the capture and compares the frames with golden
+images: a pixel differs when one of its channels differs by more than
+--tolerance, a frame fails when more than --max-share of its pixels
+differ. A diff image (differing pixels in red) is saved next to every
+failed frame and the exit status is 1. --update makes the captured
+frames the new golden images (after an intended change of rendering).
+
+example:
+    python capture.py --golden golden --output captures --tolerance 8
+"""
+
+import argparse
+import queue
+import shutil
+import struct
+import subprocess
+import sys
+import threading
+import zlib
+from pathlib import Path
+
+GAME_DIRECTORY = Path(__file__).resolve().parent
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def png_chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data)))
+
+
+def encode_png(width, height, pixels, bottom_up=True):
+    """
+    RGBA pixels (rows from the bottom as glReadPixels gives them) -> PNG
+    """
+    pixels = memoryview(pixels).cast("B")
+    stride = width * 4
+    offsets = range(0, height * stride, stride)
+    if bottom_up:
+        offsets = reversed(offsets)
+    # filter type 0 (none) before every row
+    rows = b"".join(
+        b"\x00" + pixels[offset:offset + stride] for offset in offsets)
+    return (
+        PNG_SIGNATURE
+        + png_chunk(b"IHDR", struct.pack(
+            ">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + png_chunk(b"IDAT", zlib.compress(rows, 6))
+        + png_chunk(b"IEND", b""))
+
+
+def paeth(left, up, up_left):
+    estimate = left + up - up_left
+    distances = abs(estimate - left), abs(estimate - up), (
+        abs(estimate - up_left))
+    return (left, up, up_left)[distances.index(min(distances))]
+
+
+def decode_png(path):
+    """
+    PNG (8 bits per channel, RGB or RGBA, not interlaced)
+    -> (width, height, RGBA rows from the top)
+    """
+    data = Path(path).read_bytes()
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError(f"{path} is not a PNG")
+    offset = len(PNG_SIGNATURE)
+    compressed = []
+    while offset < len(data):
+        length, kind = struct.unpack_from(">I4s", data, offset)
+        body = data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+        if kind == b"IHDR":
+            width, height, depth, color, _, _, interlace = struct.unpack(
+                ">IIBBBBB", body)
+            if depth != 8 or color not in (2, 6) or interlace:
+                raise ValueError(f"{path}: unsupported PNG format")
+        elif kind == b"IDAT":
+            compressed.append(body)
+        elif kind == b"IEND":
+            break
+    channels = 4 if color == 6 else 3
+    stride = width * channels
+    raw = zlib.decompress(b"".join(compressed))
+    rows = []
+    previous = bytearray(stride)
+    for row in range(height):
+        start = row * (stride + 1)
+        kind = raw[start]
+        line = bytearray(raw[start + 1:start + 1 + stride])
+        if kind == 2:  # up
+            line = bytearray((a + b) & 0xff for a, b in zip(line, previous))
+        elif kind in (1, 3, 4):  # sub, average, paeth
+            for index in range(stride):
+                left = line[index - channels] if index >= channels else 0
+                up = previous[index]
+                if kind == 1:
+                    predicted = left
+                elif kind == 3:
+                    predicted = (left + up) // 2
+                else:
+                    up_left = (
+                        previous[index - channels] if index >= channels else 0)
+                    predicted = paeth(left, up, up_left)
+                line[index] = (line[index] + predicted) & 0xff
+        rows.append(bytes(line))
+        previous = line
+    pixels = b"".join(rows)
+    if channels == 3:
+        pixels = b"".join(
+            pixels[index:index + 3] + b"\xff"
+            for index in range(0, len(pixels), 3))
+    return width, height, pixels
+
+
+class FrameWriter:
+    """
+    frames read back by the game are encoded and written in a worker
+    thread, save() only queues the buffer (the buffer must not be
+    reused by the caller)
+    """
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(
+            target=self.run, name="frame writer", daemon=True)
+        self.thread.start()
+
+    def save(self, name, width, height, pixels):
+        self.queue.put((name, width, height, pixels))
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            name, width, height, pixels = item
+            path = self.directory / f"{name}.png"
+            path.write_bytes(encode_png(width, height, pixels))
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+def compare(actual, golden, tolerance):
+    """
+    share of differing pixels and the mask of them (None if the sizes
+    differ), images are (width, height, pixels) of decode_png()
+    """
+    import numpy
+
+    if actual[:2] != golden[:2]:
+        return 1.0, None
+    width, height = actual[:2]
+    first = numpy.frombuffer(actual[2], numpy.uint8).reshape(height, width, 4)
+    second = numpy.frombuffer(golden[2], numpy.uint8).reshape(
+        height, width, 4)
+    difference = numpy.abs(
+        first.astype(numpy.int16) - second).max(axis=2)
+    mask = difference > tolerance
+    return float(mask.mean()), mask
+
+
+def diff_image(actual, mask):
+    """
+    the captured frame in gray with the differing pixels in red
+    """
+    import numpy
+
+    width, height, pixels = actual
+    image = numpy.frombuffer(pixels, numpy.uint8).reshape(height, width, 4)
+    gray = (image[:, :, :3].mean(axis=2) * 0.5).astype(numpy.uint8)
+    result = numpy.dstack([gray, gray, gray, numpy.full_like(gray, 255)])
+    result[mask] = (255, 0, 0, 255)
+    return encode_png(width, height, result.tobytes(), bottom_up=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="capture frames of the game and compare them "
+                    "with golden images")
+    parser.add_argument("--golden", default="golden")
+    parser.add_argument("--output", default="captures")
+    parser.add_argument(
+        "--tolerance", type=int, default=8,
+        help="largest difference of a channel of an equal pixel")
+    parser.add_argument(
+        "--max-share", type=float, default=0.002,
+        help="largest share of differing pixels of a passing frame")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--no-run", action="store_true",
+        help="compare the frames already captured in --output")
+    parser.add_argument(
+        "--update", action="store_true",
+        help="the captured frames become the golden images")
+    arguments = parser.parse_args()
+
+    output = Path(arguments.output).resolve()
+    golden = Path(arguments.golden).resolve()
+    if not arguments.no_run:
+        subprocess.run([
+            sys.executable, "birds.py", "--capture", str(output),
+            "--seed", str(arguments.seed), "--highscores", "",
+            "--telemetry", "", "--snapshot", ""],
+            cwd=GAME_DIRECTORY, check=True)
+
+    frames = sorted(output.glob("*.png"))
+    frames = [frame for frame in frames if not frame.stem.endswith("-diff")]
+    if not frames:
+        sys.exit(f"no frames in {output}")
+    if arguments.update:
+        golden.mkdir(parents=True, exist_ok=True)
+        for frame in frames:
+            shutil.copy(frame, golden / frame.name)
+        print(f"{len(frames)} golden images updated in {golden}")
+        return
+
+    failed = 0
+    for frame in frames:
+        reference = golden / frame.name
+        if not reference.exists():
+            print(f"{frame.stem}: no golden image (see --update)")
+            failed += 1
+            continue
+        actual = decode_png(frame)
+        share, mask = compare(
+            actual, decode_png(reference), arguments.tolerance)
+        if share <= arguments.max_share:
+            print(f"{frame.stem}: ok ({share:.4%} pixels differ)")
+            continue
+        failed += 1
+        if mask is None:
+            print(f"{frame.stem}: FAILED (size {actual[0]}x{actual[1]} "
+                  f"differs from the golden image)")
+        else:
+            diff = output / f"{frame.stem}-diff.png"
+            diff.write_bytes(diff_image(actual, mask))
+            print(f"{frame.stem}: FAILED ({share:.4%} pixels differ, "
+                  f"see {diff})")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
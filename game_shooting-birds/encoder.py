@@ -0,0 +1,116 @@
+"""
+encoder: the process which writes the frames of a recording
+
+It is started by Recorder (see recorder.py) and never imports pyglet.
+The frames are in slots of a shared memory block; the recorder sends
+(slot, frame number) on stdin for every frame, the encoder writes the
+frame and sends the slot number back on stdout when the slot is free
+again. Formats:
+    ffmpeg: the frames are piped to ffmpeg (H.264 in an .mp4 file)
+    raw: all frames in one file of RGBA pixels (rows from the bottom)
+         and a .json file with the size and frame rate
+    png: a directory with one PNG per frame (slow, for short clips)
+"""
+
+import argparse
+import json
+import struct
+import subprocess
+import sys
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+
+from capture import encode_png
+
+MESSAGE = struct.Struct("<II")  # slot, frame number
+END = 0xffffffff  # the slot of the last message
+
+
+def attach(name):
+    """
+    the shared memory of the recorder (it is unlinked by the recorder,
+    not by the resource tracker of this process)
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
+
+
+class Output:
+    def __init__(self, path, width, height, fps, format):
+        self.path = Path(path)
+        self.width, self.height, self.fps = width, height, fps
+        self.format = format
+        self.frames = 0
+        if format == "ffmpeg":
+            self.process = subprocess.Popen([
+                "ffmpeg", "-loglevel", "error", "-y", "-f", "rawvideo",
+                "-pix_fmt", "rgba", "-s", f"{width}x{height}",
+                "-r", str(fps), "-i", "-", "-vf", "vflip",
+                "-pix_fmt", "yuv420p", "-c:v", "libx264",
+                "-preset", "veryfast", str(self.path)],
+                stdin=subprocess.PIPE)
+        elif format == "raw":
+            self.file = open(self.path, "wb")
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, frame, number):
+        if self.format == "ffmpeg":
+            self.process.stdin.write(frame)
+        elif self.format == "raw":
+            self.file.write(frame)
+        else:
+            (self.path / f"{number:06d}.png").write_bytes(
+                encode_png(self.width, self.height, frame))
+        self.frames += 1
+
+    def close(self):
+        if self.format == "ffmpeg":
+            self.process.stdin.close()
+            self.process.wait()
+        elif self.format == "raw":
+            self.file.close()
+            self.path.with_suffix(".json").write_text(json.dumps({
+                "width": self.width, "height": self.height, "fps": self.fps,
+                "pixels": "rgba", "rows": "bottom up",
+                "frames": self.frames}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="encoder of recordings")
+    parser.add_argument("--memory", required=True)
+    parser.add_argument("--width", type=int, required=True)
+    parser.add_argument("--height", type=int, required=True)
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument(
+        "--format", choices=["ffmpeg", "raw", "png"], default="raw")
+    parser.add_argument("output")
+    arguments = parser.parse_args()
+
+    frame_size = arguments.width * arguments.height * 4
+    memory = attach(arguments.memory)
+    output = Output(
+        arguments.output, arguments.width, arguments.height, arguments.fps,
+        arguments.format)
+    messages = sys.stdin.buffer
+    freed = sys.stdout.buffer
+    try:
+        while True:
+            message = messages.read(MESSAGE.size)
+            if len(message) < MESSAGE.size:
+                break
+            slot, number = MESSAGE.unpack(message)
+            if slot == END:
+                break
+            output.write(
+                memory.buf[slot * frame_size:(slot + 1) * frame_size], number)
+            freed.write(bytes([slot]))
+            freed.flush()
+    finally:
+        output.close()
+        memory.close()
+
+
+if __name__ == "__main__":
+    main()
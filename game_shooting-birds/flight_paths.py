@@ -0,0 +1,221 @@
+"""
+flight paths: sine weaves, dives, Bezier arcs and loops of birds
+
+Every path is sampled once into a lookup table parameterized by the arc
+length (the bird flies at a constant speed along the curve) and the table
+is shared by all birds. The table stores the offset of the path against
+the straight flight (dx, dy), so the existing motion of a bird (its
+speed and the scrolling of the landscape) stays as it is and the offset
+is only added to its sprite. The offsets of all birds are interpolated
+in one numpy operation per tick; the sprites in a SpriteLayer are moved
+directly in the arrays of the layer.
+"""
+
+import numpy
+
+SPAN = 1600  # horizontal length of a path (birds cross about 1440 px)
+RAW_SAMPLES = 4096  # samples of the curve before the arc length table
+
+
+def straight(t):
+    return t * SPAN, numpy.zeros_like(t)
+
+
+def sine(t, amplitude=60, waves=3):
+    return t * SPAN, amplitude * numpy.sin(2 * numpy.pi * waves * t)
+
+
+def dive(t, depth=160, width=0.12):
+    return t * SPAN, -depth * numpy.exp(-((t - 0.5) / width) ** 2)
+
+
+def bezier(t, points=((0, 0), (0.3, 220), (0.7, -120), (1, 0))):
+    """
+    cubic Bezier arc (x of the control points in parts of SPAN)
+    """
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = points
+    weights = ((1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t ** 2,
+               t ** 3)
+    x = sum(w * p for w, p in zip(weights, (x0, x1, x2, x3))) * SPAN
+    y = sum(w * p for w, p in zip(weights, (y0, y1, y2, y3)))
+    return x, y
+
+
+def loop(t, radius=70, start=0.5):
+    """
+    straight flight with one loop (a circle) in the middle
+    """
+    # the circle takes its share of t according to its length
+    circle = 2 * numpy.pi * radius
+    total = SPAN + circle
+    before = start * SPAN / total
+    after = before + circle / total
+    x = numpy.where(
+        t < before, t * total,
+        numpy.where(t < after, start * SPAN, t * total - circle))
+    y = numpy.zeros_like(t)
+    inside = (t >= before) & (t < after)
+    angle = (t[inside] - before) / (after - before) * 2 * numpy.pi
+    x[inside] += radius * numpy.sin(angle)
+    y[inside] = radius * (1 - numpy.cos(angle))
+    return x, y
+
+
+PATHS = {
+    "straight": straight, "sine": sine, "dive": dive, "bezier": bezier,
+    "loop": loop}
+
+
+class FlightPaths:
+    def __init__(self, samples=512, capacity=64):
+        self.names = list(PATHS)
+        self.samples = samples
+        # tables: offsets against the straight flight by arc length
+        self.dx = numpy.empty((len(PATHS), samples))
+        self.dy = numpy.empty((len(PATHS), samples))
+        self.length = numpy.empty(len(PATHS))
+        for index, function in enumerate(PATHS.values()):
+            self.build_table(index, function)
+
+        self.birds = []  # bird of every slot (None = free slot)
+        self.free = []
+        self.layers = []  # SpriteLayer by its number in layer_id
+        self.capacity = 0
+        self.grow(capacity)
+
+    def build_table(self, index, function):
+        """
+        the curve is sampled densely and resampled at equal arc lengths
+        """
+        x, y = function(numpy.linspace(0, 1, RAW_SAMPLES))
+        steps = numpy.hypot(numpy.diff(x), numpy.diff(y))
+        arc = numpy.concatenate(([0], numpy.cumsum(steps)))
+        distance = numpy.linspace(0, arc[-1], self.samples)
+        self.dx[index] = numpy.interp(distance, arc, x) - distance
+        self.dy[index] = numpy.interp(distance, arc, y)
+        self.length[index] = arc[-1]
+
+    def grow(self, capacity):
+        def enlarge(array, dtype, fill=0):
+            new = numpy.full(capacity, fill, dtype=dtype)
+            if array is not None:
+                new[:len(array)] = array
+            return new
+
+        self.capacity = capacity
+        self.path = enlarge(getattr(self, "path", None), numpy.int64)
+        self.distance = enlarge(getattr(self, "distance", None), float)
+        self.speed = enlarge(getattr(self, "speed", None), float)
+        self.size = enlarge(getattr(self, "size", None), float)
+        self.direction = enlarge(getattr(self, "direction", None), float)
+        self.applied_dx = enlarge(getattr(self, "applied_dx", None), float)
+        self.applied_dy = enlarge(getattr(self, "applied_dy", None), float)
+        # -1 = sprite without a layer (pyglet.sprite.Sprite)
+        self.layer_id = enlarge(getattr(self, "layer_id", None), int, -1)
+        self.layer_slot = enlarge(getattr(self, "layer_slot", None), int)
+        self.active = enlarge(getattr(self, "active", None), bool, False)
+
+    def offsets(self, path, distance):
+        """
+        offsets (dx, dy) of the paths at the distances (arrays),
+        after the end of a path the bird flies straight
+        """
+        position = numpy.clip(
+            distance / self.length[path], 0, 1) * (self.samples - 1)
+        index = numpy.minimum(position.astype(int), self.samples - 2)
+        fraction = position - index
+        dx = self.dx[path, index]
+        dy = self.dy[path, index]
+        dx += (self.dx[path, index + 1] - dx) * fraction
+        dy += (self.dy[path, index + 1] - dy) * fraction
+        return dx, dy
+
+    def add(self, bird, name, distance=0):
+        """
+        the bird follows the path, its sprite is already at the position
+        of the distance flown (0 = at the start of the path)
+        """
+        if name == "straight":
+            return
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.birds)
+            if slot == self.capacity:
+                self.grow(self.capacity * 2)
+            self.birds.append(None)
+        self.birds[slot] = bird
+        bird.flight_slot = slot
+
+        path = self.names.index(name)
+        self.path[slot] = path
+        self.distance[slot] = distance
+        self.speed[slot] = abs(bird.speed)
+        self.size[slot] = bird.scale / (4/10)  # small birds are far away
+        self.direction[slot] = (
+            1 if bird.direction_of_flight["to_right"] else -1)
+        dx, dy = self.offsets(
+            numpy.array([path]), numpy.array([float(distance)]))
+        self.applied_dx[slot] = dx[0] * self.size[slot] * (
+            self.direction[slot])
+        self.applied_dy[slot] = dy[0] * self.size[slot]
+        self.active[slot] = True
+
+        layer = getattr(bird.pic, "layer", None)
+        if layer is None:
+            self.layer_id[slot] = -1
+        else:
+            if layer not in self.layers:
+                self.layers.append(layer)
+            self.layer_id[slot] = self.layers.index(layer)
+            self.layer_slot[slot] = bird.pic.slot
+
+    def remove(self, bird):
+        slot = getattr(bird, "flight_slot", None)
+        if slot is None:
+            return
+        bird.flight_slot = None
+        self.birds[slot] = None
+        self.active[slot] = False
+        self.free.append(slot)
+
+    def state(self, bird):
+        """
+        (name of the path, distance flown) of the bird
+        """
+        slot = getattr(bird, "flight_slot", None)
+        if slot is None:
+            return "straight", 0
+        return self.names[self.path[slot]], float(self.distance[slot])
+
+    def update(self, dt):
+        """
+        the distances of all birds are advanced and the change
+        of their offsets is added to their sprites
+        """
+        count = len(self.birds)
+        slots = numpy.flatnonzero(self.active[:count])
+        if not len(slots):
+            return
+        self.distance[slots] += self.speed[slots] * dt
+        dx, dy = self.offsets(self.path[slots], self.distance[slots])
+        dx *= self.size[slots] * self.direction[slots]
+        dy *= self.size[slots]
+        move_x = dx - self.applied_dx[slots]
+        move_y = dy - self.applied_dy[slots]
+        self.applied_dx[slots] = dx
+        self.applied_dy[slots] = dy
+
+        layer_id = self.layer_id[slots]
+        for number, layer in enumerate(self.layers):
+            mask = layer_id == number
+            if not mask.any():
+                continue
+            layer_slots = self.layer_slot[slots[mask]]
+            layer.x[layer_slots] += move_x[mask]
+            layer.y[layer_slots] += move_y[mask]
+            layer.touch(int(layer_slots.min()), int(layer_slots.max()) + 1)
+        for index in numpy.flatnonzero(layer_id == -1):
+            pic = self.birds[slots[index]].pic
+            pic.x += move_x[index]
+            pic.y += move_y[index]
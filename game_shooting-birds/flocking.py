@@ -0,0 +1,309 @@
+"""
+flocking: birds flying in flocks (separation, alignment, cohesion)
+
+Every bird of a flock has a velocity, the forces of all birds are
+computed in one numpy pass per tick. Neighbours are found by a spatial
+hash: every bird gets the key of its grid cell (cell size = radius of
+the neighbourhood, the flock is a part of the key), the keys are sorted
+and only the birds in the 3x3 neighbouring cells are compared, so the
+cost grows with the number of birds and their close neighbours, not
+with the square of the number of birds.
+
+As in flight_paths.py the own motion of a bird (its speed and the
+scrolling of the landscape) stays as it is, the flock only adds
+the difference of its velocity to the sprite.
+
+python flocking.py runs a benchmark with up to a few thousand birds.
+"""
+
+import argparse
+import time
+
+import numpy
+
+
+def neighbour_pairs(x, y, flock, radius):
+    """
+    pairs (i, j) of birds of the same flock in neighbouring cells
+    of the spatial hash (i != j, the distance is not checked yet)
+    """
+    count = len(x)
+    flock = numpy.unique(flock, return_inverse=True)[1]  # 0, 1, 2, ...
+    cell_x = numpy.floor(x / radius).astype(numpy.int64)
+    cell_y = numpy.floor(y / radius).astype(numpy.int64)
+    cell_x -= cell_x.min() - 1  # one empty cell around the birds
+    cell_y -= cell_y.min() - 1
+    width = int(cell_x.max()) + 2
+    height = int(cell_y.max()) + 2
+    keys = (flock * height + cell_y) * width + cell_x
+    order = numpy.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    first, second = [], []
+    for offset_y in (-1, 0, 1):
+        for offset_x in (-1, 0, 1):
+            cell = keys + offset_y * width + offset_x
+            start = numpy.searchsorted(sorted_keys, cell, "left")
+            counts = numpy.searchsorted(sorted_keys, cell, "right") - start
+            total = int(counts.sum())
+            if not total:
+                continue
+            # for every bird the indices of the birds in the cell
+            index = numpy.repeat(numpy.arange(count), counts)
+            within = numpy.arange(total) - numpy.repeat(
+                numpy.cumsum(counts) - counts, counts)
+            first.append(index)
+            second.append(order[numpy.repeat(start, counts) + within])
+    if not first:
+        return numpy.empty(0, int), numpy.empty(0, int)
+    first = numpy.concatenate(first)
+    second = numpy.concatenate(second)
+    different = first != second
+    return first[different], second[different]
+
+
+class Flocking:
+    def __init__(
+            self, radius=60, separation_radius=22, separation=900,
+            alignment=1.2, cohesion=0.6, goal=0.8, band=90, capacity=64):
+        self.radius = radius  # neighbourhood (and cell size of the hash)
+        self.separation_radius = separation_radius
+        # weights of the forces
+        self.separation = separation
+        self.alignment = alignment
+        self.cohesion = cohesion
+        self.goal = goal  # keeping the direction and speed of the flock
+        self.band = band  # vertical distance from the home of the flock
+
+        self.birds = []
+        self.free = []
+        self.layers = []
+        self.next_flock = 0
+        self.capacity = 0
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        def enlarge(array, dtype, fill=0):
+            new = numpy.full(capacity, fill, dtype=dtype)
+            if array is not None:
+                new[:len(array)] = array
+            return new
+
+        self.capacity = capacity
+        for name, dtype, fill in (
+                ("vx", float, 0), ("vy", float, 0), ("speed", float, 0),
+                ("home_y", float, 0), ("flock", numpy.int64, 0),
+                ("layer_id", int, -1), ("layer_slot", int, 0),
+                ("active", bool, False)):
+            setattr(self, name, enlarge(
+                getattr(self, name, None), dtype, fill))
+
+    def new_flock(self):
+        self.next_flock += 1
+        return self.next_flock
+
+    def add(self, bird, flock):
+        """
+        the bird flies in the flock (it starts with its own velocity)
+        """
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.birds)
+            if slot == self.capacity:
+                self.grow(self.capacity * 2)
+            self.birds.append(None)
+        self.birds[slot] = bird
+        bird.flock_slot = slot
+        self.vx[slot] = self.speed[slot] = bird.speed
+        self.vy[slot] = 0
+        self.home_y[slot] = bird.pic.y
+        self.flock[slot] = flock
+        self.active[slot] = True
+
+        layer = getattr(bird.pic, "layer", None)
+        if layer is None:
+            self.layer_id[slot] = -1
+        else:
+            if layer not in self.layers:
+                self.layers.append(layer)
+            self.layer_id[slot] = self.layers.index(layer)
+            self.layer_slot[slot] = bird.pic.slot
+
+    def remove(self, bird):
+        slot = getattr(bird, "flock_slot", None)
+        if slot is None:
+            return
+        bird.flock_slot = None
+        self.birds[slot] = None
+        self.active[slot] = False
+        self.free.append(slot)
+
+    def state(self, bird):
+        """
+        (flock, vx, vy, home_y) of the bird, flock 0 = not in a flock
+        """
+        slot = getattr(bird, "flock_slot", None)
+        if slot is None:
+            return 0, 0, 0, 0
+        return (int(self.flock[slot]), float(self.vx[slot]),
+                float(self.vy[slot]), float(self.home_y[slot]))
+
+    def restore(self, bird, flock, vx, vy, home_y):
+        """
+        the bird continues in its flock (e.g. from a snapshot)
+        """
+        self.add(bird, flock)
+        slot = bird.flock_slot
+        self.vx[slot], self.vy[slot], self.home_y[slot] = vx, vy, home_y
+        self.next_flock = max(self.next_flock, flock)
+
+    def flocks(self):
+        """
+        number of flocks with at least one bird
+        """
+        count = len(self.birds)
+        return len(numpy.unique(self.flock[:count][self.active[:count]]))
+
+    def positions(self, slots):
+        x = numpy.empty(len(slots))
+        y = numpy.empty(len(slots))
+        layer_id = self.layer_id[slots]
+        for number, layer in enumerate(self.layers):
+            mask = layer_id == number
+            x[mask] = layer.x[self.layer_slot[slots[mask]]]
+            y[mask] = layer.y[self.layer_slot[slots[mask]]]
+        for index in numpy.flatnonzero(layer_id == -1):
+            pic = self.birds[slots[index]].pic
+            x[index], y[index] = pic.x, pic.y
+        return x, y
+
+    def move(self, slots, move_x, move_y):
+        layer_id = self.layer_id[slots]
+        for number, layer in enumerate(self.layers):
+            mask = layer_id == number
+            if not mask.any():
+                continue
+            layer_slots = self.layer_slot[slots[mask]]
+            layer.x[layer_slots] += move_x[mask]
+            layer.y[layer_slots] += move_y[mask]
+            layer.touch(int(layer_slots.min()), int(layer_slots.max()) + 1)
+        for index in numpy.flatnonzero(layer_id == -1):
+            pic = self.birds[slots[index]].pic
+            pic.x += move_x[index]
+            pic.y += move_y[index]
+
+    def update(self, dt):
+        """
+        forces of all birds -> velocities -> the sprites are moved
+        """
+        count = len(self.birds)
+        slots = numpy.flatnonzero(self.active[:count])
+        if not len(slots) or not dt:
+            return
+        x, y = self.positions(slots)
+        vx, vy = self.vx[slots], self.vy[slots]
+        speed = self.speed[slots]
+        size = len(slots)
+
+        first, second = neighbour_pairs(
+            x, y, self.flock[slots], self.radius)
+        dx = x[first] - x[second]
+        dy = y[first] - y[second]
+        distance2 = dx * dx + dy * dy
+        near = distance2 < self.radius ** 2
+        first, second = first[near], second[near]
+        dx, dy, distance2 = dx[near], dy[near], distance2[near]
+
+        neighbours = numpy.bincount(first, minlength=size)
+        has = neighbours > 0
+        divisor = numpy.maximum(neighbours, 1)
+
+        # separation: away from too close birds (stronger when closer)
+        close = distance2 < self.separation_radius ** 2
+        weight = 1 / numpy.maximum(distance2[close], 1)
+        ax = self.separation * numpy.bincount(
+            first[close], dx[close] * weight, size)
+        ay = self.separation * numpy.bincount(
+            first[close], dy[close] * weight, size)
+        # alignment: the mean velocity of the neighbours
+        ax += self.alignment * has * (numpy.bincount(
+            first, vx[second], size) / divisor - vx)
+        ay += self.alignment * has * (numpy.bincount(
+            first, vy[second], size) / divisor - vy)
+        # cohesion: the centre of the neighbours
+        ax += self.cohesion * has * (numpy.bincount(
+            first, x[second], size) / divisor - x)
+        ay += self.cohesion * has * (numpy.bincount(
+            first, y[second], size) / divisor - y)
+        # the flock keeps its direction, speed and height
+        ax += self.goal * (speed - vx)
+        offset = y - self.home_y[slots]
+        ay -= self.goal * numpy.where(
+            numpy.abs(offset) > self.band, offset, 0) + self.goal * vy
+
+        vx = vx + ax * dt
+        vy = vy + ay * dt
+        # the speed stays between 0.6 and 1.6 times the speed of the bird
+        limit = numpy.abs(speed)
+        magnitude = numpy.maximum(numpy.hypot(vx, vy), 1e-9)
+        scale = numpy.clip(magnitude, 0.6 * limit, 1.6 * limit) / magnitude
+        vx *= scale
+        vy *= scale
+        self.vx[slots] = vx
+        self.vy[slots] = vy
+
+        # the own motion of the bird (speed) is done by its update()
+        self.move(slots, (vx - speed) * dt, vy * dt)
+
+
+def benchmark():
+    parser = argparse.ArgumentParser(description="benchmark of flocking")
+    parser.add_argument(
+        "--birds", type=int, nargs="+", default=[250, 500, 1000, 2000, 4000])
+    parser.add_argument("--flock-size", type=int, default=40)
+    parser.add_argument("--ticks", type=int, default=100)
+    arguments = parser.parse_args()
+
+    class Layer:  # arrays like SpriteLayer
+        def __init__(self, capacity):
+            self.x = numpy.zeros(capacity, dtype=numpy.float32)
+            self.y = numpy.zeros(capacity, dtype=numpy.float32)
+
+        def touch(self, low, high):
+            pass
+
+    class Pic:
+        def __init__(self, layer, slot):
+            self.layer, self.slot = layer, slot
+
+        @property
+        def y(self):
+            return float(self.layer.y[self.slot])
+
+    class Bird:
+        def __init__(self, layer, slot, speed):
+            self.pic = Pic(layer, slot)
+            self.speed = speed
+
+    random = numpy.random.default_rng(1)
+    for count in arguments.birds:
+        layer = Layer(count)
+        flocking = Flocking()
+        for slot in range(count):
+            if slot % arguments.flock_size == 0:
+                flock = flocking.new_flock()
+                centre = random.uniform(0, 4000), random.uniform(0, 600)
+            layer.x[slot] = centre[0] + random.normal(0, 40)
+            layer.y[slot] = centre[1] + random.normal(0, 25)
+            flocking.add(Bird(layer, slot, 50), flock)
+        flocking.update(1 / 60)
+        started = time.perf_counter()
+        for _ in range(arguments.ticks):
+            flocking.update(1 / 60)
+        elapsed = (time.perf_counter() - started) / arguments.ticks
+        print(f"{count} birds: {elapsed * 1000:.2f} ms per tick")
+
+
+if __name__ == "__main__":
+    benchmark()
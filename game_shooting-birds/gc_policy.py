@@ -0,0 +1,156 @@
+"""
+gc policy: pauses of the garbage collector and the collections of rounds
+
+Birds, dark birds, flowers and bullets are created and deleted all the
+time and they are cyclic garbage (sprites, bound methods scheduled
+on the clock, references back to the game), so the collector runs
+during the round. GCMonitor measures every collection by gc.callbacks:
+the pauses are passed on (the profiler adds them to its trace, nested
+in their frames), summed per displayed frame and taken per round
+by attract mode (take()).
+
+GCPolicy (--gc-policy):
+    - after loading, everything is collected once and frozen
+      (gc.freeze), the collections never scan the loaded objects again
+    - during the round (TIMER) the threshold of the oldest generation
+      is raised, so there is no full collection in the round; the young
+      generations are still collected, their pauses are short
+    - at the end of the round (END_GAME) and at reset() the thresholds
+      are restored and everything is collected explicitly, while
+      the score is displayed
+"""
+
+import gc
+import time
+
+DEFERRED_THRESHOLD = 1_000_000  # threshold of the oldest generation
+
+
+class GCMonitor:
+    def __init__(self, on_pause=None, clock=time.perf_counter_ns):
+        self.on_pause = on_pause  # on_pause(name, start ns, duration ns)
+        self.clock = clock
+        self.started = None
+        self.explicit = False  # the collection is called by the policy
+        self.collections = [0, 0, 0]  # per generation, since the start
+        self.total = 0  # ns of all pauses
+        self.longest = 0
+        self.frame_pause = 0  # ns of the pauses in the current frame
+        self.start_period()
+        gc.callbacks.append(self.callback)
+
+    def callback(self, phase, info):
+        if phase == "start":
+            self.started = self.clock()
+            return
+        if self.started is None:
+            return
+        duration = self.clock() - self.started
+        generation = info["generation"]
+        self.collections[generation] += 1
+        self.total += duration
+        self.longest = max(self.longest, duration)
+        self.frame_pause += duration
+        if self.explicit:
+            self.period_explicit += 1
+        else:
+            self.period_collections += 1
+            self.period_full += generation == 2
+            self.period_total += duration
+            self.period_longest = max(self.period_longest, duration)
+        if self.on_pause:
+            name = f"gc generation {generation}"
+            if self.explicit:
+                name += " (explicit)"
+            self.on_pause(name, self.started, duration)
+        self.started = None
+
+    def frame(self):
+        """
+        the frame has been displayed, its pauses are attributed to it
+        """
+        if self.frame_pause:
+            self.period_frames += 1
+            self.period_frame_max = max(
+                self.period_frame_max, self.frame_pause)
+            self.frame_pause = 0
+
+    def start_period(self):
+        self.period_collections = 0
+        self.period_full = 0
+        self.period_explicit = 0
+        self.period_total = 0
+        self.period_longest = 0
+        self.period_frames = 0  # frames with a pause
+        self.period_frame_max = 0  # ns of the pauses of the worst frame
+
+    def take(self):
+        """
+        statistics since the last take() (e.g. of the round),
+        the explicit collections of the policy are counted apart
+        """
+        statistics = {
+            "gc_collections": self.period_collections,
+            "gc_full": self.period_full,
+            "gc_explicit": self.period_explicit,
+            "gc_pause_ms": round(self.period_total / 1e6, 3),
+            "gc_pause_max_ms": round(self.period_longest / 1e6, 3),
+            "gc_frames": self.period_frames,
+            "gc_frame_max_ms": round(self.period_frame_max / 1e6, 3)}
+        self.start_period()
+        return statistics
+
+    def report(self):
+        generations = ", ".join(
+            f"{count} of generation {generation}"
+            for generation, count in enumerate(self.collections))
+        return (
+            f"gc: {generations}; pauses {self.total / 1e6:.1f} ms, "
+            f"max {self.longest / 1e6:.2f} ms")
+
+    def close(self):
+        gc.callbacks.remove(self.callback)
+
+
+class GCPolicy:
+    def __init__(self, monitor=None):
+        self.monitor = monitor
+        self.threshold = gc.get_threshold()
+        self.deferred = False
+
+    def collect(self):
+        """
+        everything is collected now (outside of the round)
+        """
+        if self.monitor:
+            self.monitor.explicit = True
+        try:
+            gc.collect()
+        finally:
+            if self.monitor:
+                self.monitor.explicit = False
+
+    def loaded(self):
+        """
+        the game is loaded: the garbage of loading is collected,
+        the objects which live until the end are frozen
+        """
+        self.collect()
+        gc.freeze()
+
+    def round_started(self):
+        """
+        no full collections during the round
+        """
+        if not self.deferred:
+            self.deferred = True
+            gc.set_threshold(*self.threshold[:2], DEFERRED_THRESHOLD)
+
+    def round_ended(self):
+        """
+        the thresholds are restored, the garbage of the round is collected
+        """
+        if self.deferred:
+            self.deferred = False
+            gc.set_threshold(*self.threshold)
+        self.collect()
@@ -0,0 +1,119 @@
+"""
+high scores: persistent leaderboard of rounds in SQLite
+
+Every finished round (score, shots, hits, duration) is put into a queue,
+the rows are written by a background thread (in batches, one transaction
+per batch), so the game never waits for the disk. The database is in WAL
+mode with indexes by score and by date. The best rounds (top()) are served
+from a cache which is refreshed by the writer after every batch.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,  -- unix time
+    score INTEGER NOT NULL,
+    shots INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    duration REAL NOT NULL,  -- seconds
+    player TEXT NOT NULL  -- "player" or the policy of the bot
+);
+CREATE INDEX IF NOT EXISTS rounds_by_score ON rounds (score DESC, played_at);
+CREATE INDEX IF NOT EXISTS rounds_by_date ON rounds (played_at);
+"""
+
+INSERT = """
+INSERT INTO rounds (played_at, score, shots, hits, duration, player)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+TOP = """
+SELECT score, played_at, player FROM rounds
+ORDER BY score DESC, played_at LIMIT ?
+"""
+
+
+class HighScores:
+    def __init__(self, path, top=5, batch_size=64):
+        self.path = path
+        self.size = top  # number of rounds in the cache of the best rounds
+        self.batch_size = batch_size  # max rows written in one transaction
+        self.queue = queue.Queue()
+        self.cache = []  # (score, played_at, player) of the best rounds
+        self.version = 0  # incremented whenever the cache changes
+        self.thread = threading.Thread(
+            target=self.run, name="high scores", daemon=True)
+        self.thread.start()
+
+    def add(self, score, shots, hits, duration, player="player"):
+        """
+        the round is queued for writing, the call does not block
+        """
+        self.queue.put_nowait(
+            (time.time(), score, shots, hits, duration, player))
+
+    def top(self):
+        """
+        the best rounds from the cache (without access to the database)
+        """
+        return self.cache
+
+    def close(self):
+        """
+        the queued rounds are written and the writer is stopped
+        """
+        self.queue.put(None)
+        self.thread.join()
+
+    def connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # with WAL the database stays consistent, only the last
+        # transactions can be lost at a power cut
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def refresh(self, connection):
+        top = connection.execute(TOP, (self.size,)).fetchall()
+        if top != self.cache:
+            self.cache = top  # the list is replaced, not changed
+            self.version += 1
+
+    def run(self):
+        """
+        the writer thread: waits for a round, then writes it together
+        with all rounds queued in the meantime
+        """
+        try:
+            connection = self.connect()
+            self.refresh(connection)
+        except sqlite3.Error as error:
+            print(f"high scores are not available: {error}")
+            return
+
+        running = True
+        while running:
+            rows = [self.queue.get()]
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in rows:
+                running = False
+                rows = [row for row in rows if row is not None]
+            if not rows:
+                continue
+            try:
+                with connection:
+                    connection.executemany(INSERT, rows)
+                self.refresh(connection)
+            except sqlite3.Error as error:
+                print(f"high scores: {len(rows)} rounds not written: {error}")
+        connection.close()
@@ -0,0 +1,158 @@
+"""
+instanced renderer: all sprites of a SpriteLayer in one draw call
+
+One quad (four corners) is uploaded once, every sprite of the layer is
+one instance with its own attributes: position, scale, rotation,
+rectangle of the image and texture coordinates in the atlas. There is
+no depth test (the edges of the sprites are blended), the layers keep
+their order because they are drawn in the order of their groups
+(see draw_batch in birds.py). OpenGL 3.3 is required,
+create_instanced_renderer() returns None if the context does not
+support it (the layer is drawn from its batch).
+"""
+
+import ctypes
+
+from pyglet import gl
+
+VERTEX_SHADER = b"""
+#version 330
+layout(location = 0) in vec2 corner;
+layout(location = 1) in vec4 placement;  // x, y, scale, rotation
+layout(location = 2) in vec4 rect;  // left, bottom, right, top
+layout(location = 3) in vec4 uv;  // u0, v0, u1, v1
+uniform vec2 window_size;
+out vec2 tex_coord;
+
+void main() {
+    vec2 local = mix(rect.xy, rect.zw, corner) * placement.z;
+    float r = -radians(placement.w);
+    vec2 position = vec2(
+        local.x * cos(r) - local.y * sin(r),
+        local.x * sin(r) + local.y * cos(r)) + placement.xy;
+    gl_Position = vec4(position / window_size * 2.0 - 1.0, 0.0, 1.0);
+    tex_coord = mix(uv.xy, uv.zw, corner);
+}
+"""
+
+FRAGMENT_SHADER = b"""
+#version 330
+uniform sampler2D atlas;
+in vec2 tex_coord;
+out vec4 color;
+
+void main() {
+    color = texture(atlas, tex_coord);
+}
+"""
+
+# floats per instance: placement (4), rect (4), uv (4)
+INSTANCE_SIZE = 12
+
+
+def compile_shader(kind, source):
+    shader = gl.glCreateShader(kind)
+    buffer = ctypes.create_string_buffer(source)
+    pointer = ctypes.cast(
+        ctypes.pointer(ctypes.pointer(buffer)),
+        ctypes.POINTER(ctypes.POINTER(gl.GLchar)))
+    gl.glShaderSource(shader, 1, pointer, None)
+    gl.glCompileShader(shader)
+    status = gl.GLint()
+    gl.glGetShaderiv(shader, gl.GL_COMPILE_STATUS, ctypes.byref(status))
+    if not status.value:
+        log = ctypes.create_string_buffer(4096)
+        gl.glGetShaderInfoLog(shader, 4096, None, log)
+        raise RuntimeError(log.value.decode(errors="replace"))
+    return shader
+
+
+class InstancedRenderer:
+    def __init__(self):
+        self.program = gl.glCreateProgram()
+        for kind, source in (
+                (gl.GL_VERTEX_SHADER, VERTEX_SHADER),
+                (gl.GL_FRAGMENT_SHADER, FRAGMENT_SHADER)):
+            gl.glAttachShader(self.program, compile_shader(kind, source))
+        gl.glLinkProgram(self.program)
+        status = gl.GLint()
+        gl.glGetProgramiv(
+            self.program, gl.GL_LINK_STATUS, ctypes.byref(status))
+        if not status.value:
+            raise RuntimeError("instanced renderer: program is not linked")
+        self.window_size = gl.glGetUniformLocation(
+            self.program, b"window_size")
+        self.atlas = gl.glGetUniformLocation(self.program, b"atlas")
+
+        self.vao = gl.GLuint()
+        gl.glGenVertexArrays(1, ctypes.byref(self.vao))
+        gl.glBindVertexArray(self.vao)
+
+        # one quad drawn as a triangle strip, corners from 0 to 1
+        self.quad = gl.GLuint()
+        gl.glGenBuffers(1, ctypes.byref(self.quad))
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.quad)
+        corners = (gl.GLfloat * 8)(0, 0, 1, 0, 0, 1, 1, 1)
+        gl.glBufferData(
+            gl.GL_ARRAY_BUFFER, ctypes.sizeof(corners), corners,
+            gl.GL_STATIC_DRAW)
+        gl.glEnableVertexAttribArray(0)
+        gl.glVertexAttribPointer(0, 2, gl.GL_FLOAT, gl.GL_FALSE, 0, None)
+
+        # per instance attributes: location, number of floats, offset
+        self.instances = gl.GLuint()
+        gl.glGenBuffers(1, ctypes.byref(self.instances))
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.instances)
+        stride = INSTANCE_SIZE * 4
+        for location, size, offset in (
+                (1, 4, 0), (2, 4, 4), (3, 4, 8)):
+            gl.glEnableVertexAttribArray(location)
+            gl.glVertexAttribPointer(
+                location, size, gl.GL_FLOAT, gl.GL_FALSE, stride,
+                ctypes.c_void_p(offset * 4))
+            gl.glVertexAttribDivisor(location, 1)
+
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+
+    def draw(self, texture, data, width, height):
+        """
+        data: numpy array (number of instances, INSTANCE_SIZE) of float32
+        """
+        count = len(data)
+        if not count:
+            return
+        gl.glPushAttrib(gl.GL_COLOR_BUFFER_BIT)
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        gl.glActiveTexture(gl.GL_TEXTURE0)
+        gl.glBindTexture(texture.target, texture.id)
+
+        gl.glUseProgram(self.program)
+        gl.glUniform2f(self.window_size, width, height)
+        gl.glUniform1i(self.atlas, 0)
+        gl.glBindVertexArray(self.vao)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.instances)
+        # the buffer is orphaned, the driver does not wait for the last frame
+        gl.glBufferData(
+            gl.GL_ARRAY_BUFFER, data.nbytes, data.ctypes.data,
+            gl.GL_STREAM_DRAW)
+        gl.glDrawArraysInstanced(gl.GL_TRIANGLE_STRIP, 0, 4, count)
+
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        gl.glUseProgram(0)
+        gl.glPopAttrib()
+
+
+def create_instanced_renderer():
+    """
+    the renderer is created only if the OpenGL context supports it
+    """
+    if not gl.gl_info.have_version(3, 3):
+        return None
+    try:
+        return InstancedRenderer()
+    except (RuntimeError, gl.GLException) as error:
+        print(f"instanced rendering is not available: {error}")
+        return None
@@ -0,0 +1,93 @@
+"""
+memory report: memory accounting at the end of every game round
+
+MemoryReport takes a tracemalloc snapshot at every round boundary
+(reset() in birds.py) together with the numbers of live objects (sprites,
+vertex lists, scheduled callbacks) and RSS of the process. The difference
+against the previous round is printed by allocation site and check()
+raises MemoryGrowthError if the memory grows too much over several rounds.
+"""
+
+import resource
+import tracemalloc
+
+
+class MemoryGrowthError(RuntimeError):
+    pass
+
+
+def get_rss():
+    """
+    resident set size of the process in bytes
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize()
+    except OSError:
+        # peak RSS (kilobytes on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class MemoryReport:
+    def __init__(self, top=10, frames=5):
+        self.top = top  # number of allocation sites in the report
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self.snapshot = None
+        self.rounds = []  # dict for every round: traced, rss and counts
+
+    def record(self, counts):
+        """
+        counts: numbers of live objects, e.g. {"sprites": 120, ...},
+        the snapshot is taken and the report is printed
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>")))
+        current, peak = tracemalloc.get_traced_memory()
+        row = {"traced": current, "peak": peak, "rss": get_rss()}
+        row.update(counts)
+        self.rounds.append(row)
+
+        print(self.format_round(len(self.rounds) - 1))
+        if self.snapshot is not None:
+            stats = snapshot.compare_to(self.snapshot, "lineno")
+            for stat in stats[:self.top]:
+                if stat.size_diff:
+                    print(f"    {stat}")
+        self.snapshot = snapshot
+        return row
+
+    def format_round(self, index):
+        row = self.rounds[index]
+        previous = self.rounds[index - 1] if index else row
+        parts = []
+        for key, value in row.items():
+            if key == "peak":
+                continue
+            diff = value - previous[key]
+            if key in ("traced", "rss"):
+                parts.append(
+                    f"{key} {value / 2**20:.1f} MiB ({diff / 2**20:+.2f})")
+            else:
+                parts.append(f"{key} {value} ({diff:+d})")
+        return f"memory after round {index + 1}: " + ", ".join(parts)
+
+    def check(self, rounds, limit):
+        """
+        MemoryGrowthError is raised if the traced memory has grown
+        by more than limit (bytes) over the last rounds
+        """
+        if len(self.rounds) <= rounds:
+            return
+        first, last = self.rounds[-rounds - 1], self.rounds[-1]
+        growth = last["traced"] - first["traced"]
+        if growth > limit:
+            counts = ", ".join(
+                f"{key} {last[key] - first[key]:+d}" for key in last
+                if key not in ("traced", "peak", "rss"))
+            raise MemoryGrowthError(
+                f"memory has grown by {growth / 2**20:.2f} MiB "
+                f"over {rounds} rounds (limit {limit / 2**20:.2f} MiB); "
+                f"{counts}")
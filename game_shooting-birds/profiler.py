@@ -0,0 +1,196 @@
+"""
+profiler: trace spans of the phases of the game (--profile)
+
+The phases of the game (drawing, updates of objects, spawning, timers,
+input handlers, resolution of shots) are functions decorated by span().
+Without the profiler span() returns the function itself, so the game
+runs exactly the same code as without the decorator. With the profiler
+every call is one record (name, start, duration) in a bounded deque
+and every displayed frame is a span "frame" from the end of the previous
+frame, the spans of the phases are nested in it.
+
+The records are written in the Chrome trace event format (open the file
+in chrome://tracing, Perfetto or speedscope), the summary printed
+at exit has the totals of the spans and the slowest frames with their
+phases, so a bad frame can be found without any external tool.
+
+Sampler takes the stack of the main thread every interval and counts
+the stacks in the collapsed format of flamegraphs ("a;b;c count",
+for flamegraph.pl or speedscope). cProfile is not used, it keeps only
+pairs of caller and callee, not whole stacks.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from pathlib import Path
+
+EVENTS = 2_000_000  # records kept (the oldest are dropped)
+SLOWEST_FRAMES = 5  # frames with their phases in the summary
+
+
+def no_span(name=None):
+    """
+    span() of the game without the profiler: nothing is wrapped
+    """
+    return lambda function: function
+
+
+class Profiler:
+    def __init__(self, path, events=EVENTS):
+        self.path = Path(path)
+        self.events = deque(maxlen=events)  # (name, start ns, duration ns)
+        self.clock = time.perf_counter_ns
+        self.started = self.clock()
+        self.last_frame = None  # end of the previous frame
+
+    def span(self, name=None):
+        """
+        decorator: every call of the function is a span of the trace
+        (the name is the qualified name of the function by default)
+        """
+        def decorator(function):
+            label = name or function.__qualname__
+            append = self.events.append
+            clock = self.clock
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                started = clock()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    append((label, started, clock() - started))
+            return wrapper
+        return decorator
+
+    def add(self, name, started, duration):
+        """
+        a span measured elsewhere (e.g. a pause of the garbage collector)
+        """
+        self.events.append((name, started, duration))
+
+    def frame(self):
+        """
+        the frame has been displayed (called after the flip of the window)
+        """
+        now = self.clock()
+        if self.last_frame is not None:
+            self.events.append(
+                ("frame", self.last_frame, now - self.last_frame))
+        self.last_frame = now
+
+    def trace(self):
+        """
+        the records as Chrome trace events (complete events, microseconds)
+        """
+        pid = os.getpid()
+        events = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 1,
+             "args": {"name": "birds"}},
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": 1,
+             "args": {"name": "game"}}]
+        # a copy: spans may be added while the trace is built
+        # (e.g. by a collection of the garbage collector)
+        for name, started, duration in list(self.events):
+            events.append({
+                "name": name, "cat": "frame" if name == "frame" else "phase",
+                "ph": "X", "pid": pid, "tid": 1,
+                "ts": (started - self.started) / 1000,
+                "dur": duration / 1000})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as file:
+            json.dump(self.trace(), file)
+
+    def report(self):
+        """
+        totals of the spans and the slowest frames with their phases
+        """
+        totals = defaultdict(lambda: [0, 0, 0])  # count, total, max (ns)
+        frames = []
+        spans = list(self.events)  # a copy, see trace()
+        for name, started, duration in spans:
+            total = totals[name]
+            total[0] += 1
+            total[1] += duration
+            total[2] = max(total[2], duration)
+            if name == "frame":
+                frames.append((duration, started))
+        lines = [f"profile {self.path}: {len(spans)} spans"]
+        for name, (count, total, longest) in sorted(
+                totals.items(), key=lambda item: -item[1][1]):
+            lines.append(
+                f"  {name:<40} {count:>8} calls {total / 1e6:>10.1f} ms "
+                f"max {longest / 1e6:.2f} ms")
+
+        slowest = sorted(frames, reverse=True)[:SLOWEST_FRAMES]
+        for duration, started in slowest:
+            end = started + duration
+            phases = Counter()
+            for name, start, length in spans:
+                if name != "frame" and started <= start < end:
+                    phases[name] += length
+            top = ", ".join(
+                f"{name} {length / 1e6:.2f}"
+                for name, length in phases.most_common(4))
+            lines.append(
+                f"  frame at {(started - self.started) / 1e9:.3f} s: "
+                f"{duration / 1e6:.2f} ms ({top})")
+        return "\n".join(lines)
+
+    def close(self):
+        self.write()
+        return self.report()
+
+
+class Sampler:
+    """
+    stacks of the main thread sampled every interval (seconds)
+    in a daemon thread, written as collapsed stacks
+    """
+    def __init__(self, path, interval=0.001):
+        self.path = Path(path)
+        self.interval = interval
+        self.stacks = Counter()
+        self.thread_id = threading.main_thread().ident
+        # the main thread holds the GIL for the switch interval (5 ms),
+        # the sampler could not take the samples more often
+        sys.setswitchinterval(min(sys.getswitchinterval(), interval))
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="sampler", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        names = {}  # code object -> name of the frame
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = names.get(code)
+                if name is None:
+                    name = names[code] = (
+                        f"{code.co_name} ({Path(code.co_filename).name}:"
+                        f"{code.co_firstlineno})").replace(";", ",")
+                stack.append(name)
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+        return (f"stacks {self.path}: {sum(self.stacks.values())} samples, "
+                f"{len(self.stacks)} stacks")
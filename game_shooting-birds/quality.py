@@ -0,0 +1,102 @@
+"""
+quality: adaptive quality governor driven by the frame-time budget
+
+The governor gets the time of every displayed frame (the time between
+two flips of the window) and keeps the last frames in a rolling window.
+When too many frames of the window miss the budget, the quality goes
+one level down; when the frames have kept within the budget for a hold
+time, it goes one level up. The levels themselves (what is switched off
+at which level) are applied by the game through the function apply.
+
+Hysteresis keeps the level from oscillating:
+    - a frame misses the budget only above MISS_RATIO * budget, while
+      the headroom for a higher level is below HEADROOM_RATIO * budget
+    - after every change the window is emptied, the next decision needs
+      a full window of frames at the new level
+    - if the quality has to go down soon after it went up, the level
+      above is too expensive: the hold time before the next attempt
+      is doubled (up to max_hold)
+
+Every change is logged (logger "birds.quality").
+"""
+
+import logging
+import time
+from collections import deque
+
+MISS_RATIO = 1.25  # a frame longer than 1.25 * budget has missed it
+HEADROOM_RATIO = 1.1  # p90 of frames below 1.1 * budget has headroom
+
+
+class QualityGovernor:
+    def __init__(
+            self, levels, apply, budget=1/60, window=90, misses=0.1,
+            hold=4, max_hold=64, time_function=time.perf_counter):
+        self.levels = levels  # names of the steps, level N = N steps down
+        self.apply = apply  # apply(level) switches the steps of the level
+        self.budget = budget  # seconds per frame
+        self.misses = misses  # share of missed frames for a lower level
+        self.initial_hold = hold
+        self.hold = hold  # seconds within the budget for a higher level
+        self.max_hold = max_hold
+        self.time_function = time_function
+
+        self.level = 0
+        self.frame_times = deque(maxlen=window)
+        self.last_frame = None
+        self.changed = time_function()  # time of the last change
+        self.raised = False  # the last change was a higher level
+        self.logger = logging.getLogger("birds.quality")
+
+    def frame(self):
+        """
+        the frame has been displayed (called after the flip of the window)
+        """
+        now = self.time_function()
+        if self.last_frame is not None:
+            self.frame_times.append(now - self.last_frame)
+        self.last_frame = now
+        if len(self.frame_times) == self.frame_times.maxlen:
+            self.decide(now)
+
+    def pause(self):
+        """
+        the next frame does not continue the previous one (a restored round,
+        the collection between rounds, a synced save at pause),
+        its time is not measured
+        """
+        self.last_frame = None
+
+    def decide(self, now):
+        frame_times = sorted(self.frame_times)
+        missed = sum(
+            1 for frame_time in frame_times
+            if frame_time > self.budget * MISS_RATIO)
+        p90 = frame_times[int(len(frame_times) * 0.9)]
+        if missed > self.misses * len(frame_times):
+            if self.level < len(self.levels):
+                if self.raised and now - self.changed < self.hold:
+                    # the higher level does not keep within the budget
+                    self.hold = min(self.hold * 2, self.max_hold)
+                self.change(self.level + 1, now, (
+                    f"{missed} of {len(frame_times)} frames over "
+                    f"{self.budget * 1000:.1f} ms"))
+        elif p90 < self.budget * HEADROOM_RATIO:
+            if self.level and now - self.changed >= self.hold:
+                self.change(self.level - 1, now, (
+                    f"p90 {p90 * 1000:.1f} ms for {now - self.changed:.0f} s"))
+            elif not self.level:
+                self.hold = self.initial_hold
+
+    def change(self, level, now, reason):
+        step = self.levels[max(level, self.level) - 1]
+        self.logger.info(
+            f"quality {self.level} -> {level} "
+            f"({'off' if level > self.level else 'on'}: {step}; {reason}; "
+            f"next raise after {self.hold:.0f} s)")
+        self.raised = level < self.level
+        self.level = level
+        self.changed = now
+        self.frame_times.clear()
+        self.last_frame = None  # the change itself may take a frame
+        self.apply(level)
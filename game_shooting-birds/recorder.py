@@ -0,0 +1,189 @@
+"""
+recorder: video recording of the game with asynchronous pixel readback
+
+Every displayed frame is read back into one of two pixel buffer objects
+(glReadPixels into a PBO returns at once, the copy runs on the GPU);
+the buffer of the previous frame is mapped and copied into a free slot
+of a shared memory block, so the game thread does not wait for the
+readback of the current frame. The encoder process (see encoder.py)
+writes the frames of the slots and frees them again. When no slot is
+free, the encoder has fallen behind and the frame is dropped instead
+of stalling the game; the dropped frames are counted in the report.
+
+The size of the recording is the size of the view when the recording
+starts, frames of another size (after a resize) are dropped.
+"""
+
+import ctypes
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from pathlib import Path
+
+from pyglet import gl
+
+from encoder import MESSAGE, END
+
+ENCODER = Path(__file__).resolve().parent / "encoder.py"
+SUFFIXES = {"ffmpeg": ".mp4", "raw": ".rgba", "png": ""}
+
+
+class Recorder:
+    def __init__(self, output, width, height, fps=60, format="auto",
+                 slots=6):
+        """
+        output is the path without a suffix (it is given by the format)
+        """
+        if format == "auto":
+            format = "ffmpeg" if shutil.which("ffmpeg") else "raw"
+        self.output = Path(output).with_suffix(SUFFIXES[format])
+        self.format = format
+        self.width, self.height = width, height
+        self.frame_size = width * height * 4
+        self.number = 0  # frames read back
+        self.recorded = 0  # frames handed to the encoder
+        self.dropped = 0
+        self.costs = deque(maxlen=10000)  # seconds on the game thread
+
+        self.memory = shared_memory.SharedMemory(
+            create=True, size=slots * self.frame_size)
+        self.slots = [
+            (ctypes.c_ubyte * self.frame_size).from_buffer(
+                self.memory.buf, slot * self.frame_size)
+            for slot in range(slots)]
+        self.free = queue.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        self.process = subprocess.Popen([
+            sys.executable, str(ENCODER), "--memory", self.memory.name,
+            "--width", str(width), "--height", str(height),
+            "--fps", str(fps), "--format", format, str(self.output)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.reader = threading.Thread(
+            target=self.read_freed, name="recorder", daemon=True)
+        self.reader.start()
+
+        # two pixel buffer objects: one is written by the GPU,
+        # the other one (the previous frame) is read
+        self.buffers = None
+        self.pending = None  # number of the frame in the other buffer
+        if gl.gl_info.have_version(2, 1) or gl.gl_info.have_extension(
+                "GL_ARB_pixel_buffer_object"):
+            self.buffers = (gl.GLuint * 2)()
+            gl.glGenBuffers(2, self.buffers)
+            for buffer in self.buffers:
+                gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, buffer)
+                gl.glBufferData(
+                    gl.GL_PIXEL_PACK_BUFFER, self.frame_size, None,
+                    gl.GL_STREAM_READ)
+            gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+
+    def read_freed(self):
+        """
+        slots freed by the encoder (in a thread, the pipe blocks)
+        """
+        while True:
+            freed = self.process.stdout.read(1)
+            if not freed:
+                return
+            self.free.put(freed[0])
+
+    def frame(self, x, y, width, height):
+        """
+        the back buffer of the view is read (called before the flip)
+        """
+        started = time.perf_counter()
+        self.number += 1
+        if (width, height) != (self.width, self.height):
+            self.dropped += 1
+        elif self.buffers is None:
+            self.read_directly(x, y)
+        else:
+            current = self.buffers[self.number % 2]
+            gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, current)
+            gl.glReadPixels(
+                x, y, width, height, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, None)
+            if self.pending is not None:
+                self.deliver(self.buffers[self.pending % 2], self.pending)
+            self.pending = self.number
+            gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+        self.costs.append(time.perf_counter() - started)
+
+    def read_directly(self, x, y):
+        """
+        without pixel buffer objects the frame is read synchronously
+        """
+        slot = self.take_slot()
+        if slot is not None:
+            gl.glReadPixels(
+                x, y, self.width, self.height, gl.GL_RGBA,
+                gl.GL_UNSIGNED_BYTE, self.slots[slot])
+            self.send(slot, self.number)
+
+    def deliver(self, buffer, number):
+        """
+        the frame in the pixel buffer object -> a free slot
+        """
+        slot = self.take_slot()
+        if slot is None:
+            return
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, buffer)
+        pixels = gl.glMapBuffer(gl.GL_PIXEL_PACK_BUFFER, gl.GL_READ_ONLY)
+        if pixels:
+            ctypes.memmove(self.slots[slot], pixels, self.frame_size)
+            self.send(slot, number)
+        else:
+            self.free.put(slot)
+            self.dropped += 1
+        gl.glUnmapBuffer(gl.GL_PIXEL_PACK_BUFFER)
+
+    def take_slot(self):
+        try:
+            return self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1  # the encoder has fallen behind
+            return None
+
+    def send(self, slot, number):
+        # at most one message per slot is waiting, the pipe never blocks
+        self.process.stdin.write(MESSAGE.pack(slot, number))
+        self.process.stdin.flush()
+        self.recorded += 1
+
+    def close(self):
+        """
+        the last frame is delivered, the encoder finishes its frames,
+        the summary is returned
+        """
+        if self.buffers is not None:
+            if self.pending is not None:
+                self.deliver(self.buffers[self.pending % 2], self.pending)
+                gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+            gl.glDeleteBuffers(2, self.buffers)
+        self.process.stdin.write(MESSAGE.pack(END, 0))
+        self.process.stdin.close()
+        self.process.wait()
+        self.reader.join()
+        self.slots = None  # the views must be released before closing
+        self.memory.close()
+        self.memory.unlink()
+        return self.report()
+
+    def report(self):
+        costs = sorted(self.costs)
+
+        def percentile(value):
+            if not costs:
+                return 0
+            return costs[min(len(costs) - 1, int(len(costs) * value))] * 1000
+
+        return (
+            f"recording {self.output} ({self.format}): "
+            f"{self.recorded} frames recorded, {self.dropped} dropped; "
+            f"game thread p50 {percentile(0.5):.2f} ms, "
+            f"p95 {percentile(0.95):.2f} ms, max {percentile(1):.2f} ms")
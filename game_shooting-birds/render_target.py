@@ -0,0 +1,88 @@
+"""
+render target: the world drawn offscreen at an internal resolution
+
+The world (landscape, targets, bullets) is drawn into the texture of
+a framebuffer object at a part of the resolution of the window, then
+the texture is stretched over the view of the window. The score, frames
+and crosshair are drawn after it at the full resolution, so only the
+world loses detail on fill-rate-bound hardware.
+
+The texture is allocated for the largest size asked for so far, smaller
+internal sizes use a region of it (the scale can change every frame
+without new allocations). Without framebuffer objects (OpenGL < 3.0
+without GL_ARB_framebuffer_object) the world is drawn into the corner
+of the back buffer and copied into the texture.
+"""
+
+from ctypes import byref
+
+import pyglet
+from pyglet import gl
+
+
+class RenderTarget:
+    def __init__(self):
+        self.offscreen = (
+            gl.gl_info.have_version(3, 0)
+            or gl.gl_info.have_extension("GL_ARB_framebuffer_object"))
+        self.framebuffer = None
+        self.texture = None
+        self.capacity = 0, 0  # the size the texture was allocated for
+        self.region = None  # the part of the texture drawn in this frame
+
+    def allocate(self, width, height):
+        """
+        the texture (and its framebuffer) for at least width x height
+        """
+        width = max(width, self.capacity[0])
+        height = max(height, self.capacity[1])
+        self.capacity = width, height
+        self.texture = None  # the old texture is freed by pyglet
+        self.texture = pyglet.image.Texture.create(width, height)
+        if not self.offscreen:
+            return
+        if self.framebuffer is None:
+            self.framebuffer = gl.GLuint()
+            gl.glGenFramebuffers(1, byref(self.framebuffer))
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        gl.glFramebufferTexture2D(
+            gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0, self.texture.target,
+            self.texture.id, 0)
+        status = gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        if status != gl.GL_FRAMEBUFFER_COMPLETE:
+            print(f"framebuffer is not complete ({status:#x}), "
+                  f"the back buffer is used")
+            self.offscreen = False
+
+    def begin(self, width, height):
+        """
+        the following drawing goes into the target (width x height pixels)
+        """
+        if width > self.capacity[0] or height > self.capacity[1]:
+            self.allocate(width, height)
+        self.region = self.texture.get_region(0, 0, width, height)
+        if self.offscreen:
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+            gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+        gl.glViewport(0, 0, width, height)
+
+    def end(self):
+        """
+        the drawing goes into the window again
+        """
+        if self.offscreen:
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        else:
+            gl.glBindTexture(self.texture.target, self.texture.id)
+            gl.glCopyTexSubImage2D(
+                self.texture.target, 0, 0, 0, 0, 0,
+                self.region.width, self.region.height)
+            gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+
+    def blit(self, x, y, width, height):
+        """
+        the drawn region stretched over the rectangle (coordinates
+        of the projection, the viewport is set by the caller)
+        """
+        self.region.blit(x, y, width=width, height=height)
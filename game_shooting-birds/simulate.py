@@ -0,0 +1,166 @@
+"""
+batch simulation of game rounds for balancing
+
+Headless rounds played by the bot (see Bot in birds.py) are distributed
+over all cores by a process pool. Every task is one combination
+of settings, bot policy and seed; it runs the game in its own fresh
+process (python birds.py --headless --attract ...) and the rows of its
+rounds are aggregated into one compact JSON file: score distribution,
+hit rate and time to kill for every combination of settings and policy.
+
+example:
+    python simulate.py --grid NUMBER_OF_BIRDS=4,8 SCROLL_SPEED=100,150 \
+        --bots nearest,max_score --seeds 8 --rounds 5 --output results.json
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import runpy
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+GAME_DIRECTORY = Path(__file__).resolve().parent
+
+
+def parse_grid(items):
+    """
+    ["NUMBER_OF_BIRDS=4,8", ...] -> [{"NUMBER_OF_BIRDS": "4"}, ...]
+    (all combinations of values)
+    """
+    names, values = [], []
+    for item in items:
+        name, _, options = item.partition("=")
+        names.append(name)
+        values.append(options.split(","))
+    return [
+        dict(zip(names, combination))
+        for combination in itertools.product(*values)]
+
+
+def run_task(task):
+    """
+    one headless game (several rounds) in this worker process,
+    the rows of its rounds are returned
+    """
+    settings, policy, seed, rounds = task
+    os.chdir(GAME_DIRECTORY)  # media are loaded from relative paths
+    sys.path.insert(0, str(GAME_DIRECTORY))
+    with tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False) as file:
+        results = file.name
+    sys.argv = [
+        "birds.py", "--headless", "--speed", "0", "--attract",
+        "--rounds", str(rounds), "--bot", policy, "--seed", str(seed),
+        "--log", "", "--results", results, "--highscores", "",
+        "--telemetry", "", "--snapshot", ""]
+    for name, value in settings.items():
+        sys.argv += ["--set", f"{name}={value}"]
+    try:
+        runpy.run_path(str(GAME_DIRECTORY / "birds.py"), run_name="__main__")
+    except SystemExit:
+        pass
+    with open(results) as file:
+        rows = [json.loads(line) for line in file]
+    os.remove(results)
+    return settings, policy, seed, rows
+
+
+def percentile(values, value):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * value))]
+
+
+def aggregate(rows):
+    """
+    score distribution, hit rate and time to kill of many rounds
+    """
+    scores = [row["score"] for row in rows]
+    shots = sum(row["shots"] for row in rows)
+    hits = sum(row["hits"] for row in rows)
+    kills = sum(row["ttk_count"] for row in rows)
+    ttk = sum(
+        row["ttk_mean"] * row["ttk_count"] for row in rows if row["ttk_count"])
+    mean = sum(scores) / len(scores) if scores else None
+    return {
+        "rounds": len(rows),
+        "score_mean": round(mean, 2) if scores else None,
+        "score_std": round((sum(
+            (score - mean) ** 2 for score in scores) / len(scores)) ** 0.5, 2)
+        if scores else None,
+        "score_min": min(scores, default=None),
+        "score_p10": percentile(scores, 0.1),
+        "score_p50": percentile(scores, 0.5),
+        "score_p90": percentile(scores, 0.9),
+        "score_max": max(scores, default=None),
+        "hit_rate": round(hits / shots, 4) if shots else None,
+        "dark_hit_rate": round(
+            sum(row["dark_hits"] for row in rows) / shots, 4)
+        if shots else None,
+        "time_to_kill": round(ttk / kills, 3) if kills else None}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="batch simulation of rounds for balancing")
+    parser.add_argument(
+        "--grid", nargs="*", default=[], metavar="NAME=V1,V2",
+        help="settings of birds.py and their values")
+    parser.add_argument(
+        "--bots", default="nearest", help="bot policies (comma separated)")
+    parser.add_argument(
+        "--seeds", type=int, default=4, help="number of seeds per cell")
+    parser.add_argument(
+        "--rounds", type=int, default=5, help="rounds per seed")
+    parser.add_argument(
+        "--processes", type=int, default=os.cpu_count(),
+        help="number of worker processes (default: all cores)")
+    parser.add_argument("--output", default="simulation.json")
+    arguments = parser.parse_args()
+
+    tasks = [
+        (settings, policy, seed, arguments.rounds)
+        for settings in parse_grid(arguments.grid)
+        for policy in arguments.bots.split(",")
+        for seed in range(arguments.seeds)]
+
+    started = time.monotonic()
+    cells = {}
+    # every game runs in a fresh process: the game keeps its state
+    # in module globals and it owns an OpenGL context
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(arguments.processes, maxtasksperchild=1) as pool:
+        for done, (settings, policy, seed, rows) in enumerate(
+                pool.imap_unordered(run_task, tasks), start=1):
+            key = json.dumps([settings, policy], sort_keys=True)
+            cells.setdefault(key, []).extend(rows)
+            print(
+                f"{done}/{len(tasks)} {policy} seed {seed} {settings}: "
+                f"scores {[row['score'] for row in rows]}")
+
+    results = {
+        "rounds_per_seed": arguments.rounds,
+        "seeds": arguments.seeds,
+        "seconds": round(time.monotonic() - started, 1),
+        "cells": [
+            dict(settings=json.loads(key)[0], bot=json.loads(key)[1],
+                 **aggregate(rows))
+            for key, rows in sorted(cells.items())]}
+    for cell in results["cells"]:
+        # a bot which never hits makes the whole cell meaningless
+        if cell["hit_rate"] == 0:
+            print(
+                f"warning: {cell['bot']} {cell['settings']}: no hits "
+                f"in {cell['rounds']} rounds")
+    with open(arguments.output, "w") as file:
+        json.dump(results, file, indent=1)
+    print(f"results: {arguments.output} ({results['seconds']} s)")
+
+
+if __name__ == "__main__":
+    main()
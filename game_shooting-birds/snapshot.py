@@ -0,0 +1,183 @@
+"""
+snapshot: compact binary snapshot of a running round (save and restore)
+
+The state of a round is a dictionary of plain values (see capture_round()
+in birds.py): the header and arrays of records (scrolling backgrounds,
+scheduled functions, flowers, birds, dark birds, falling birds) and
+the states of random generators. pack() turns it into bytes with
+struct (one Struct per array), unpack() gives the same dictionary back.
+
+Files are written by SnapshotWriter in a background thread into a
+temporary file which then replaces the old snapshot, so a crash during
+the write never leaves a broken snapshot.
+"""
+
+import itertools
+import os
+import struct
+import threading
+
+MAGIC = b"BRDS"
+VERSION = 3
+
+# name, struct format
+HEADER = [
+    ("magic", "4s"),
+    ("version", "H"),
+    ("scenes", "H"),  # bits of the scene flags (SCENES in birds.py)
+    ("move", "B"),  # index in MOVES of birds.py, 255 = no move
+    ("mouse_moves", "B"),  # bits: left, middle, right
+    ("score", "i"),
+    ("shots", "I"),
+    ("hits", "I"),
+    ("round_time", "d"),  # seconds since the start of the countdown TIMER
+    ("bullets", "B"),
+    ("gray_bullets", "B"),
+    ("countdown", "h"),  # timer_3_2_1
+    ("countdown_running", "B"),
+    ("timer", "h"),
+    ("timer_running", "B"),
+    ("crosshair_x", "h"),
+    ("crosshair_y", "h"),
+    ("animation_time", "d"),
+    ("scrolling", "B"),  # numbers of records in the arrays
+    ("schedules", "B"),
+    ("flowers", "H"),
+    ("birds", "H"),
+    ("dark_birds", "H"),
+    ("falling", "H"),
+    ("bot_random", "B"),  # 1 if the state of the bot generator follows
+]
+
+BIRD = [
+    ("image", "B"), ("scale", "B"), ("x", "d"), ("y", "d"), ("speed", "d"),
+    ("phase", "d"), ("path", "B"), ("distance", "d"), ("flock", "I"),
+    ("vx", "d"), ("vy", "d"), ("home_y", "d")]
+
+# one record of every array
+ARRAYS = {
+    # landscape, land, grass, clouds; phase = elapsed time of the bobbing
+    "scrolling": [("x", "d"), ("y", "d"), ("speed", "d"), ("phase", "d")],
+    # seconds to the next call and interval of the scheduled function
+    "schedules": [("remaining", "d"), ("interval", "d")],
+    # image: 0 = small flower, 1-4 = flower1-4
+    "flowers": [("image", "B"), ("x", "d"), ("y", "d"), ("speed", "d")],
+    # image: 0 = flies to right, 1 = flies to left; scale in tenths;
+    # path: index of the flight path, distance flown along it;
+    # flock: 0 = no flock, velocity and home height in the flock
+    "birds": BIRD,
+    "dark_birds": BIRD,
+    # kind: 0 = light, 1 = dark; rotation_left = seconds of the rotation
+    "falling": [
+        ("image", "B"), ("kind", "B"), ("scale", "B"), ("x", "d"),
+        ("y", "d"), ("rotation", "d"), ("speed", "d"),
+        ("rotation_left", "d")],
+}
+
+HEADER_STRUCT = struct.Struct("<" + "".join(code for _, code in HEADER))
+# random.getstate(): 624 words and the index, then gauss_next
+RANDOM_STRUCT = struct.Struct("<625IBd")
+
+
+def array_struct(name, count, cache={}):
+    """
+    Struct for count records of the array (cached)
+    """
+    key = name, count
+    if key not in cache:
+        cache[key] = struct.Struct(
+            "<" + "".join(code for _, code in ARRAYS[name]) * count)
+    return cache[key]
+
+
+def pack_random(state):
+    version, words, gauss = state
+    return RANDOM_STRUCT.pack(*words, gauss is not None, gauss or 0)
+
+
+def unpack_random(data, offset):
+    values = RANDOM_STRUCT.unpack_from(data, offset)
+    gauss = values[626] if values[625] else None
+    return (3, tuple(values[:625]), gauss)
+
+
+def pack(state):
+    """
+    the state of the round -> bytes
+    """
+    header = dict(state["header"], magic=MAGIC, version=VERSION)
+    for name in ARRAYS:
+        header[name] = len(state[name])
+    header["bot_random"] = state["bot_random"] is not None
+    parts = [HEADER_STRUCT.pack(*(header[name] for name, _ in HEADER))]
+    for name in ARRAYS:
+        items = state[name]
+        parts.append(array_struct(name, len(items)).pack(
+            *itertools.chain.from_iterable(items)))
+    parts.append(pack_random(state["random"]))
+    if state["bot_random"] is not None:
+        parts.append(pack_random(state["bot_random"]))
+    return b"".join(parts)
+
+
+def unpack(data):
+    """
+    bytes -> the state of the round (ValueError for a foreign file)
+    """
+    header = dict(zip(
+        (name for name, _ in HEADER), HEADER_STRUCT.unpack_from(data)))
+    if header["magic"] != MAGIC or header["version"] != VERSION:
+        raise ValueError("not a snapshot of this version of the game")
+    state = {"header": header}
+    offset = HEADER_STRUCT.size
+    for name, fields in ARRAYS.items():
+        record = array_struct(name, header[name])
+        values = record.unpack_from(data, offset)
+        offset += record.size
+        size = len(fields)
+        state[name] = [
+            values[index:index + size]
+            for index in range(0, len(values), size)]
+    state["random"] = unpack_random(data, offset)
+    offset += RANDOM_STRUCT.size
+    state["bot_random"] = (
+        unpack_random(data, offset) if header["bot_random"] else None)
+    return state
+
+
+def load(path):
+    with open(path, "rb") as file:
+        return unpack(file.read())
+
+
+class SnapshotWriter:
+    """
+    the snapshot is written in a background thread, a snapshot is skipped
+    if the previous one is still being written
+    """
+    def __init__(self, path):
+        self.path = path
+        self.thread = None
+
+    def save(self, data):
+        if self.thread is not None and self.thread.is_alive():
+            return False
+        self.thread = threading.Thread(
+            target=self.write, args=(data,), name="snapshot", daemon=True)
+        self.thread.start()
+        return True
+
+    def write(self, data):
+        temporary = f"{self.path}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(temporary, self.path)
+        except OSError as error:
+            print(f"snapshot is not saved: {error}")
+
+    def close(self):
+        if self.thread is not None:
+            self.thread.join()
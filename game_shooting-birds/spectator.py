@@ -0,0 +1,305 @@
+"""
+spectator: broadcast of the world state to spectators (a second screen)
+
+SpectatorServer runs an asyncio loop in a background thread. The game
+publishes a snapshot of the world (scene, score, timer, crosshair,
+targets) at a set rate, the server sends it to every connected spectator
+as a delta against the last snapshot acknowledged by that spectator
+(or as a keyframe, the whole state). Every spectator has a bounded queue:
+if the spectator is too slow, its queue is dropped and the next message
+is a keyframe, so the game never waits for the network.
+
+Spectators connect over TCP (JSON lines) or WebSocket (JSON text frames)
+on the same port. Messages:
+    server: {"seq": 5, "base": null, "state": {...}}  keyframe
+            {"seq": 6, "base": 5, "set": {...}, "targets": {...},
+             "removed": [...]}  delta against the snapshot 5
+    spectator: {"ack": 6}  (the first line of a TCP spectator is a hello)
+
+python spectator.py --port 8765 runs a headless spectator (for tests).
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+WEBSOCKET_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+HISTORY = 64  # snapshots kept as bases of deltas
+
+
+def diff(base, state):
+    """
+    the delta which changes the state base into the state
+    """
+    delta = {
+        "set": {
+            key: value for key, value in state.items()
+            if key != "targets" and base.get(key) != value},
+        "targets": {
+            key: value for key, value in state["targets"].items()
+            if base["targets"].get(key) != value},
+        "removed": [key for key in base["targets"]
+                    if key not in state["targets"]]}
+    return delta
+
+
+def apply(base, delta):
+    """
+    the new state from the base and the delta (the base is not changed)
+    """
+    state = dict(base)
+    state.update(delta["set"])
+    targets = dict(base["targets"])
+    targets.update(delta["targets"])
+    for key in delta["removed"]:
+        targets.pop(key, None)
+    state["targets"] = targets
+    return state
+
+
+def websocket_frame(payload, opcode=0x1):
+    """
+    unmasked frame of the server (text by default)
+    """
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 2**16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def read_websocket_frame(reader):
+    """
+    (opcode, payload) of the frame of a client (masked)
+    """
+    first, second = await reader.readexactly(2)
+    length = second & 0x7f
+    if length == 126:
+        length, = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack("!Q", await reader.readexactly(8))
+    mask = await reader.readexactly(4) if second & 0x80 else bytes(4)
+    payload = await reader.readexactly(length)
+    return first & 0x0f, bytes(
+        byte ^ mask[index % 4] for index, byte in enumerate(payload))
+
+
+class Spectator:
+    def __init__(self, writer, websocket, queue_size):
+        self.writer = writer
+        self.websocket = websocket
+        self.queue = asyncio.Queue(queue_size)
+        self.acked = None  # seq of the last acknowledged snapshot
+        self.dropped = 0  # messages dropped because the queue was full
+
+    def encode(self, message):
+        if self.websocket:
+            return websocket_frame(message)
+        return message + b"\n"
+
+
+class SpectatorServer:
+    def __init__(self, host="127.0.0.1", port=8765, queue_size=8):
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size  # messages waiting for one spectator
+        self.spectators = set()
+        self.seq = 0
+        self.history = OrderedDict()  # seq -> snapshot
+        self.loop = asyncio.new_event_loop()
+        self.started = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name="spectator server", daemon=True)
+        self.thread.start()
+        self.started.wait()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(asyncio.start_server(
+                self.handle, self.host, self.port))
+        except OSError as error:
+            print(f"spectator server is not available: {error}")
+            self.server = None
+            self.started.set()
+            return
+        self.started.set()
+        self.loop.run_forever()
+
+    def publish(self, state):
+        """
+        the snapshot is broadcast (called by the game, it does not block,
+        the state must not be changed afterwards)
+        """
+        if self.server is not None:
+            self.loop.call_soon_threadsafe(self.broadcast, state)
+
+    def close(self):
+        if self.server is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    def broadcast(self, state):
+        self.seq += 1
+        self.history[self.seq] = state
+        while len(self.history) > HISTORY:
+            self.history.popitem(last=False)
+
+        # one message for every base (spectators share their encoding)
+        messages = {}
+        for spectator in self.spectators:
+            base = spectator.acked if spectator.acked in self.history else (
+                None)
+            if spectator.queue.full():
+                # the spectator is too slow: it starts again from a keyframe
+                spectator.dropped += spectator.queue.qsize()
+                while not spectator.queue.empty():
+                    spectator.queue.get_nowait()
+                base = spectator.acked = None
+            if base not in messages:
+                messages[base] = self.encode_message(base, state)
+            spectator.queue.put_nowait(messages[base])
+
+    def encode_message(self, base, state):
+        if base is None:
+            message = {"seq": self.seq, "base": None, "state": state}
+        else:
+            message = {"seq": self.seq, "base": base}
+            message.update(diff(self.history[base], state))
+        return json.dumps(message, separators=(",", ":")).encode()
+
+    async def handle(self, reader, writer):
+        """
+        one spectator: TCP (the first line is a hello) or WebSocket
+        (the first line is GET of the handshake)
+        """
+        try:
+            first = await reader.readline()
+            websocket = first.startswith(b"GET ")
+            if websocket:
+                await self.handshake(reader, writer)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            writer.close()
+            return
+        spectator = Spectator(writer, websocket, self.queue_size)
+        self.spectators.add(spectator)
+        sender = asyncio.ensure_future(self.send(spectator))
+        try:
+            await self.receive(reader, spectator)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.spectators.discard(spectator)
+            sender.cancel()
+            writer.close()
+
+    async def handshake(self, reader, writer):
+        key = None
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "sec-websocket-key":
+                key = value.strip().encode()
+        if key is None:
+            raise ValueError("Sec-WebSocket-Key is missing")
+        accept = base64.b64encode(
+            hashlib.sha1(key + WEBSOCKET_GUID).digest())
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n")
+        await writer.drain()
+
+    async def send(self, spectator):
+        while True:
+            message = await spectator.queue.get()
+            spectator.writer.write(spectator.encode(message))
+            await spectator.writer.drain()
+
+    async def receive(self, reader, spectator):
+        """
+        acknowledgements of the spectator
+        """
+        while True:
+            if spectator.websocket:
+                opcode, payload = await read_websocket_frame(reader)
+                if opcode == 0x8:  # close
+                    return
+                if opcode != 0x1:
+                    continue
+            else:
+                payload = await reader.readline()
+                if not payload:
+                    return
+            ack = json.loads(payload).get("ack")
+            if ack is None or ack in self.history:
+                spectator.acked = ack
+
+
+async def watch(host, port, updates):
+    """
+    the headless spectator: states are rebuilt from keyframes and deltas,
+    every message is acknowledged, a summary is printed once per second
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"hello":1}\n')
+    states = OrderedDict()
+    received = keyframes = size = 0
+    last_print = time.monotonic()
+    while not updates or received < updates:
+        line = await reader.readline()
+        if not line:
+            break
+        message = json.loads(line)
+        if message["base"] is None:
+            state = message["state"]
+            keyframes += 1
+        elif message["base"] in states:
+            state = apply(states[message["base"]], message)
+        else:
+            writer.write(b'{"ack":null}\n')  # a keyframe is needed
+            continue
+        states[message["seq"]] = state
+        while len(states) > HISTORY:
+            states.popitem(last=False)
+        received += 1
+        size += len(line)
+        writer.write(json.dumps({"ack": message["seq"]}).encode() + b"\n")
+        await writer.drain()
+        if time.monotonic() - last_print >= 1:
+            last_print = time.monotonic()
+            print(f"seq {message['seq']}: scene {state['scene']}, "
+                  f"score {state['score']}, timer {state['timer']}, "
+                  f"{len(state['targets'])} targets "
+                  f"({received} updates, {keyframes} keyframes, "
+                  f"{size / received:.0f} bytes per update)")
+    writer.close()
+    return received
+
+
+def main():
+    parser = argparse.ArgumentParser(description="headless spectator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--updates", type=int, default=0,
+        help="stop after N updates (0 = until the game ends)")
+    arguments = parser.parse_args()
+    received = asyncio.run(
+        watch(arguments.host, arguments.port, arguments.updates))
+    print(f"{received} updates received")
+
+
+if __name__ == "__main__":
+    main()
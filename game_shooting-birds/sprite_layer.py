@@ -0,0 +1,295 @@
+"""
+sprite layer: one vertex list for many sprites (flowers, birds, bullets)
+
+The positions, scales, rotations and images of all sprites of a layer are
+stored in numpy arrays. Setting pic.x of a LayerSprite only writes into
+the array, the vertices of all changed sprites are computed in one numpy
+operation and the changed range of the vertex buffer is uploaded once
+per tick (SpriteLayer.update() is called from draw()).
+
+All images of one layer must be stored in one texture (texture atlas).
+With a renderer (see instanced_renderer.py) the layer has no vertex list,
+all its visible sprites are drawn as instances in one call (draw()).
+"""
+
+import ctypes
+
+import pyglet
+from pyglet import gl
+
+try:
+    import numpy
+except ImportError:  # without numpy the game uses pyglet.sprite.Sprite
+    numpy = None
+
+
+class SpriteLayer:
+    def __init__(
+            self, texture, batch, group, capacity=64, renderer=None):
+        self.texture = texture
+        self.batch = batch
+        self.renderer = renderer
+        self.order = group.order  # the layers are drawn in this order
+        self.group = pyglet.sprite.SpriteGroup(
+            texture, gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA, group)
+
+        self.capacity = 0
+        self.count = 0  # number of used slots (including free slots)
+        self.free = []  # slots of deleted sprites, they are used again
+        self.vertex_list = None
+
+        # the range of slots changed since the last update
+        self.dirty_low = None
+        self.dirty_high = None
+
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        """
+        arrays and the vertex list are enlarged, the values are kept
+        """
+        def enlarge(array, shape, fill=0):
+            new = numpy.full(shape, fill, dtype=numpy.float32)
+            if array is not None:
+                new[:len(array)] = array
+            return new
+
+        old = self.capacity
+        self.capacity = capacity
+        self.x = enlarge(getattr(self, "x", None), capacity)
+        self.y = enlarge(getattr(self, "y", None), capacity)
+        self.scale = enlarge(getattr(self, "scale", None), capacity, 1)
+        self.rotation = enlarge(getattr(self, "rotation", None), capacity)
+        self.visible = enlarge(getattr(self, "visible", None), capacity)
+        # rectangle of the image relative to its anchor:
+        # left, bottom, right, top
+        self.rect = enlarge(getattr(self, "rect", None), (capacity, 4))
+        # texture coordinates in the atlas: u0, v0, u1, v1
+        self.uv = enlarge(getattr(self, "uv", None), (capacity, 4))
+
+        if self.renderer is not None:
+            pass
+        elif self.vertex_list is None:
+            self.vertex_list = self.batch.add(
+                4 * capacity, gl.GL_QUADS, self.group,
+                "v2f/stream", "t3f/dynamic", "c4B/static")
+            self.vertex_list.colors[:] = [255] * (16 * capacity)
+        else:
+            self.vertex_list.resize(4 * capacity)
+            colors = self.vertex_list.colors
+            colors[16 * old:] = [255] * (16 * (capacity - old))
+        self.touch(0, self.count)
+
+    def touch(self, low, high=None):
+        """
+        slots from low to high (excluding high) have to be uploaded
+        """
+        if high is None:
+            high = low + 1
+        if high <= low:
+            return
+        if self.dirty_low is None or low < self.dirty_low:
+            self.dirty_low = low
+        if self.dirty_high is None or high > self.dirty_high:
+            self.dirty_high = high
+
+    def add(self, image, x, y):
+        """
+        a new sprite is added to the layer, LayerSprite is returned
+        """
+        if self.free:
+            slot = self.free.pop()
+        else:
+            if self.count == self.capacity:
+                self.grow(self.capacity * 2)
+            slot = self.count
+            self.count += 1
+        self.x[slot] = x
+        self.y[slot] = y
+        self.scale[slot] = 1
+        self.rotation[slot] = 0
+        self.visible[slot] = 1
+        sprite = LayerSprite(self, slot, image)
+        self.set_image(slot, image)
+        return sprite
+
+    def remove(self, slot):
+        self.visible[slot] = 0
+        self.free.append(slot)
+        self.touch(slot)
+
+    def set_image(self, slot, image):
+        """
+        the rectangle of the sprite and its texture coordinates are changed
+        (the image must be stored in the texture of the layer)
+        """
+        self.rect[slot] = (
+            -image.anchor_x, -image.anchor_y,
+            image.width - image.anchor_x, image.height - image.anchor_y)
+        # bottom left and top right corners (flipped images included)
+        tex_coords = image.get_texture().tex_coords
+        self.uv[slot] = (
+            tex_coords[0], tex_coords[1], tex_coords[6], tex_coords[7])
+        self.touch(slot)
+        if self.renderer is not None:
+            return
+        start = self.vertex_list.start + 4 * slot
+        attribute = self.vertex_list.domain.attribute_names["tex_coords"]
+        region = attribute.get_region(attribute.buffer, start, 4)
+        region.array[:] = tex_coords
+        region.invalidate()
+
+    def update(self, dt=0):
+        """
+        vertices of all changed sprites are computed in one operation
+        and uploaded once
+        """
+        if self.dirty_low is None or self.renderer is not None:
+            return
+        low, high = self.dirty_low, self.dirty_high
+        self.dirty_low = self.dirty_high = None
+
+        scale = self.scale[low:high]
+        left, bottom, right, top = (
+            self.rect[low:high, column] * scale for column in range(4))
+        radians = -numpy.radians(self.rotation[low:high])
+        cr, sr = numpy.cos(radians), numpy.sin(radians)
+        x, y = self.x[low:high], self.y[low:high]
+
+        vertices = numpy.empty((high - low, 8), dtype=numpy.float32)
+        vertices[:, 0] = left * cr - bottom * sr + x
+        vertices[:, 1] = left * sr + bottom * cr + y
+        vertices[:, 2] = right * cr - bottom * sr + x
+        vertices[:, 3] = right * sr + bottom * cr + y
+        vertices[:, 4] = right * cr - top * sr + x
+        vertices[:, 5] = right * sr + top * cr + y
+        vertices[:, 6] = left * cr - top * sr + x
+        vertices[:, 7] = left * sr + top * cr + y
+        numpy.trunc(vertices, out=vertices)  # whole pixels like Sprite
+        vertices[self.visible[low:high] == 0] = 0
+
+        attribute = self.vertex_list.domain.attribute_names["vertices"]
+        region = attribute.get_region(
+            attribute.buffer, self.vertex_list.start + 4 * low,
+            4 * (high - low))
+        ctypes.memmove(
+            region.array, vertices.ctypes.data, vertices.nbytes)
+        region.invalidate()
+
+    def draw(self, width, height):
+        """
+        all visible sprites are drawn by the renderer in one instanced call
+        (the layer without the renderer is drawn by its batch)
+        """
+        if self.renderer is None:
+            return
+        visible = self.visible[:self.count] != 0
+        data = numpy.empty(
+            (int(visible.sum()), 12), dtype=numpy.float32)
+        data[:, 0] = self.x[:self.count][visible]
+        data[:, 1] = self.y[:self.count][visible]
+        data[:, 2] = self.scale[:self.count][visible]
+        data[:, 3] = self.rotation[:self.count][visible]
+        data[:, 4:8] = self.rect[:self.count][visible]
+        data[:, 8:12] = self.uv[:self.count][visible]
+        self.renderer.draw(self.texture, data, width, height)
+
+    def delete(self):
+        if self.vertex_list is not None:
+            self.vertex_list.delete()
+            self.vertex_list = None
+
+
+class LayerSprite:
+    """
+    The sprite stored in SpriteLayer, it can be used instead of
+    pyglet.sprite.Sprite for the attributes used by the game
+    (x, y, scale, rotation, image, width, height, delete()).
+    """
+    def __init__(self, layer, slot, image):
+        self.layer = layer
+        self.slot = slot
+        self._image = image
+
+    @property
+    def x(self):
+        return float(self.layer.x[self.slot])
+
+    @x.setter
+    def x(self, value):
+        self.layer.x[self.slot] = value
+        self.layer.touch(self.slot)
+
+    @property
+    def y(self):
+        return float(self.layer.y[self.slot])
+
+    @y.setter
+    def y(self, value):
+        self.layer.y[self.slot] = value
+        self.layer.touch(self.slot)
+
+    @property
+    def position(self):
+        return self.x, self.y
+
+    @position.setter
+    def position(self, position):
+        self.layer.x[self.slot], self.layer.y[self.slot] = position
+        self.layer.touch(self.slot)
+
+    @property
+    def scale(self):
+        return float(self.layer.scale[self.slot])
+
+    @scale.setter
+    def scale(self, value):
+        self.layer.scale[self.slot] = value
+        self.layer.touch(self.slot)
+
+    @property
+    def rotation(self):
+        return float(self.layer.rotation[self.slot])
+
+    @rotation.setter
+    def rotation(self, value):
+        self.layer.rotation[self.slot] = value
+        self.layer.touch(self.slot)
+
+    @property
+    def visible(self):
+        return bool(self.layer.visible[self.slot])
+
+    @visible.setter
+    def visible(self, value):
+        self.layer.visible[self.slot] = 1 if value else 0
+        self.layer.touch(self.slot)
+
+    @property
+    def image(self):
+        return self._image
+
+    @image.setter
+    def image(self, image):
+        self._image = image
+        self.layer.set_image(self.slot, image)
+
+    @property
+    def width(self):
+        return int(self._image.width * abs(self.scale))
+
+    @property
+    def height(self):
+        return int(self._image.height * abs(self.scale))
+
+    def update(self, x=None, y=None, rotation=None, scale=None):
+        for name, value in (
+                ("x", x), ("y", y), ("rotation", rotation), ("scale", scale)):
+            if value is not None:
+                getattr(self.layer, name)[self.slot] = value
+        self.layer.touch(self.slot)
+
+    def delete(self):
+        if self.layer is not None:
+            self.layer.remove(self.slot)
+            self.layer = None
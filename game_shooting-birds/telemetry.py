@@ -0,0 +1,184 @@
+"""
+telemetry: stream of gameplay events in fixed-size binary records
+
+Every event (shot, hit, spawn, despawn, pause, reload, start and end
+of a round) is one record of RECORD_SIZE bytes packed directly into
+a preallocated buffer (no objects are created per event). A full buffer
+(or the partial buffer at flush()) is handed over to a background thread
+which appends it to the current file and starts a new file as soon as
+the file reaches the size limit. The files have no header, they are
+arrays of records (see FIELDS and analyze.py).
+"""
+
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from pathlib import Path
+
+# events
+SHOT = 1  # kind of the first hit target or NONE (miss)
+HIT = 2  # one record for every target shot down by the shot
+DRY_FIRE = 3  # shot without bullets
+SPAWN = 4
+DESPAWN = 5  # the target left the playing field or it was removed
+PAUSE = 6
+RESUME = 7
+RELOAD = 8
+ROUND_START = 9
+ROUND_END = 10  # score = final score of the round
+
+EVENTS = {
+    SHOT: "shot", HIT: "hit", DRY_FIRE: "dry_fire", SPAWN: "spawn",
+    DESPAWN: "despawn", PAUSE: "pause", RESUME: "resume", RELOAD: "reload",
+    ROUND_START: "round_start", ROUND_END: "round_end"}
+
+# kinds of targets
+NONE = 0
+FLOWER = 1
+BIRD = 2
+DARK_BIRD = 3
+
+KINDS = {NONE: "none", FLOWER: "flower", BIRD: "bird", DARK_BIRD: "dark_bird"}
+
+# name, struct format; scale is in tenths (birds 2 or 4, small flowers 2,
+# other flowers 4), x and y are the crosshair (shot) or the target (spawn)
+FIELDS = [
+    ("time", "d"),  # seconds of the game clock
+    ("round", "I"),
+    ("id", "I"),  # number of the target (spawn, hit, despawn)
+    ("score", "i"),  # score after the event
+    ("x", "h"),
+    ("y", "h"),
+    ("event", "B"),
+    ("kind", "B"),
+    ("scale", "B"),
+    ("ammo", "b"),  # bullets left after the event
+]
+RECORD = struct.Struct("<" + "".join(code for _, code in FIELDS) + "4x")
+RECORD_SIZE = RECORD.size  # 32 bytes
+
+
+class Telemetry:
+    def __init__(
+            self, directory, time_function=time.perf_counter,
+            buffer_records=4096, buffers=4, file_size=16 * 2**20,
+            max_files=0):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = f"{socket.gethostname()}-{int(time.time())}"
+        self.time = time_function
+        self.file_size = file_size  # bytes, then the next file is started
+        self.max_files = max_files  # the oldest files are deleted, 0 = all
+
+        self.round = 0
+        self.next_id = 1
+        self.dropped = 0  # records lost because no buffer was free
+
+        # the buffers are allocated once and reused: the game writes
+        # into one of them, the others are free or waiting for the writer
+        self.capacity = buffer_records * RECORD_SIZE
+        self.free = queue.Queue()
+        for _ in range(buffers - 1):
+            self.free.put(bytearray(self.capacity))
+        self.buffer = bytearray(self.capacity)
+        self.offset = 0
+
+        self.full = queue.Queue()
+        self.files = []
+        self.thread = threading.Thread(
+            target=self.run, name="telemetry", daemon=True)
+        self.thread.start()
+
+    def new_id(self):
+        """
+        the number of a new target (stored in its spawn, hit and despawn)
+        """
+        self.next_id += 1
+        return self.next_id - 1
+
+    def record(
+            self, event, kind=NONE, x=0, y=0, ammo=0, scale=0, target_id=0,
+            score=0):
+        """
+        the event is packed into the buffer (the hot path of the game)
+        """
+        if self.offset == self.capacity and not self.swap():
+            self.dropped += 1
+            return
+        RECORD.pack_into(
+            self.buffer, self.offset, self.time(), self.round, target_id,
+            score, int(x), int(y), event, kind, scale, ammo)
+        self.offset += RECORD_SIZE
+
+    def swap(self):
+        """
+        the full buffer is handed over to the writer,
+        False is returned if no free buffer is available
+        """
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            return False
+        self.full.put((self.buffer, self.offset))
+        self.buffer = buffer
+        self.offset = 0
+        return True
+
+    def flush(self, dt=0):
+        """
+        the records written so far are handed over to the writer
+        (scheduled regularly, so the files are never far behind)
+        """
+        if self.offset:
+            self.swap()
+
+    def close(self):
+        # the last buffer goes to the writer directly: swap() would drop it
+        # when no free buffer is left, and it has the end of the round
+        if self.offset:
+            self.full.put((self.buffer, self.offset))
+            self.offset = 0
+        self.full.put(None)
+        self.thread.join()
+
+    def open_file(self):
+        path = self.directory / f"{self.prefix}-{len(self.files):04d}.tlm"
+        self.files.append(path)
+        if self.max_files:
+            # the oldest files of the directory are deleted, the files
+            # of the previous runs too (the cabinet is restarted)
+            old = sorted(
+                self.directory.glob("*.tlm"),
+                key=lambda file: (file.stat().st_mtime, file.name))
+            for file in old[:max(len(old) - self.max_files + 1, 0)]:
+                os.remove(file)
+        return open(path, "ab")
+
+    def run(self):
+        """
+        the writer thread: buffers are appended to the files
+        and returned to the game
+        """
+        file = self.open_file()
+        written = 0
+        while True:
+            item = self.full.get()
+            if item is None:
+                break
+            buffer, size = item
+            try:
+                if written + size > self.file_size and written:
+                    file.close()
+                    file = self.open_file()
+                    written = 0
+                file.write(memoryview(buffer)[:size])
+                file.flush()
+                written += size
+            except OSError as error:
+                print(
+                    f"telemetry: {size // RECORD_SIZE} records lost: {error}")
+            self.free.put(buffer)
+        file.close()
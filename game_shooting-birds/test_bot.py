@@ -0,0 +1,38 @@
+"""
+headless rounds played by the bot: the nearest bot must hit birds
+and score (its shots are at float coordinates with the aim error)
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+GAME_DIRECTORY = Path(__file__).resolve().parent
+
+
+def play(tmp_path, policy, rounds, seed):
+    """
+    the rows of the rounds (see AttractMode.end_round)
+    """
+    results = tmp_path / "results.jsonl"
+    process = subprocess.run(
+        [sys.executable, "birds.py", "--headless", "--speed", "0",
+         "--attract", "--rounds", str(rounds), "--bot", policy,
+         "--seed", str(seed), "--log", "", "--results", str(results),
+         "--highscores", "", "--telemetry", "", "--snapshot", ""],
+        cwd=GAME_DIRECTORY, capture_output=True, text=True, timeout=600)
+    if "ImageDecodeException" in process.stderr:
+        pytest.skip("pyglet cannot decode the animations (no gdk-pixbuf)")
+    assert process.returncode == 0, process.stderr
+    with open(results) as file:
+        return [json.loads(line) for line in file]
+
+
+def test_nearest_bot_scores(tmp_path):
+    rows = play(tmp_path, "nearest", rounds=2, seed=3)
+    assert len(rows) == 2
+    assert sum(row["hits"] for row in rows) > 0
+    assert sum(row["score"] for row in rows) > 0
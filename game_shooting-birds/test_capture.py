@@ -0,0 +1,23 @@
+"""
+the frames of the scripted round compared with the golden images
+(the harness is capture.py, see its docstring)
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+GAME_DIRECTORY = Path(__file__).resolve().parent
+
+
+def test_frames_match_golden_images(tmp_path):
+    process = subprocess.run(
+        [sys.executable, "capture.py", "--seed", "1",
+         "--golden", str(GAME_DIRECTORY / "golden"),
+         "--output", str(tmp_path)],
+        cwd=GAME_DIRECTORY, capture_output=True, text=True, timeout=600)
+    if "ImageDecodeException" in process.stderr:
+        pytest.skip("pyglet cannot decode the animations (no gdk-pixbuf)")
+    assert process.returncode == 0, process.stdout + process.stderr
@@ -0,0 +1,52 @@
+"""
+soak test of the memory report: many rounds without and with a leak,
+check() must pass for the first and fail for the second
+
+The game itself is soaked by attract mode with the report
+(python birds.py --headless --attract --rounds 50 --memory-report),
+which stops with the exit status 1 when check() fails.
+"""
+
+import tracemalloc
+
+import pytest
+
+from memory_report import MemoryGrowthError, MemoryReport
+
+ROUNDS = 5  # the growth is checked over N rounds
+LIMIT = 2**20  # bytes
+SOAK_ROUNDS = 30
+
+
+@pytest.fixture
+def report():
+    yield MemoryReport(top=0)
+    tracemalloc.stop()
+
+
+def play_rounds(report, rounds, leaked):
+    """
+    every round allocates its objects and frees them at its end,
+    leaked bytes of them are kept forever
+    """
+    kept = []
+    for _ in range(rounds):
+        objects = [bytearray(1024) for _ in range(512)]
+        kept.append(bytearray(leaked))
+        del objects
+        report.record({"objects": len(kept)})
+        report.check(ROUNDS, LIMIT)
+
+
+def test_steady_rounds_pass(report):
+    play_rounds(report, SOAK_ROUNDS, leaked=0)
+    assert len(report.rounds) == SOAK_ROUNDS
+    growth = report.rounds[-1]["traced"] - report.rounds[ROUNDS]["traced"]
+    assert growth < LIMIT
+
+
+def test_leaking_rounds_fail(report):
+    with pytest.raises(MemoryGrowthError, match="objects"):
+        play_rounds(report, SOAK_ROUNDS, leaked=LIMIT // ROUNDS + 4096)
+    # the leak is found as soon as there are enough rounds to compare
+    assert len(report.rounds) == ROUNDS + 1
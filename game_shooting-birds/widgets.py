@@ -0,0 +1,112 @@
+"""
+widgets: retained buttons of the menus with hover and click events
+
+A button is a label with a rectangle computed once when the button is
+created (the labels of the menus never move). The buttons of one scene
+are kept in Widgets with an index of their hit regions: a grid of cells
+(CELL pixels), every cell has the buttons which overlap it, so a mouse
+event looks up one cell and tests at most a few rectangles.
+
+Widgets only changes the labels on transitions: the button under
+the mouse gets "enter" (the hover color), the button the mouse has left
+gets "leave" (the normal color). A motion inside the same button (or
+outside all of them) changes nothing. The game asks the widgets
+of the active scene only, so hidden buttons never get events.
+"""
+
+CELL = 64  # pixels, size of a cell of the index of hit regions
+
+
+class Button:
+    def __init__(
+            self, label, version="middle", name=None, normal=None,
+            hover=None):
+        """
+        version: "middle" for a centered label,
+        "top_right" for a label anchored at the right,
+        name: what the button does (the game dispatches clicks by it)
+        """
+        self.label = label
+        self.name = name
+        self.normal = normal or label.color
+        self.hover = hover or label.color
+        self.hovered = False
+        # the rectangle is half-open: left <= x < right, bottom <= y < top
+        if version == "middle":
+            self.left = label.x - label.width // 2
+            self.right = label.x + label.width // 2
+        elif version == "top_right":
+            self.left = label.x - label.width
+            self.right = label.x
+        else:
+            raise ValueError(f"unknown version of a button: {version}")
+        self.bottom = label.y
+        self.top = label.y + label.height
+
+    def contains(self, x, y):
+        return self.left <= x < self.right and self.bottom <= y < self.top
+
+    def enter(self):
+        self.hovered = True
+        self.label.color = self.hover
+
+    def leave(self):
+        self.hovered = False
+        self.label.color = self.normal
+
+
+class Widgets:
+    """
+    buttons of one scene with the index of their hit regions
+    """
+    def __init__(self):
+        self.buttons = []
+        self.cells = {}  # (column, row) -> buttons overlapping the cell
+        self.hovered = None  # the button under the mouse
+
+    def add(self, button):
+        self.buttons.append(button)
+        for column in range(
+                button.left // CELL, (button.right - 1) // CELL + 1):
+            for row in range(
+                    button.bottom // CELL, (button.top - 1) // CELL + 1):
+                self.cells.setdefault((column, row), []).append(button)
+        return button
+
+    def hit(self, x, y):
+        """
+        the button at the point (None if there is none)
+        """
+        if x is None or y is None:
+            return None
+        for button in self.cells.get((int(x // CELL), int(y // CELL)), ()):
+            if button.contains(x, y):
+                return button
+        return None
+
+    def motion(self, x, y):
+        """
+        the mouse is at the point: enter and leave on a transition only
+        """
+        button = self.hit(x, y)
+        if button is self.hovered:
+            return
+        if self.hovered is not None:
+            self.hovered.leave()
+        self.hovered = button
+        if button is not None:
+            button.enter()
+
+    def click(self, x, y):
+        """
+        the button clicked at the point (None if there is none)
+        """
+        return self.hit(x, y)
+
+    def leave(self):
+        """
+        the scene is hidden, no button stays in the hover color
+        """
+        if self.hovered is not None:
+            self.hovered.leave()
+            self.hovered = None